@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import User
+from app.core.dependencies import require_admin
+from app.core.scheduler import scheduler
+from app.core.slow_queries import slow_query_log
+from app.core.profiling import list_profiles, profile_path
+
+router = APIRouter()
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(require_admin)
+):
+    """Most recent slow statements with captured query plans"""
+    return {
+        **slow_query_log.stats(),
+        "entries": slow_query_log.recent(limit)
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(
+    current_user: User = Depends(require_admin)
+):
+    """Empty the slow-query buffer"""
+    slow_query_log.clear()
+
+
+@router.get("/profiles")
+async def get_profiles(
+    current_user: User = Depends(require_admin)
+):
+    """Stored request profiles, newest first"""
+    return list_profiles()
+
+
+@router.get("/profiles/{name}")
+async def download_profile(
+    name: str,
+    current_user: User = Depends(require_admin)
+):
+    """Download a pstats dump (.prof) or collapsed-stack file (.collapsed)"""
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+
+@router.get("/jobs")
+async def get_jobs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Scheduled maintenance jobs with their last run"""
+    return {"enabled": scheduler.enabled, "jobs": scheduler.status(db)}
+
+
+@router.post("/jobs/{name}/run", status_code=status.HTTP_202_ACCEPTED)
+async def run_job(
+    name: str,
+    current_user: User = Depends(require_admin)
+):
+    """Run a job now on this worker's scheduler (in the background)"""
+    if name not in scheduler.jobs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if not scheduler.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Scheduler is disabled"
+        )
+    scheduler.trigger(name)
+    return {"job": name, "queued": True}
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
 from app.schemas import UserCreate, UserResponse, LoginCredentials
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import verify_password_async, get_password_hash_async, create_access_token
 from app.core.dependencies import get_current_user
 from datetime import timedelta
 
@@ -20,7 +20,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="User with this email already exists"
         )
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -58,7 +58,7 @@ async def login(credentials: LoginCredentials, db: Session = Depends(get_db)):
     """Login user"""
     user = db.query(User).filter(User.email == credentials.email).first()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -1,11 +1,21 @@
+import asyncio
+import json
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import Optional, List
 from app.database import get_db
-from app.models import Budget, Season, Team, Expense, Revenue
-from app.schemas import BudgetCreate, BudgetResponse, BudgetSummary, TeamBudgetSummary
+from app.models import Budget, Season, Team
+from app.schemas import (
+    AmountAdjustment, BatchCreateResponse, BudgetCreate, BudgetResponse, BudgetSummary, BudgetUpdate, TeamBudgetSummary
+)
 from app.core.dependencies import get_current_user, require_admin
+from app.core.optimistic import VersionConflict, increment, update_with_retry
+from app.core.writes import insert_batch, insert_returning, row_exists
+from app.core.summaries import (
+    LIVE_SUMMARY_KEEPALIVE, LIVE_SUMMARY_RETRY_MS, season_key, season_summary, summary_hub, team_key, team_summaries,
+    team_summary
+)
 
 router = APIRouter()
 
@@ -34,36 +44,99 @@ async def create_budget(
     db: Session = Depends(get_db)
 ):
     """Create a new budget"""
-    # Verify season exists
-    season = db.query(Season).filter(Season.id == budget_data.season_id).first()
-    if not season:
+    # Season/team existence is checked inside the INSERT itself
+    where = [row_exists(Season, budget_data.season_id)]
+    if budget_data.team_id:
+        where.append(row_exists(Team, budget_data.team_id))
+    
+    new_budget = insert_returning(
+        db,
+        Budget,
+        dict(
+            season_id=budget_data.season_id,
+            team_id=budget_data.team_id,
+            category=budget_data.category,
+            budgeted_amount=budget_data.budgeted_amount,
+            notes=budget_data.notes
+        ),
+        where=where,
+        references=[
+            (Season, budget_data.season_id, "Season not found"),
+            (Team, budget_data.team_id, "Team not found"),
+        ]
+    )
+    
+    return new_budget
+
+
+@router.post("/batch", response_model=BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_budgets_batch(
+    budgets_data: List[BudgetCreate],
+    db: Session = Depends(get_db)
+):
+    """Create many budgets in one transaction, reporting a result per item"""
+    rows = [item.model_dump() for item in budgets_data]
+    return insert_batch(
+        db,
+        Budget,
+        rows,
+        references={
+            "season_id": (Season, "Season not found"),
+            "team_id": (Team, "Team not found"),
+        }
+    )
+
+
+@router.patch("/{budget_id}", response_model=BudgetResponse)
+async def update_budget(
+    budget_id: str,
+    budget_data: BudgetUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update a budget; with ``version`` set, only if nobody changed it since"""
+    updates = budget_data.model_dump(exclude_unset=True, exclude={"version"})
+    try:
+        budget = update_with_retry(db, Budget, budget_id, lambda budget: updates, expected_version=budget_data.version)
+    except VersionConflict:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Budget was changed by someone else; reload and try again"
+        )
+    if budget is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Season not found"
+            detail="Budget not found"
         )
-    
-    # Verify team exists if provided
-    if budget_data.team_id:
-        team = db.query(Team).filter(Team.id == budget_data.team_id).first()
-        if not team:
+    db.commit()
+    return budget
+
+
+@router.post("/{budget_id}/adjust", response_model=BudgetResponse)
+async def adjust_budget(
+    budget_id: str,
+    adjustment: AmountAdjustment,
+    db: Session = Depends(get_db)
+):
+    """Atomically add to (or subtract from) a budgeted amount"""
+    budget = increment(
+        db, Budget, budget_id,
+        {"budgeted_amount": adjustment.delta},
+        where=[Budget.budgeted_amount + adjustment.delta >= 0]
+    )
+    if budget is None:
+        db.rollback()
+        if not db.query(row_exists(Budget, budget_id)).scalar():
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found"
+                detail="Budget not found"
             )
-    
-    new_budget = Budget(
-        season_id=budget_data.season_id,
-        team_id=budget_data.team_id,
-        category=budget_data.category,
-        budgeted_amount=budget_data.budgeted_amount,
-        notes=budget_data.notes
-    )
-    
-    db.add(new_budget)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Budgeted amount cannot go below zero"
+        )
     db.commit()
-    db.refresh(new_budget)
-    
-    return new_budget
+    return budget
 
 
 @router.get("/summary", response_model=BudgetSummary)
@@ -79,33 +152,88 @@ async def get_budget_summary(
             detail="Season not found"
         )
     
-    # Calculate totals
-    total_budgeted = db.query(func.sum(Budget.budgeted_amount)).filter(
-        Budget.season_id == season_id
-    ).scalar() or 0.0
-    
-    total_expenses = db.query(func.sum(Expense.amount)).filter(
-        Expense.season_id == season_id
-    ).scalar() or 0.0
-    
-    total_revenue = db.query(func.sum(Revenue.amount)).filter(
-        Revenue.season_id == season_id
-    ).scalar() or 0.0
-    
-    remaining_budget = total_budgeted - total_expenses
-    profit_loss = total_revenue - total_expenses
-    
-    return BudgetSummary(
-        season_id=season.id,
-        season_name=season.name,
-        total_budgeted=float(total_budgeted),
-        total_expenses=float(total_expenses),
-        total_revenue=float(total_revenue),
-        remaining_budget=float(remaining_budget),
-        profit_loss=float(profit_loss)
+    return season_summary(db, season)
+
+
+@router.get("/summary/stream")
+async def stream_budget_summaries(
+    season_id: List[str] = Query([]),
+    team_id: List[str] = Query([]),
+    db: Session = Depends(get_db)
+):
+    """Server-sent events: each summary once, then its changes as they commit"""
+    if not season_id and not team_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give at least one season_id or team_id"
+        )
+    found = db.query(Season.id).filter(Season.id.in_(season_id)).count() if season_id else 0
+    if found != len(set(season_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Season not found"
+        )
+    found = db.query(Team.id).filter(Team.id.in_(team_id)).count() if team_id else 0
+    if found != len(set(team_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+    # The stream outlives the request, so it does not hold a pooled session
+    db.close()
+
+    keys = list(dict.fromkeys([season_key(i) for i in season_id] + [team_key(i) for i in team_id]))
+    subscription = await summary_hub.subscribe(keys)
+
+    async def events():
+        try:
+            yield f"retry: {LIVE_SUMMARY_RETRY_MS}\n\n"
+            while not subscription.closed or not subscription.queue.empty():
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), LIVE_SUMMARY_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                event_name, data = item
+                yield f"event: {event_name}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            summary_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+@router.get("/teams/summary", response_model=List[TeamBudgetSummary])
+async def get_team_budget_summaries(
+    season_id: Optional[str] = Query(None),
+    team_id: List[str] = Query([]),
+    db: Session = Depends(get_db)
+):
+    """Get budget summaries for a season's teams and/or listed teams, in a fixed number of queries"""
+    if not season_id and not team_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give a season_id or at least one team_id"
+        )
+    query = db.query(Team)
+    if season_id:
+        if not db.query(row_exists(Season, season_id)).scalar():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Season not found"
+            )
+        query = query.filter(Team.season_id == season_id)
+    if team_id:
+        query = query.filter(Team.id.in_(team_id))
+    
+    return team_summaries(db, query.order_by(Team.name).all())
+
+
 @router.get("/team/{team_id}/summary", response_model=TeamBudgetSummary)
 async def get_team_budget_summary(
     team_id: str,
@@ -119,40 +247,4 @@ async def get_team_budget_summary(
             detail="Team not found"
         )
     
-    # Calculate totals
-    total_budgeted = db.query(func.sum(Budget.budgeted_amount)).filter(
-        Budget.team_id == team_id
-    ).scalar() or 0.0
-    
-    total_expenses = db.query(func.sum(Expense.amount)).filter(
-        Expense.team_id == team_id
-    ).scalar() or 0.0
-    
-    total_revenue = db.query(func.sum(Revenue.amount)).filter(
-        Revenue.team_id == team_id
-    ).scalar() or 0.0
-    
-    # Registration fees
-    from app.models import Player
-    registration_fees_collected = db.query(func.sum(Player.registration_fee_amount)).filter(
-        Player.team_id == team_id,
-        Player.registration_fee_paid == True
-    ).scalar() or 0.0
-    
-    registration_fees_expected = team.current_players * team.registration_fee
-    
-    remaining_budget = total_budgeted - total_expenses
-    profit_loss = total_revenue - total_expenses
-    
-    return TeamBudgetSummary(
-        team_id=team.id,
-        team_name=team.name,
-        total_budgeted=float(total_budgeted),
-        total_expenses=float(total_expenses),
-        total_revenue=float(total_revenue),
-        remaining_budget=float(remaining_budget),
-        profit_loss=float(profit_loss),
-        player_count=team.current_players,
-        registration_fees_collected=float(registration_fees_collected),
-        registration_fees_expected=float(registration_fees_expected)
-    )
+    return team_summary(db, team)
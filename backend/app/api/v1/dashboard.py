@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.models import Season
+from app.schemas import DashboardResponse
+from app.core.dashboard import dashboard
+
+router = APIRouter()
+
+
+@router.get("/", response_model=DashboardResponse)
+async def get_dashboard(
+    season_id: Optional[str] = Query(None),
+    limit: int = Query(10, ge=0, le=100),
+    db: Session = Depends(get_db)
+):
+    """Everything the landing page shows for a season (default: the latest active one) in one call"""
+    query = db.query(Season)
+    if season_id:
+        season = query.filter(Season.id == season_id).first()
+    else:
+        season = query.filter(Season.is_active == True).order_by(Season.start_date.desc()).first()
+    if not season:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Season not found"
+        )
+
+    return await dashboard(db, season, limit)
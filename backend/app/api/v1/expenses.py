@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.database import get_db
-from app.models import Expense, Season, Team
-from app.schemas import ExpenseCreate, ExpenseResponse
+from app.models import Expense, ExpenseAnomaly, Season, Team
+from app.schemas import BatchCreateResponse, ExpenseCreate, ExpenseResponse, ExpenseAnomalyResponse, ExpenseScanResponse
+from app.core.anomalies import expense_checks, forget_expense, scan_season
 from app.core.dependencies import get_current_user, require_coach_or_admin
+from app.core.writes import insert_batch, insert_returning, row_exists
 
 router = APIRouter()
 
@@ -36,41 +38,91 @@ async def create_expense(
     db: Session = Depends(get_db)
 ):
     """Create a new expense"""
-    # Verify season exists
-    season = db.query(Season).filter(Season.id == expense_data.season_id).first()
+    # Season/team existence is checked inside the INSERT itself
+    where = [row_exists(Season, expense_data.season_id)]
+    if expense_data.team_id:
+        where.append(row_exists(Team, expense_data.team_id))
+    
+    new_expense = insert_returning(
+        db,
+        Expense,
+        dict(
+            season_id=expense_data.season_id,
+            team_id=expense_data.team_id,
+            category=expense_data.category,
+            description=expense_data.description,
+            amount=expense_data.amount,
+            vendor=expense_data.vendor,
+            receipt_number=expense_data.receipt_number,
+            payment_date=expense_data.payment_date,
+            notes=expense_data.notes,
+            created_by="anonymous"  # No auth required
+        ),
+        where=where,
+        references=[
+            (Season, expense_data.season_id, "Season not found"),
+            (Team, expense_data.team_id, "Team not found"),
+        ]
+    )
+    
+    expense_checks.submit([new_expense])
+    return new_expense
+
+
+@router.post("/batch", response_model=BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_expenses_batch(
+    expenses_data: List[ExpenseCreate],
+    db: Session = Depends(get_db)
+):
+    """Create many expenses in one transaction, reporting a result per item"""
+    rows = [
+        dict(item.model_dump(), created_by="anonymous")
+        for item in expenses_data
+    ]
+    result = insert_batch(
+        db,
+        Expense,
+        rows,
+        references={
+            "season_id": (Season, "Season not found"),
+            "team_id": (Team, "Team not found"),
+        }
+    )
+    
+    expense_checks.submit(dict(rows[item.index], id=item.id) for item in result.results if item.id)
+    return result
+
+
+@router.get("/anomalies", response_model=List[ExpenseAnomalyResponse])
+async def get_expense_anomalies(
+    season_id: str = Query(...),
+    kind: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get suspected duplicate and outlier expenses for a season"""
+    query = db.query(ExpenseAnomaly).filter(ExpenseAnomaly.season_id == season_id)
+    if kind:
+        query = query.filter(ExpenseAnomaly.kind == kind)
+    
+    return query.order_by(ExpenseAnomaly.id.desc()).all()
+
+
+@router.post("/anomalies/scan", response_model=ExpenseScanResponse)
+async def scan_expense_anomalies(
+    season_id: str = Query(...),
+    db: Session = Depends(get_db)
+):
+    """Re-check every expense of a season from scratch"""
+    season = db.query(Season).filter(Season.id == season_id).first()
     if not season:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Season not found"
         )
     
-    # Verify team exists if provided
-    if expense_data.team_id:
-        team = db.query(Team).filter(Team.id == expense_data.team_id).first()
-        if not team:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found"
-            )
-    
-    new_expense = Expense(
-        season_id=expense_data.season_id,
-        team_id=expense_data.team_id,
-        category=expense_data.category,
-        description=expense_data.description,
-        amount=expense_data.amount,
-        vendor=expense_data.vendor,
-        receipt_number=expense_data.receipt_number,
-        payment_date=expense_data.payment_date,
-        notes=expense_data.notes,
-        created_by="anonymous"  # No auth required
-    )
-    
-    db.add(new_expense)
+    result = scan_season(db, season_id)
     db.commit()
-    db.refresh(new_expense)
-    
-    return new_expense
+    return ExpenseScanResponse(season_id=season_id, **result)
 
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
@@ -101,6 +153,7 @@ async def delete_expense(
             detail="Expense not found"
         )
     
+    forget_expense(db, expense)
     db.delete(expense)
     db.commit()
     return None
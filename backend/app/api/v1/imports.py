@@ -4,10 +4,15 @@ from sqlalchemy import insert
 from typing import List
 import csv
 import io
+from collections import Counter
 from datetime import datetime
-from app.database import get_db
-from app.models import Organization, Season, Team, Expense, Revenue, ExpenseCategory, RevenueCategory, SeasonType
+from app.database import get_db, PARTITION_BY_SEASON
+from app.models import Organization, Season, Team, Expense, Revenue, Player, ExpenseCategory, RevenueCategory, SeasonType, generate_uuid
 from app.schemas import OrganizationCreate, SeasonCreate, TeamCreate, ExpenseCreate, RevenueCreate
+from app.core.anomalies import expense_checks
+from app.core.writes import adjust_team_rosters, insert_batch
+from app.core.partitioning import ensure_season_partitions
+from app.core.metrics import ImportTimer
 
 router = APIRouter()
 
@@ -26,6 +31,13 @@ def parse_date(date_str: str) -> datetime.date:
     raise ValueError(f"Unable to parse date: {date_str}")
 
 
+def _insert_seasons(db: Session, batch: List[dict]):
+    """Bulk insert seasons, creating their ledger partitions when enabled"""
+    result = db.execute(insert(Season).values(batch).returning(Season.id))
+    if PARTITION_BY_SEASON:
+        ensure_season_partitions(db, result.scalars().all())
+
+
 @router.post("/organizations", status_code=status.HTTP_201_CREATED)
 async def import_organizations(
     file: UploadFile = File(...),
@@ -38,6 +50,7 @@ async def import_organizations(
             detail="File must be a CSV"
         )
     
+    timer = ImportTimer("organizations")
     content = await file.read()
     content_str = content.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(content_str))
@@ -62,9 +75,8 @@ async def import_organizations(
     
     if created:
         db.commit()
-        for org in created:
-            db.refresh(org)
     
+    timer.done(len(created))
     return {
         "message": f"Imported {len(created)} organizations",
         "created": len(created),
@@ -84,6 +96,7 @@ async def import_seasons(
             detail="File must be a CSV"
         )
     
+    timer = ImportTimer("seasons")
     content = await file.read()
     content_str = content.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(content_str))
@@ -111,7 +124,7 @@ async def import_seasons(
             
             # Commit in batches for better performance
             if len(batch) >= BATCH_SIZE:
-                db.execute(insert(Season).values(batch))
+                _insert_seasons(db, batch)
                 db.commit()
                 batch = []
         except Exception as e:
@@ -119,9 +132,10 @@ async def import_seasons(
     
     # Commit remaining items
     if batch:
-        db.execute(insert(Season).values(batch))
+        _insert_seasons(db, batch)
         db.commit()
     
+    timer.done(len(created))
     return {
         "message": f"Imported {len(created)} seasons",
         "created": len(created),
@@ -141,6 +155,7 @@ async def import_teams(
             detail="File must be a CSV"
         )
     
+    timer = ImportTimer("teams")
     content = await file.read()
     content_str = content.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(content_str))
@@ -182,6 +197,7 @@ async def import_teams(
         db.execute(insert(Team).values(batch))
         db.commit()
     
+    timer.done(len(created))
     return {
         "message": f"Imported {len(created)} teams",
         "created": len(created),
@@ -201,6 +217,7 @@ async def import_expenses(
             detail="File must be a CSV"
         )
     
+    timer = ImportTimer("expenses")
     content = await file.read()
     content_str = content.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(content_str))
@@ -218,6 +235,7 @@ async def import_expenses(
                 category = ExpenseCategory.OTHER
             
             batch.append({
+                'id': generate_uuid(),  # Known up front for the anomaly check
                 'season_id': row.get('season_id', '').strip(),
                 'team_id': row.get('team_id', '').strip() or None,
                 'category': category,  # Use enum object, SQLAlchemy will handle conversion
@@ -235,6 +253,7 @@ async def import_expenses(
             if len(batch) >= BATCH_SIZE:
                 db.execute(insert(Expense).values(batch))
                 db.commit()
+                expense_checks.submit(batch)
                 batch = []
         except Exception as e:
             errors.append(f"Row {row_num}: {str(e)}")
@@ -243,7 +262,9 @@ async def import_expenses(
     if batch:
         db.execute(insert(Expense).values(batch))
         db.commit()
+        expense_checks.submit(batch)
     
+    timer.done(len(created))
     return {
         "message": f"Imported {len(created)} expenses",
         "created": len(created),
@@ -263,6 +284,7 @@ async def import_revenues(
             detail="File must be a CSV"
         )
     
+    timer = ImportTimer("revenues")
     content = await file.read()
     content_str = content.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(content_str))
@@ -305,6 +327,7 @@ async def import_revenues(
         db.execute(insert(Revenue).values(batch))
         db.commit()
     
+    timer.done(len(created))
     return {
         "message": f"Imported {len(created)} revenues",
         "created": len(created),
@@ -312,6 +335,76 @@ async def import_revenues(
     }
 
 
+@router.post("/players", status_code=status.HTTP_201_CREATED)
+async def import_players(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """Import team rosters from CSV using bulk insert for performance"""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be a CSV"
+        )
+    
+    timer = ImportTimer("players")
+    content = await file.read()
+    content_str = content.decode('utf-8')
+    csv_reader = csv.DictReader(io.StringIO(content_str))
+    
+    rows = []
+    errors = []
+    
+    for row_num, row in enumerate(csv_reader, start=2):
+        try:
+            team_id = row.get('team_id', '').strip()
+            if not team_id:
+                errors.append(f"Row {row_num}: team_id is required")
+                continue
+            
+            date_of_birth = row.get('date_of_birth', '').strip()
+            registration_date = row.get('registration_date', '').strip()
+            jersey_number = row.get('jersey_number', '').strip()
+            rows.append((row_num, {
+                'team_id': team_id,
+                'first_name': row.get('first_name', '').strip(),
+                'last_name': row.get('last_name', '').strip(),
+                'date_of_birth': parse_date(date_of_birth) if date_of_birth else None,
+                'parent_name': row.get('parent_name', '').strip() or None,
+                'parent_email': row.get('parent_email', '').strip() or None,
+                'parent_phone': row.get('parent_phone', '').strip() or None,
+                'registration_fee_paid': row.get('registration_fee_paid', 'false').lower() == 'true',
+                'registration_fee_amount': float(row.get('registration_fee_amount') or 0),
+                'registration_date': parse_date(registration_date) if registration_date else None,
+                'jersey_number': int(jersey_number) if jersey_number else None,
+                'notes': row.get('notes', '').strip() or None
+            }))
+        except Exception as e:
+            errors.append(f"Row {row_num}: {str(e)}")
+    
+    # Team references are checked in bulk; rosters and team player counts
+    # are written in one transaction
+    result = insert_batch(
+        db,
+        Player,
+        [player for _, player in rows],
+        references={"team_id": (Team, "Team not found")},
+        commit=False
+    )
+    for (row_num, _), item in zip(rows, result.results):
+        if item.error:
+            errors.append(f"Row {row_num}: {item.error}")
+    adjust_team_rosters(db, Counter(player['team_id'] for (_, player), item in zip(rows, result.results) if item.id))
+    db.commit()
+    
+    timer.done(result.created)
+    return {
+        "message": f"Imported {result.created} players",
+        "created": result.created,
+        "errors": errors
+    }
+
+
 @router.get("/templates/{entity_type}")
 async def get_import_template(entity_type: str):
     """Get CSV template for import"""
@@ -320,7 +413,8 @@ async def get_import_template(entity_type: str):
         "seasons": "name,season_type,year,start_date,end_date,is_active,organization_id\n",
         "teams": "name,age_group,sport,gender,max_players,registration_fee,season_id,coach_id\n",
         "expenses": "season_id,team_id,category,description,amount,vendor,receipt_number,payment_date,notes\n",
-        "revenues": "season_id,team_id,category,description,amount,source,payment_date,notes\n"
+        "revenues": "season_id,team_id,category,description,amount,source,payment_date,notes\n",
+        "players": "team_id,first_name,last_name,date_of_birth,parent_name,parent_email,parent_phone,registration_fee_paid,registration_fee_amount,registration_date,jersey_number,notes\n"
     }
     
     if entity_type not in templates:
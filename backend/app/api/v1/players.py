@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from collections import Counter
+from typing import Optional, List
+from app.database import get_db
+from app.models import Player, Team
+from app.schemas import BatchCreateResponse, PlayerCreate, PlayerPage, PlayerResponse
+from app.core.writes import adjust_team_rosters, insert_batch, insert_returning, row_exists
+
+router = APIRouter()
+
+
+@router.get("/", response_model=PlayerPage)
+async def get_players(
+    team_id: Optional[str] = Query(None),
+    after: Optional[str] = Query(None, description="Cursor: id of the last player on the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Get players ordered by name, using keyset pagination"""
+    sort_key = tuple_(Player.last_name, Player.first_name, Player.id)
+    query = db.query(Player)
+
+    if team_id:
+        query = query.filter(Player.team_id == team_id)
+    if after:
+        # Seek past the cursor row instead of OFFSET, so deep pages stay cheap
+        cursor = select(Player.last_name, Player.first_name, Player.id).where(Player.id == after)
+        query = query.filter(sort_key > cursor.scalar_subquery())
+
+    players = query.order_by(Player.last_name, Player.first_name, Player.id).limit(limit + 1).all()
+    # An empty page after a cursor is only the end of the list if the cursor
+    # row still exists
+    if after and not players and not db.query(row_exists(Player, after)).scalar():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor: no player with that id"
+        )
+
+    next_cursor = None
+    if len(players) > limit:
+        players = players[:limit]
+        next_cursor = players[-1].id
+
+    return PlayerPage(items=players, next_cursor=next_cursor)
+
+
+@router.post("/", response_model=PlayerResponse, status_code=status.HTTP_201_CREATED)
+async def create_player(
+    player_data: PlayerCreate,
+    db: Session = Depends(get_db)
+):
+    """Add a player to a team roster"""
+    new_player = insert_returning(
+        db,
+        Player,
+        player_data.model_dump(),
+        where=[row_exists(Team, player_data.team_id)],
+        references=[(Team, player_data.team_id, "Team not found")],
+        commit=False
+    )
+    adjust_team_rosters(db, {player_data.team_id: 1})
+    db.commit()
+
+    return new_player
+
+
+@router.post("/batch", response_model=BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_players_batch(
+    players_data: List[PlayerCreate],
+    db: Session = Depends(get_db)
+):
+    """Bulk roster import from JSON - one transaction, a result per player"""
+    result = insert_batch(
+        db,
+        Player,
+        [item.model_dump() for item in players_data],
+        references={"team_id": (Team, "Team not found")},
+        commit=False
+    )
+    adjust_team_rosters(db, Counter(players_data[item.index].team_id for item in result.results if item.id))
+    db.commit()
+
+    return result
+
+
+@router.get("/{player_id}", response_model=PlayerResponse)
+async def get_player(
+    player_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get a specific player"""
+    player = db.query(Player).filter(Player.id == player_id).first()
+    if not player:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player not found"
+        )
+    return player
+
+
+@router.delete("/{player_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_player(
+    player_id: str,
+    db: Session = Depends(get_db)
+):
+    """Remove a player from their team roster"""
+    player = db.query(Player).filter(Player.id == player_id).first()
+    if not player:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player not found"
+        )
+
+    team_id = player.team_id
+    db.delete(player)
+    adjust_team_rosters(db, {team_id: -1})
+    db.commit()
+    return None
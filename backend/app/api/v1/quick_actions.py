@@ -1,57 +1,179 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, insert, update
 from datetime import date
 from app.database import get_db
-from app.models import Expense, Revenue, Team, Season, ExpenseCategory
+from app.models import Expense, Revenue, Team, Season, ExpenseCategory, RevenueCategory, generate_uuid
 from app.schemas import BulkRegistrationFeeEntry, QuickExpenseEntry
+from app.core.anomalies import expense_checks
+from app.core.writes import NOTED, insert_batch, insert_returning, note_written, row_exists
+from app.core.optimistic import VersionConflict, update_with_retry
+from app.core.write_behind import WRITE_BEHIND_ENABLED, write_behind
 
 router = APIRouter()
 
 
+def _not_found(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+def _over_capacity(team, player_count: int) -> bool:
+    return team.max_players is not None and player_count > team.max_players
+
+
+def _over_capacity_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="player_count is above the team's max_players"
+    )
+
+
+def _flush_registration_fees(db: Session, records):
+    """Write-behind handler: one team lookup, one INSERT and one UPDATE per batch"""
+    teams = {
+        team.id: team
+        for team in db.query(Team.id, Team.season_id, Team.name, Team.max_players)
+        .join(Season, Season.id == Team.season_id)
+        .filter(Team.id.in_({r["team_id"] for r in records}))
+    }
+    outcomes = []
+    revenues = []
+    rosters = []
+    for r in records:
+        team = teams.get(r["team_id"])
+        if team is None:
+            outcomes.append(_not_found("Team not found"))
+            continue
+        if _over_capacity(team, r["player_count"]):
+            outcomes.append(_over_capacity_error())
+            continue
+        outcomes.append(None)
+        revenues.append(dict(
+            id=r["revenue_id"],
+            season_id=team.season_id,
+            team_id=team.id,
+            category=RevenueCategory.REGISTRATION_FEES,
+            description=r["description"],
+            amount=r["amount"],
+            source=f"{team.name} - {r['player_count']} players",
+            payment_date=r["payment_date"],
+            notes=r["notes"],
+            created_by="anonymous"
+        ))
+        rosters.append(dict(b_id=team.id, b_players=r["player_count"], b_fee=r["fee_per_player"]))
+
+    if revenues:
+        db.execute(insert(Revenue).values(revenues).execution_options(**NOTED))
+        note_written(db, Revenue.__table__, revenues)
+        # Applied in queue order, so the latest submission for a team sets
+        # its player count and fee, as a direct submission would
+        teams_table = Team.__table__
+        db.execute(
+            update(teams_table)
+            .where(teams_table.c.id == bindparam("b_id"))
+            .values(
+                current_players=bindparam("b_players"),
+                registration_fee=bindparam("b_fee"),
+                version=teams_table.c.version + 1
+            )
+            .execution_options(**NOTED),
+            rosters
+        )
+        note_written(db, teams_table, [{"id": roster["b_id"]} for roster in rosters])
+    return outcomes
+
+
+def _flush_quick_expenses(db: Session, records):
+    """Write-behind handler: bulk reference checks and one multi-row INSERT"""
+    result = insert_batch(
+        db,
+        Expense,
+        records,
+        references={
+            "team_id": (Team, "Team not found"),
+            "season_id": (Season, "Season not found"),
+        },
+        commit=False
+    )
+    return [_not_found(item.error) if item.error else None for item in result.results]
+
+
+write_behind.register("registration_fees", _flush_registration_fees)
+write_behind.register("quick_expense", _flush_quick_expenses)
+
+
 @router.post("/bulk-registration-fees", status_code=status.HTTP_201_CREATED)
 async def bulk_registration_fees(
     entry: BulkRegistrationFeeEntry,
     db: Session = Depends(get_db)
 ):
     """Quick entry for bulk registration fees - creates revenue entries"""
-    team = db.query(Team).filter(Team.id == entry.team_id).first()
-    if not team:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Team not found"
-        )
+    total_amount = entry.player_count * entry.fee_per_player
+    description = f"Registration fees for {entry.player_count} players @ ${entry.fee_per_player}"
+    notes = entry.notes or f"Bulk registration: {entry.player_count} players"
+    
+    if WRITE_BEHIND_ENABLED:
+        revenue_id = generate_uuid()
+        await write_behind.submit("registration_fees", dict(
+            revenue_id=revenue_id,
+            team_id=entry.team_id,
+            player_count=entry.player_count,
+            fee_per_player=entry.fee_per_player,
+            description=description,
+            amount=total_amount,
+            payment_date=entry.payment_date,
+            notes=notes
+        ))
+        return {
+            "message": f"Recorded ${total_amount} in registration fees for {entry.player_count} players",
+            "revenue_id": revenue_id,
+            "total_amount": total_amount
+        }
     
-    season = db.query(Season).filter(Season.id == team.season_id).first()
-    if not season:
+    # The roster size is set, not added to (roster writes then move it by
+    # their delta), as a compare-and-swap, so the capacity check always sees
+    # the row being written
+    def change(team):
+        if _over_capacity(team, entry.player_count):
+            raise _over_capacity_error()
+        return {"current_players": entry.player_count, "registration_fee": entry.fee_per_player}
+
+    try:
+        team = update_with_retry(db, Team, entry.team_id, change)
+    except VersionConflict:
+        db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Season not found"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Team is being changed by others; try again"
         )
+    if team is None:
+        raise _not_found("Team not found")
     
-    total_amount = entry.player_count * entry.fee_per_player
-    
-    # Create revenue entry for registration fees
-    from app.models import RevenueCategory
-    new_revenue = Revenue(
-        season_id=team.season_id,
-        team_id=team.id,
-        category=RevenueCategory.REGISTRATION_FEES,
-        description=f"Registration fees for {entry.player_count} players @ ${entry.fee_per_player}",
-        amount=total_amount,
-        source=f"{team.name} - {entry.player_count} players",
-        payment_date=entry.payment_date,
-        notes=entry.notes or f"Bulk registration: {entry.player_count} players",
-        created_by="anonymous"
+    # Create revenue entry for registration fees; season and team name are
+    # read from the team row inside the INSERT, so a missing season inserts nothing
+    new_revenue = insert_returning(
+        db,
+        Revenue,
+        dict(
+            season_id=Team.season_id,
+            team_id=Team.id,
+            category=RevenueCategory.REGISTRATION_FEES,
+            description=description,
+            amount=total_amount,
+            source=Team.name + f" - {entry.player_count} players",
+            payment_date=entry.payment_date,
+            notes=notes,
+            created_by="anonymous"
+        ),
+        where=[Team.id == entry.team_id, Season.id == Team.season_id],
+        references=[
+            (Team, entry.team_id, "Team not found"),
+            (Season, None, "Season not found"),
+        ],
+        commit=False
     )
     
-    db.add(new_revenue)
-    
-    # Update team player count
-    team.current_players = entry.player_count
-    team.registration_fee = entry.fee_per_player
-    
     db.commit()
-    db.refresh(new_revenue)
     
     return {
         "message": f"Recorded ${total_amount} in registration fees for {entry.player_count} players",
@@ -68,21 +190,6 @@ async def quick_expense(
     db: Session = Depends(get_db)
 ):
     """Quick expense entry with common defaults"""
-    team = db.query(Team).filter(Team.id == entry.team_id).first()
-    if not team:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Team not found"
-        )
-    
-    # Verify season exists
-    season = db.query(Season).filter(Season.id == season_id).first()
-    if not season:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Season not found"
-        )
-    
     # Calculate per-player cost if player_count provided
     per_player_cost = None
     if entry.player_count and entry.player_count > 0:
@@ -100,7 +207,7 @@ async def quick_expense(
             detail=f"Invalid expense category: {category}"
         )
     
-    new_expense = Expense(
+    record = dict(
         season_id=season_id,
         team_id=entry.team_id,
         category=expense_category,
@@ -110,10 +217,29 @@ async def quick_expense(
         created_by="anonymous"
     )
     
-    db.add(new_expense)
-    db.commit()
-    db.refresh(new_expense)
+    if WRITE_BEHIND_ENABLED:
+        record["id"] = generate_uuid()
+        await write_behind.submit("quick_expense", record)
+        expense_checks.submit([record])
+        return {
+            "message": f"Recorded ${entry.amount} expense",
+            "expense_id": record["id"],
+            "per_player_cost": per_player_cost
+        }
+    
+    # Team/season existence is checked inside the INSERT itself
+    new_expense = insert_returning(
+        db,
+        Expense,
+        record,
+        where=[row_exists(Team, entry.team_id), row_exists(Season, season_id)],
+        references=[
+            (Team, entry.team_id, "Team not found"),
+            (Season, season_id, "Season not found"),
+        ]
+    )
     
+    expense_checks.submit([new_expense])
     return {
         "message": f"Recorded ${entry.amount} expense",
         "expense_id": new_expense.id,
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.database import get_db
 from app.models import Revenue, Season, Team
-from app.schemas import RevenueCreate, RevenueResponse
+from app.schemas import BatchCreateResponse, RevenueCreate, RevenueResponse
 from app.core.dependencies import get_current_user, require_coach_or_admin
+from app.core.writes import insert_batch, insert_returning, row_exists
 
 router = APIRouter()
 
@@ -36,42 +37,56 @@ async def create_revenue(
     db: Session = Depends(get_db)
 ):
     """Create a new revenue entry"""
-    # Verify season exists
-    season = db.query(Season).filter(Season.id == revenue_data.season_id).first()
-    if not season:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Season not found"
-        )
-    
-    # Verify team exists if provided
+    # Season/team existence is checked inside the INSERT itself
+    where = [row_exists(Season, revenue_data.season_id)]
     if revenue_data.team_id:
-        team = db.query(Team).filter(Team.id == revenue_data.team_id).first()
-        if not team:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Team not found"
-            )
+        where.append(row_exists(Team, revenue_data.team_id))
     
-    new_revenue = Revenue(
-        season_id=revenue_data.season_id,
-        team_id=revenue_data.team_id,
-        category=revenue_data.category,
-        description=revenue_data.description,
-        amount=revenue_data.amount,
-        source=revenue_data.source,
-        payment_date=revenue_data.payment_date,
-        notes=revenue_data.notes,
-        created_by="anonymous"  # No auth required
+    new_revenue = insert_returning(
+        db,
+        Revenue,
+        dict(
+            season_id=revenue_data.season_id,
+            team_id=revenue_data.team_id,
+            category=revenue_data.category,
+            description=revenue_data.description,
+            amount=revenue_data.amount,
+            source=revenue_data.source,
+            payment_date=revenue_data.payment_date,
+            notes=revenue_data.notes,
+            created_by="anonymous"  # No auth required
+        ),
+        where=where,
+        references=[
+            (Season, revenue_data.season_id, "Season not found"),
+            (Team, revenue_data.team_id, "Team not found"),
+        ]
     )
     
-    db.add(new_revenue)
-    db.commit()
-    db.refresh(new_revenue)
-    
     return new_revenue
 
 
+@router.post("/batch", response_model=BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_revenues_batch(
+    revenues_data: List[RevenueCreate],
+    db: Session = Depends(get_db)
+):
+    """Create many revenue entries in one transaction, reporting a result per item"""
+    rows = [
+        dict(item.model_dump(), created_by="anonymous")
+        for item in revenues_data
+    ]
+    return insert_batch(
+        db,
+        Revenue,
+        rows,
+        references={
+            "season_id": (Season, "Season not found"),
+            "team_id": (Team, "Team not found"),
+        }
+    )
+
+
 @router.get("/{revenue_id}", response_model=RevenueResponse)
 async def get_revenue(
     revenue_id: str,
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
-from app.models import Season
+from app.database import get_db, PARTITION_BY_SEASON
+from app.models import Expense, ReportSnapshot, Revenue, Season, SeasonArchive, User
 from app.schemas import SeasonCreate, SeasonResponse
 from app.core.dependencies import get_current_user, require_admin
+from app.core.anomalies import clear_season
+from app.core.archive import archive_season, restore_season
+from app.core.partitioning import attach_season_partitions, detach_season_partitions, ensure_season_partitions
 
 router = APIRouter()
 
@@ -36,6 +40,9 @@ async def create_season(
         )
         
         db.add(new_season)
+        if PARTITION_BY_SEASON:
+            db.flush()
+            ensure_season_partitions(db, [new_season.id])
         db.commit()
         db.refresh(new_season)
         
@@ -112,6 +119,14 @@ async def delete_season(
         )
     
     try:
+        # Season-keyed rows the ORM cascades (through teams) do not cover:
+        # season-level expenses and revenues, report snapshot, anomaly state
+        for model in (Expense, Revenue, ReportSnapshot):
+            db.execute(
+                delete(model.__table__).where(model.season_id == season.id),
+                execution_options={"synchronize_session": False}
+            )
+        clear_season(db, season.id)
         db.delete(season)
         db.commit()
         return None
@@ -121,3 +136,95 @@ async def delete_season(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting season: {str(e)}"
         )
+
+
+@router.post("/{season_id}/archive")
+async def archive_season_data(
+    season_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Move a closed season's teams, players, budgets and ledger into compact archive storage"""
+    season = db.query(Season).filter(Season.id == season_id).first()
+    if not season:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Season not found"
+        )
+    if season.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only closed seasons can be archived"
+        )
+    if season.archive is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Season is already archived"
+        )
+    
+    archive = archive_season(db, season)
+    db.commit()
+    return {"season_id": season_id, "archived": archive.row_counts}
+
+
+@router.post("/{season_id}/restore")
+async def restore_season_data(
+    season_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Bring an archived season's rows back into the live tables"""
+    archive = db.query(SeasonArchive).filter(SeasonArchive.season_id == season_id).first()
+    if not archive:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Season is not archived"
+        )
+    
+    restored = restore_season(db, archive)
+    db.commit()
+    return {"season_id": season_id, "restored": restored}
+
+
+def _require_partitioning():
+    if not PARTITION_BY_SEASON:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Season partitioning is not enabled"
+        )
+
+
+@router.post("/{season_id}/partitions/detach")
+async def detach_season(
+    season_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Move a season's expense/revenue partitions to cold storage"""
+    _require_partitioning()
+    moved = detach_season_partitions(db, season_id)
+    if not moved:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No attached partitions for this season"
+        )
+    db.commit()
+    return {"season_id": season_id, "detached": moved}
+
+
+@router.post("/{season_id}/partitions/attach")
+async def attach_season(
+    season_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Bring a season's expense/revenue partitions back from cold storage"""
+    _require_partitioning()
+    restored = attach_season_partitions(db, season_id)
+    if not restored:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No detached partitions for this season"
+        )
+    db.commit()
+    return {"season_id": season_id, "attached": restored}
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
 from typing import List, Optional
 from app.database import get_db
-from app.models import Team, Season
-from app.schemas import TeamCreate, TeamResponse
+from app.models import Team, Season, User
+from app.schemas import CountAdjustment, TeamCreate, TeamResponse, TeamUpdate
 from app.core.dependencies import get_current_user, require_admin
+from app.core.optimistic import VersionConflict, increment, update_with_retry
+from app.core.writes import insert_returning, row_exists
 
 router = APIRouter()
 
@@ -29,29 +32,24 @@ async def create_team(
     db: Session = Depends(get_db)
 ):
     """Create a new team"""
-    # Verify season exists
-    season = db.query(Season).filter(Season.id == team_data.season_id).first()
-    if not season:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Season not found"
-        )
-    
-    new_team = Team(
-        season_id=team_data.season_id,
-        name=team_data.name,
-        age_group=team_data.age_group,
-        sport=team_data.sport,
-        gender=team_data.gender,
-        max_players=team_data.max_players,
-        registration_fee=team_data.registration_fee,
-        coach_id=team_data.coach_id
+    # Season existence is checked inside the INSERT itself
+    new_team = insert_returning(
+        db,
+        Team,
+        dict(
+            season_id=team_data.season_id,
+            name=team_data.name,
+            age_group=team_data.age_group,
+            sport=team_data.sport,
+            gender=team_data.gender,
+            max_players=team_data.max_players,
+            registration_fee=team_data.registration_fee,
+            coach_id=team_data.coach_id
+        ),
+        where=[row_exists(Season, team_data.season_id)],
+        references=[(Season, team_data.season_id, "Season not found")]
     )
     
-    db.add(new_team)
-    db.commit()
-    db.refresh(new_team)
-    
     return new_team
 
 
@@ -68,3 +66,72 @@ async def get_team(
             detail="Team not found"
         )
     return team
+
+
+@router.patch("/{team_id}", response_model=TeamResponse)
+async def update_team(
+    team_id: str,
+    team_data: TeamUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update a team; with ``version`` set, only if nobody changed it since"""
+    updates = team_data.model_dump(exclude_unset=True, exclude={"version"})
+    if updates.get("coach_id") and not db.query(row_exists(User, updates["coach_id"])).scalar():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Coach not found"
+        )
+
+    def change(team):
+        if "max_players" in updates and updates["max_players"] < (team.current_players or 0):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="max_players is below the current player count"
+            )
+        return updates
+
+    try:
+        team = update_with_retry(db, Team, team_id, change, expected_version=team_data.version)
+    except VersionConflict:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Team was changed by someone else; reload and try again"
+        )
+    if team is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+    db.commit()
+    return team
+
+
+@router.post("/{team_id}/player-count", response_model=TeamResponse)
+async def adjust_player_count(
+    team_id: str,
+    adjustment: CountAdjustment,
+    db: Session = Depends(get_db)
+):
+    """Atomically add to (or subtract from) a team's player count"""
+    # current_players is nullable; a NULL count starts from zero
+    new_count = func.coalesce(Team.current_players, 0) + adjustment.delta
+    team = increment(
+        db, Team, team_id, {},
+        where=[new_count >= 0, or_(Team.max_players.is_(None), new_count <= Team.max_players)],
+        values={"current_players": new_count}
+    )
+    if team is None:
+        db.rollback()
+        if not db.query(row_exists(Team, team_id)).scalar():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Team not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Player count cannot go below zero" if adjustment.delta < 0
+            else "Player count cannot go above max_players"
+        )
+    db.commit()
+    return team
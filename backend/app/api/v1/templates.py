@@ -0,0 +1,164 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from typing import List, Optional
+from app.database import get_db
+from app.models import Expense, Organization, QuickExpenseTemplate, Season, Team, generate_uuid
+from app.schemas import (
+    BatchCreateResponse, BatchItemResult, QuickExpenseTemplateCreate, QuickExpenseTemplateResponse,
+    QuickExpenseTemplateUpdate, TemplateApplyEntry
+)
+from app.core.anomalies import expense_checks
+from app.core.templates import organization_templates, render_description
+from app.core.writes import BATCH_SIZE, NOTED, note_written
+
+router = APIRouter()
+
+
+def _get_template(db: Session, template_id: str) -> QuickExpenseTemplate:
+    template = db.query(QuickExpenseTemplate).filter(QuickExpenseTemplate.id == template_id).first()
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found"
+        )
+    return template
+
+
+@router.get("/", response_model=List[QuickExpenseTemplateResponse])
+async def get_templates(
+    organization_id: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get an organization's quick expense templates plus the shared ones"""
+    return organization_templates(db, organization_id)
+
+
+@router.post("/", response_model=QuickExpenseTemplateResponse, status_code=status.HTTP_201_CREATED)
+async def create_template(
+    template_data: QuickExpenseTemplateCreate,
+    db: Session = Depends(get_db)
+):
+    """Create a quick expense template"""
+    if template_data.organization_id:
+        org = db.query(Organization).filter(Organization.id == template_data.organization_id).first()
+        if not org:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Organization not found"
+            )
+
+    new_template = QuickExpenseTemplate(**template_data.model_dump())
+    db.add(new_template)
+    db.commit()
+    db.refresh(new_template)
+
+    return new_template
+
+
+@router.get("/{template_id}", response_model=QuickExpenseTemplateResponse)
+async def get_template(
+    template_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get a specific template"""
+    return _get_template(db, template_id)
+
+
+@router.patch("/{template_id}", response_model=QuickExpenseTemplateResponse)
+async def update_template(
+    template_id: str,
+    changes: QuickExpenseTemplateUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update some fields of a template"""
+    template = _get_template(db, template_id)
+    for field, value in changes.model_dump(exclude_unset=True).items():
+        setattr(template, field, value)
+
+    db.commit()
+    db.refresh(template)
+
+    return template
+
+
+@router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_template(
+    template_id: str,
+    db: Session = Depends(get_db)
+):
+    """Delete a template"""
+    template = _get_template(db, template_id)
+    db.delete(template)
+    db.commit()
+
+    return None
+
+
+@router.post("/{template_id}/apply", response_model=BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def apply_template(
+    template_id: str,
+    entry: TemplateApplyEntry,
+    db: Session = Depends(get_db)
+):
+    """Record the template's expense once for each listed team, in one INSERT"""
+    template = _get_template(db, template_id)
+
+    amount = entry.amount if entry.amount is not None else template.default_amount
+    if amount is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Template has no default amount; send an amount"
+        )
+
+    season = db.query(Season).filter(Season.id == entry.season_id).first()
+    if not season:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Season not found"
+        )
+    if template.organization_id and template.organization_id != season.organization_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Template belongs to another organization"
+        )
+
+    # Every team looked up at once; names feed the description
+    team_names = dict(
+        db.query(Team.id, Team.name)
+        .filter(Team.id.in_(set(entry.team_ids)), Team.season_id == entry.season_id)
+    )
+
+    rows = []
+    results = []
+    for index, team_id in enumerate(entry.team_ids):
+        if team_id not in team_names:
+            results.append(BatchItemResult(index=index, error="Team not found in this season"))
+            continue
+        row = dict(
+            id=generate_uuid(),
+            season_id=entry.season_id,
+            team_id=team_id,
+            category=template.category,
+            description=entry.description or render_description(template, team_names[team_id], entry.payment_date),
+            amount=amount,
+            vendor=entry.vendor,
+            receipt_number=None,
+            payment_date=entry.payment_date,
+            notes=entry.notes,
+            created_by="anonymous"
+        )
+        rows.append(row)
+        results.append(BatchItemResult(index=index, id=row["id"]))
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(Expense).values(rows[start:start + BATCH_SIZE]).execution_options(**NOTED))
+    note_written(db, Expense.__table__, rows)
+    db.commit()
+    expense_checks.submit(rows)
+
+    return BatchCreateResponse(
+        created=len(rows),
+        failed=len(entry.team_ids) - len(rows),
+        results=results
+    )
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Optional
 from app.database import get_db
 from app.models import Organization, Season, Team, Expense, Revenue, Budget, Player
 from app.schemas import TransparencyReport, PlayerCostBreakdown
+from app.core.archive import archived_report, archived_reports
+from app.core.reconciliation import reconcilable_seasons, reconcile
+from app.core.reports import season_report, snapshot_reports
 
 router = APIRouter()
 
@@ -22,87 +26,17 @@ async def get_season_transparency_report(
             detail="Season not found"
         )
     
-    # Calculate totals
-    total_budgeted = db.query(func.sum(Budget.budgeted_amount)).filter(
-        Budget.season_id == season_id
-    ).scalar() or 0.0
-    
-    total_expenses = db.query(func.sum(Expense.amount)).filter(
-        Expense.season_id == season_id
-    ).scalar() or 0.0
+    # Archived seasons answer from their stored final rollup
+    report = archived_report(db, season_id)
+    if report is not None:
+        return report
     
-    total_revenue = db.query(func.sum(Revenue.amount)).filter(
-        Revenue.season_id == season_id
-    ).scalar() or 0.0
-    
-    # Expenses by category
-    expenses_by_category = {}
-    expenses = db.query(Expense.category, func.sum(Expense.amount)).filter(
-        Expense.season_id == season_id
-    ).group_by(Expense.category).all()
-    
-    for category, amount in expenses:
-        expenses_by_category[category.value] = float(amount)
-    
-    # Revenues by category
-    revenues_by_category = {}
-    revenues = db.query(Revenue.category, func.sum(Revenue.amount)).filter(
-        Revenue.season_id == season_id
-    ).group_by(Revenue.category).all()
-    
-    for category, amount in revenues:
-        revenues_by_category[category.value] = float(amount)
-    
-    # Player cost breakdown
-    teams = db.query(Team).filter(Team.season_id == season_id).all()
-    player_breakdowns = []
-    
-    for team in teams:
-        team_expenses = db.query(func.sum(Expense.amount)).filter(
-            Expense.team_id == team.id
-        ).scalar() or 0.0
-        
-        registration_fees = db.query(func.sum(Player.registration_fee_amount)).filter(
-            Player.team_id == team.id,
-            Player.registration_fee_paid == True
-        ).scalar() or 0.0
-        
-        total_cost = float(team_expenses)
-        player_count = team.current_players or 1
-        cost_per_player = total_cost / player_count if player_count > 0 else 0
-        
-        # Breakdown by category
-        category_breakdown = {}
-        team_expenses_by_cat = db.query(Expense.category, func.sum(Expense.amount)).filter(
-            Expense.team_id == team.id
-        ).group_by(Expense.category).all()
-        
-        for cat, amt in team_expenses_by_cat:
-            category_breakdown[cat.value] = float(amt)
-        
-        player_breakdowns.append(PlayerCostBreakdown(
-            team_id=team.id,
-            team_name=team.name,
-            total_cost=total_cost,
-            player_count=player_count,
-            cost_per_player=cost_per_player,
-            registration_fee=float(registration_fees),
-            other_costs=total_cost - float(registration_fees),
-            breakdown_by_category=category_breakdown
-        ))
+    # Live seasons answer from the scheduler's snapshot when it is current
+    report = snapshot_reports(db, [season_id]).get(season_id)
+    if report is not None:
+        return report
     
-    return TransparencyReport(
-        organization_id="",
-        organization_name=season.name,
-        season_id=season_id,
-        total_budgeted=float(total_budgeted),
-        total_expenses=float(total_expenses),
-        total_revenue=float(total_revenue),
-        expenses_by_category=expenses_by_category,
-        revenues_by_category=revenues_by_category,
-        player_cost_breakdown=player_breakdowns,
-        profit_loss=float(total_revenue - total_expenses)
-    )
+    return season_report(db, season)
 
 
 @router.get("/organization/{org_id}/report", response_model=TransparencyReport)
@@ -131,7 +65,11 @@ async def get_transparency_report(
             detail="No seasons found for this organization"
         )
     
-    season_ids = [s.id for s in seasons]
+    # Archived seasons contribute their stored rollups and live seasons their
+    # current snapshots; only the remaining seasons are queried
+    rollups = archived_reports(db, [s.id for s in seasons])
+    rollups.update(snapshot_reports(db, [s.id for s in seasons if s.id not in rollups]))
+    season_ids = [s.id for s in seasons if s.id not in rollups]
     
     # Calculate totals
     total_budgeted = db.query(func.sum(Budget.budgeted_amount)).filter(
@@ -206,6 +144,16 @@ async def get_transparency_report(
             breakdown_by_category=category_breakdown
         ))
     
+    for rollup in rollups.values():
+        total_budgeted += rollup.total_budgeted
+        total_expenses += rollup.total_expenses
+        total_revenue += rollup.total_revenue
+        for category, amount in rollup.expenses_by_category.items():
+            expenses_by_category[category] = expenses_by_category.get(category, 0.0) + amount
+        for category, amount in rollup.revenues_by_category.items():
+            revenues_by_category[category] = revenues_by_category.get(category, 0.0) + amount
+        player_breakdowns.extend(rollup.player_cost_breakdown)
+    
     return TransparencyReport(
         organization_id=org.id,
         organization_name=org.name,
@@ -220,6 +168,31 @@ async def get_transparency_report(
     )
 
 
+@router.get("/organization/{org_id}/fee-reconciliation")
+async def get_fee_reconciliation(
+    org_id: str,
+    season_id: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Stream teams and players whose registration fees, payments and revenue disagree (NDJSON)"""
+    org = db.query(Organization).filter(Organization.id == org_id).first()
+    if not org:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organization not found"
+        )
+    
+    seasons = reconcilable_seasons(db, org_id, season_id)
+    if not seasons:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No live seasons found for this organization"
+        )
+    
+    # The generator runs in the threadpool with its own session
+    return StreamingResponse(reconcile([s.id for s in seasons]), media_type="application/x-ndjson")
+
+
 @router.get("/team/{team_id}/player-costs", response_model=PlayerCostBreakdown)
 async def get_team_player_costs(
     team_id: str,
@@ -0,0 +1,402 @@
+"""
+Duplicate and outlier detection over the expense ledger.
+
+Every expense gets a fingerprint of hashed bucket keys, scoped to its season:
+
+- ``exact_key``: team, payee, amount, date and receipt number - an exact
+  re-entry;
+- ``receipt_key``: payee and receipt number - the same receipt filed twice
+  with a different amount or date, under any team;
+- ``amount_key``: team, payee and amount - a near duplicate when the dates
+  are within DUPLICATE_WINDOW_DAYS.
+
+Teams are part of the first and last keys because one payee often bills
+several teams the same amount on the same day (e.g. referee fees entered
+from a template).
+
+The payee is the vendor, or the description when there is none; text is
+case- and punctuation-folded and amounts compared in cents. A new expense is
+checked with one indexed lookup of its keys, never by comparing it against
+the whole ledger.
+
+Outliers (e.g. 1500 typed for 15.00) are judged per season and category on
+log10(amount), so a slip of a decimal point is a fixed distance whatever the
+category's scale. ``expense_category_stats`` keeps the running count, sum and
+sum of squares, which give the mean and spread in O(1); an expense whose
+z-score is at least ANOMALY_Z_THRESHOLD, once the category has
+ANOMALY_MIN_SAMPLES expenses, is flagged.
+
+Endpoints that create expenses (single, batch, quick and CSV import) hand
+the committed rows to ``expense_checks``, which runs ``check_new_expenses``
+in the threadpool after the response instead of inside it. Rows queued
+within ANOMALY_CHECK_DELAY_MS of each other are checked together, so a
+burst costs a few batched checks rather than one per request. The check updates fingerprints,
+stats and findings incrementally.
+``scan_season`` rebuilds a season's state in one streaming pass, for rows
+written before detection was enabled or restored from an archive. Findings
+are advisory: nothing is blocked or changed.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models import Expense, ExpenseAnomaly, ExpenseCategory, ExpenseCategoryStats, ExpenseFingerprint
+
+ANOMALY_DETECTION_ENABLED = os.getenv("ANOMALY_DETECTION_ENABLED", "true").lower() == "true"
+DUPLICATE_WINDOW_DAYS = int(os.getenv("DUPLICATE_WINDOW_DAYS", "3"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.5"))
+ANOMALY_MIN_SAMPLES = int(os.getenv("ANOMALY_MIN_SAMPLES", "20"))
+CHECK_DELAY = float(os.getenv("ANOMALY_CHECK_DELAY_MS", "250")) / 1000
+
+# Floor for a category's spread (in log10 units, about a factor of 1.26), so
+# a category of near-identical amounts does not flag every small difference
+MIN_SPREAD = 0.1
+BATCH_SIZE = 500
+SCAN_BATCH = 2000
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def _fold(text: Optional[str]) -> str:
+    return " ".join(_PUNCTUATION.sub("", (text or "").lower()).split())
+
+
+def _key(*parts: Any) -> str:
+    return hashlib.sha1("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _category(value) -> ExpenseCategory:
+    return value if isinstance(value, ExpenseCategory) else ExpenseCategory(value)
+
+
+def fingerprint(expense: Dict[str, Any]) -> Dict[str, Any]:
+    """Bucket keys of one expense (a dict of its columns)"""
+    season_id = expense["season_id"]
+    team_id = expense.get("team_id") or ""
+    payee = _fold(expense.get("vendor")) or _fold(expense.get("description"))
+    cents = int(round(float(expense["amount"]) * 100))
+    receipt = re.sub(r"\W", "", (expense.get("receipt_number") or "").upper())
+    return {
+        "expense_id": expense["id"],
+        "season_id": season_id,
+        "exact_key": _key(season_id, team_id, payee, cents, expense["payment_date"], receipt),
+        "amount_key": _key(season_id, team_id, payee, cents),
+        "receipt_key": _key(season_id, payee, receipt) if receipt else None,
+        "payment_date": expense["payment_date"],
+    }
+
+
+class _Buckets:
+    """Fingerprints seen so far, indexed by bucket key"""
+
+    def __init__(self):
+        self.exact: Dict[str, str] = {}
+        self.receipt: Dict[str, str] = {}
+        self.amount: Dict[str, List[Tuple[date, str]]] = {}
+
+    def add(self, fp: Dict[str, Any]):
+        self.exact.setdefault(fp["exact_key"], fp["expense_id"])
+        if fp["receipt_key"]:
+            self.receipt.setdefault(fp["receipt_key"], fp["expense_id"])
+        self.amount.setdefault(fp["amount_key"], []).append((fp["payment_date"], fp["expense_id"]))
+
+    def match(self, fp: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+        """(kind, earlier expense id, detail) of the strongest duplicate match"""
+        related = self.exact.get(fp["exact_key"])
+        if related:
+            return "exact_duplicate", related, "Same payee, amount, date and receipt number"
+        related = self.receipt.get(fp["receipt_key"]) if fp["receipt_key"] else None
+        if related:
+            return "receipt_reused", related, "Receipt number already filed for this payee"
+        for payment_date, related in self.amount.get(fp["amount_key"], ()):
+            days = abs((fp["payment_date"] - payment_date).days)
+            if days <= DUPLICATE_WINDOW_DAYS:
+                return "near_duplicate", related, f"Same payee and amount {days} day(s) apart"
+        return None
+
+
+def _log_amount(amount) -> Optional[float]:
+    amount = float(amount or 0.0)
+    return math.log10(amount) if amount > 0 else None
+
+
+def _outlier(count: int, total: float, total_sq: float, x: float) -> Optional[Tuple[float, float]]:
+    """(z-score, typical amount) if ``x`` stands out from the given sums"""
+    if count < ANOMALY_MIN_SAMPLES:
+        return None
+    mean = total / count
+    spread = max(math.sqrt(max(total_sq / count - mean * mean, 0.0)), MIN_SPREAD)
+    z = (x - mean) / spread
+    return (z, 10 ** mean) if abs(z) >= ANOMALY_Z_THRESHOLD else None
+
+
+def _outlier_finding(expense: Dict[str, Any], category: ExpenseCategory, z: float, typical: float) -> Dict[str, Any]:
+    return dict(
+        season_id=expense["season_id"],
+        expense_id=expense["id"],
+        kind="amount_outlier",
+        related_expense_id=None,
+        score=round(z, 2),
+        detail=f"Amount {float(expense['amount']):,.2f} vs typical {typical:,.2f} for {category.value}"
+    )
+
+
+def _duplicate_finding(expense: Dict[str, Any], match: Tuple[str, str, str]) -> Dict[str, Any]:
+    kind, related, detail = match
+    return dict(
+        season_id=expense["season_id"],
+        expense_id=expense["id"],
+        kind=kind,
+        related_expense_id=related,
+        score=None,
+        detail=detail
+    )
+
+
+def _insert_many(db: Session, model, rows: List[Dict[str, Any]]):
+    # executemany: one compiled statement, however many rows
+    if rows:
+        db.execute(insert(model.__table__), rows)
+
+
+def _load_stats(db: Session, keys: Set[Tuple[str, ExpenseCategory]]) -> Dict[Tuple[str, ExpenseCategory], List[float]]:
+    """Running sums per (season, category), creating missing rows first.
+
+    New rows are inserted in a transaction of their own, so a worker losing
+    the race to create one does not lose anything else.
+    """
+    stats = {
+        (row.season_id, row.category): [row.count, row.total, row.total_sq]
+        for row in db.query(ExpenseCategoryStats).filter(
+            ExpenseCategoryStats.season_id.in_({season_id for season_id, _ in keys})
+        )
+    }
+    for season_id, category in keys - set(stats):
+        try:
+            db.execute(insert(ExpenseCategoryStats).values(
+                season_id=season_id, category=category, count=0, total=0.0, total_sq=0.0
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        stats[(season_id, category)] = [0, 0.0, 0.0]
+    return stats
+
+
+def _record(db: Session, expenses: List[Dict[str, Any]]) -> int:
+    fingerprints = [fingerprint(expense) for expense in expenses]
+
+    # Earlier expenses sharing any bucket with the new ones: one indexed
+    # lookup per chunk
+    buckets = _Buckets()
+    recorded = set()
+    for start in range(0, len(fingerprints), BATCH_SIZE):
+        chunk = fingerprints[start:start + BATCH_SIZE]
+        receipt_keys = [fp["receipt_key"] for fp in chunk if fp["receipt_key"]]
+        for row in db.execute(select(ExpenseFingerprint.__table__).where(or_(
+            ExpenseFingerprint.exact_key.in_([fp["exact_key"] for fp in chunk]),
+            ExpenseFingerprint.amount_key.in_([fp["amount_key"] for fp in chunk]),
+            ExpenseFingerprint.receipt_key.in_(receipt_keys),
+        ))):
+            buckets.add(dict(row._mapping))
+            recorded.add(row.expense_id)
+
+    # A scan that ran since these were queued may have recorded them already
+    pending = []
+    for expense, fp in zip(expenses, fingerprints):
+        if expense["id"] not in recorded:
+            recorded.add(expense["id"])
+            pending.append((expense, fp))
+    if not pending:
+        return 0
+    fingerprints = [fp for _, fp in pending]
+    stats = _load_stats(db, {(expense["season_id"], _category(expense["category"])) for expense, _ in pending})
+
+    deltas: Dict[Tuple[str, ExpenseCategory], List[float]] = {}
+    findings = []
+    for expense, fp in pending:
+        match = buckets.match(fp)
+        if match:
+            findings.append(_duplicate_finding(expense, match))
+        buckets.add(fp)
+
+        category = _category(expense["category"])
+        x = _log_amount(expense["amount"])
+        if x is None:
+            continue
+        key = (expense["season_id"], category)
+        outlier = _outlier(*stats[key], x)
+        if outlier:
+            findings.append(_outlier_finding(expense, category, *outlier))
+        for sums in (stats[key], deltas.setdefault(key, [0, 0.0, 0.0])):
+            sums[0] += 1
+            sums[1] += x
+            sums[2] += x * x
+
+    _insert_many(db, ExpenseFingerprint, fingerprints)
+    _insert_many(db, ExpenseAnomaly, findings)
+    for (season_id, category), (count, total, total_sq) in deltas.items():
+        db.execute(
+            update(ExpenseCategoryStats)
+            .where(ExpenseCategoryStats.season_id == season_id, ExpenseCategoryStats.category == category)
+            .values(
+                count=ExpenseCategoryStats.count + count,
+                total=ExpenseCategoryStats.total + total,
+                total_sq=ExpenseCategoryStats.total_sq + total_sq
+            )
+        )
+    db.commit()
+    return len(findings)
+
+
+def _as_dict(expense) -> Dict[str, Any]:
+    return dict(expense._mapping) if hasattr(expense, "_mapping") else expense
+
+
+def check_new_expenses(db: Session, expenses: Iterable[Any]) -> int:
+    """Check just-committed expenses (dicts or rows) and record what is found.
+
+    Returns the number of findings. A failure here is logged, never raised:
+    the expenses are already written, and ``scan_season`` can catch up.
+    """
+    expenses = [_as_dict(expense) for expense in expenses]
+    if not ANOMALY_DETECTION_ENABLED or not expenses:
+        return 0
+    try:
+        return _record(db, expenses)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Expense anomaly check failed: {e}")
+        return 0
+
+
+class ExpenseCheckQueue:
+    """Runs ``check_new_expenses`` off the request path, coalescing bursts"""
+
+    def __init__(self):
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, expenses: Iterable[Any]):
+        """Queue committed expenses for checking; call from the event loop"""
+        if not ANOMALY_DETECTION_ENABLED:
+            return
+        self._pending.extend(_as_dict(expense) for expense in expenses)
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        while self._pending:
+            # Let the rest of a burst arrive and share one check
+            await asyncio.sleep(CHECK_DELAY)
+            batch, self._pending = self._pending, []
+            await run_in_threadpool(self._check, batch)
+
+    @staticmethod
+    def _check(expenses: List[Dict[str, Any]]):
+        db = SessionLocal()
+        try:
+            check_new_expenses(db, expenses)
+        finally:
+            db.close()
+
+    async def close(self):
+        """Wait for queued checks to finish"""
+        if self._task is not None and not self._task.done():
+            await self._task
+        self._task = None
+
+
+expense_checks = ExpenseCheckQueue()
+
+
+def forget_expense(db: Session, expense: Expense):
+    """Drop a deleted expense's fingerprint, findings and share of the stats, in the caller's transaction"""
+    db.execute(delete(ExpenseFingerprint).where(ExpenseFingerprint.expense_id == expense.id))
+    db.execute(delete(ExpenseAnomaly).where(
+        or_(ExpenseAnomaly.expense_id == expense.id, ExpenseAnomaly.related_expense_id == expense.id)
+    ))
+    x = _log_amount(expense.amount)
+    if x is not None:
+        db.execute(
+            update(ExpenseCategoryStats)
+            .where(
+                ExpenseCategoryStats.season_id == expense.season_id,
+                ExpenseCategoryStats.category == expense.category,
+                ExpenseCategoryStats.count > 0
+            )
+            .values(
+                count=ExpenseCategoryStats.count - 1,
+                total=ExpenseCategoryStats.total - x,
+                total_sq=ExpenseCategoryStats.total_sq - x * x
+            )
+        )
+
+
+def clear_season(db: Session, season_id: str):
+    """Drop a season's detector state, in the caller's transaction"""
+    for model in (ExpenseFingerprint, ExpenseCategoryStats, ExpenseAnomaly):
+        db.execute(delete(model).where(model.season_id == season_id))
+
+
+def scan_season(db: Session, season_id: str) -> Dict[str, Any]:
+    """Rebuild a season's fingerprints, stats and findings, in the caller's transaction"""
+    clear_season(db, season_id)
+    columns = [Expense.id, Expense.season_id, Expense.team_id, Expense.category, Expense.description, Expense.amount,
+               Expense.vendor, Expense.receipt_number, Expense.payment_date]
+    buckets = _Buckets()
+    fingerprints = []
+    findings = []
+    amounts: List[Tuple[Dict[str, Any], ExpenseCategory, float]] = []
+    stats: Dict[ExpenseCategory, List[float]] = {}
+
+    # One pass in creation order, so a duplicate always points at the earlier row
+    rows = db.execute(
+        select(*columns)
+        .where(Expense.season_id == season_id)
+        .order_by(Expense.created_at, Expense.id)
+        .execution_options(yield_per=SCAN_BATCH)
+    )
+    for row in rows:
+        expense = dict(row._mapping)
+        fp = fingerprint(expense)
+        match = buckets.match(fp)
+        if match:
+            findings.append(_duplicate_finding(expense, match))
+        buckets.add(fp)
+        fingerprints.append(fp)
+
+        x = _log_amount(expense["amount"])
+        if x is not None:
+            sums = stats.setdefault(expense["category"], [0, 0.0, 0.0])
+            sums[0] += 1
+            sums[1] += x
+            sums[2] += x * x
+            amounts.append((expense, expense["category"], x))
+
+    # Each amount against its category without itself
+    for expense, category, x in amounts:
+        count, total, total_sq = stats[category]
+        outlier = _outlier(count - 1, total - x, total_sq - x * x, x)
+        if outlier:
+            findings.append(_outlier_finding(expense, category, *outlier))
+
+    _insert_many(db, ExpenseFingerprint, fingerprints)
+    _insert_many(db, ExpenseAnomaly, findings)
+    _insert_many(db, ExpenseCategoryStats, [
+        dict(season_id=season_id, category=category, count=count, total=total, total_sq=total_sq)
+        for category, (count, total, total_sq) in stats.items()
+    ])
+
+    found: Dict[str, int] = {}
+    for finding in findings:
+        found[finding["kind"]] = found.get(finding["kind"], 0) + 1
+    return {"expenses": len(fingerprints), "anomalies": found}
@@ -0,0 +1,119 @@
+"""
+Archival of closed seasons.
+
+Archiving moves a closed season's teams, players, budgets, expenses and
+revenues out of the live tables into a single ``season_archives`` row: the
+rows themselves as zlib-compressed JSON, plus the season's final
+transparency report as a rollup so historical reports are answered from that
+one row. Restoring writes the rows back, drops the archive and re-scans the
+season's expenses for anomalies. The season row itself always stays, so it
+is still listed and can be restored.
+"""
+import enum
+import json
+import zlib
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from sqlalchemy import Date, DateTime, Enum as SQLEnum, delete, insert, or_, select
+from sqlalchemy.orm import Session
+from app.models import Season, SeasonArchive, Team, Player, Budget, Expense, Revenue, ReportSnapshot
+from app.schemas import TransparencyReport
+from app.core.anomalies import clear_season, scan_season
+from app.core.reports import season_report
+from app.core.writes import BATCH_SIZE
+
+# Restore order; deletion runs in reverse so foreign keys stay satisfied
+ARCHIVED_MODELS = (Team, Player, Budget, Expense, Revenue)
+
+
+def _encode(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def _decode(table, row: dict) -> dict:
+    decoded = {}
+    for name, value in row.items():
+        column_type = table.c[name].type
+        if value is not None:
+            if isinstance(column_type, SQLEnum) and column_type.enum_class is not None:
+                value = column_type.enum_class(value)
+            elif isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+        decoded[name] = value
+    return decoded
+
+
+def _season_rows_filter(model, season_id: str, team_ids: List[str]):
+    if model is Team:
+        return Team.season_id == season_id
+    if model is Player:
+        return Player.team_id.in_(team_ids)
+    # Ledger rows belong to the season or to one of its teams
+    return or_(model.season_id == season_id, model.team_id.in_(team_ids))
+
+
+def archive_season(db: Session, season: Season) -> SeasonArchive:
+    """Move a closed season's rows into its archive, in the caller's transaction"""
+    rollup = season_report(db, season)
+    team_ids = [team_id for (team_id,) in db.query(Team.id).filter(Team.season_id == season.id)]
+
+    rows: Dict[str, list] = {}
+    for model in ARCHIVED_MODELS:
+        table = model.__table__
+        criteria = _season_rows_filter(model, season.id, team_ids)
+        rows[table.name] = [dict(row._mapping) for row in db.execute(select(table).where(criteria))]
+
+    for model in reversed(ARCHIVED_MODELS):
+        db.execute(
+            delete(model.__table__).where(_season_rows_filter(model, season.id, team_ids)),
+            execution_options={"synchronize_session": False}
+        )
+
+    # The archive's rollup supersedes any report snapshot
+    db.execute(delete(ReportSnapshot).where(ReportSnapshot.season_id == season.id))
+    # Anomaly findings point at rows that no longer exist
+    clear_season(db, season.id)
+
+    archive = SeasonArchive(
+        season_id=season.id,
+        rollup=rollup.model_dump(mode="json"),
+        row_counts={name: len(table_rows) for name, table_rows in rows.items()},
+        payload=zlib.compress(json.dumps(rows, default=_encode).encode("utf-8"), 9)
+    )
+    db.add(archive)
+    return archive
+
+
+def restore_season(db: Session, archive: SeasonArchive) -> Dict[str, int]:
+    """Write an archived season's rows back and drop the archive"""
+    rows = json.loads(zlib.decompress(archive.payload).decode("utf-8"))
+    for model in ARCHIVED_MODELS:
+        table = model.__table__
+        table_rows = [_decode(table, row) for row in rows.get(table.name, [])]
+        for start in range(0, len(table_rows), BATCH_SIZE):
+            db.execute(insert(table).values(table_rows[start:start + BATCH_SIZE]))
+    counts = dict(archive.row_counts)
+    db.delete(archive)
+    scan_season(db, archive.season_id)
+    return counts
+
+
+def archived_report(db: Session, season_id: str) -> Optional[TransparencyReport]:
+    """The stored final report for an archived season, if it is archived"""
+    rollup = db.query(SeasonArchive.rollup).filter(SeasonArchive.season_id == season_id).scalar()
+    return TransparencyReport(**rollup) if rollup is not None else None
+
+
+def archived_reports(db: Session, season_ids: List[str]) -> Dict[str, TransparencyReport]:
+    """Stored final reports for whichever of these seasons are archived"""
+    return {
+        season_id: TransparencyReport(**rollup)
+        for season_id, rollup in db.query(SeasonArchive.season_id, SeasonArchive.rollup)
+        .filter(SeasonArchive.season_id.in_(season_ids))
+    }
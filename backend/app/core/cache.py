@@ -0,0 +1,113 @@
+"""
+Small in-process caches.
+
+``TTLCache`` is a thread-safe LRU whose entries also expire after a TTL.
+Every cache registers itself by name so hit rates can be reported.
+
+Caches are per process. Code that changes cached data calls
+``publish_invalidation(topic, key)``; handlers registered for the topic with
+``on_invalidation`` run in this process right away and, when cache sync is
+on (app/core/cache_sync.py), in every other worker too.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+_registry: Dict[str, "TTLCache"] = {}
+_handlers: Dict[str, List[Callable[[str], None]]] = {}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry"""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable, Any], bool]] = None):
+        """Drop every entry, or only those for which ``predicate(key, value)`` is true"""
+        with self._lock:
+            if predicate is None:
+                self._data.clear()
+                return
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered cache, keyed by name"""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_all_caches():
+    """Empty every registered cache (e.g. after missing invalidations)"""
+    for cache in _registry.values():
+        cache.invalidate()
+
+
+def on_invalidation(topic: str, handler: Callable[[str], None]):
+    """Run ``handler(key)`` whenever ``topic`` is invalidated, in any worker"""
+    _handlers.setdefault(topic, []).append(handler)
+
+
+def apply_invalidation(topic: str, key: str):
+    """Run this process's handlers for an invalidation"""
+    for handler in _handlers.get(topic, ()):
+        handler(key)
+
+
+def publish_invalidation(topic: str, key: str, connection=None):
+    """Invalidate ``key`` under ``topic`` here and in every other worker
+
+    Pass the SQLAlchemy connection of the transaction making the change so
+    other workers are only told once it commits.
+    """
+    apply_invalidation(topic, key)
+    from app.core.cache_sync import cache_sync
+    cache_sync.publish(topic, key, connection)
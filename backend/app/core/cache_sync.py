@@ -0,0 +1,155 @@
+"""
+Cross-process cache invalidation for multi-worker deployments.
+
+Each worker keeps its own caches, so an invalidation published in one worker
+has to reach the others:
+
+- Postgres: ``NOTIFY`` on the ``ysb_cache`` channel, sent in the writing
+  transaction so it is delivered on commit; each worker ``LISTEN``s on a
+  dedicated connection.
+- SQLite: rows appended to ``cache_invalidations``, which every worker polls
+  every CACHE_SYNC_INTERVAL_MS.
+
+Sync is on when WEB_CONCURRENCY > 1, or forced with CACHE_SYNC=true/false.
+A listener that loses its connection clears every cache on reconnect, since
+it may have missed invalidations.
+"""
+import os
+import select as select_module
+import threading
+from typing import Optional
+from sqlalchemy import delete, func, insert, select
+from app.database import engine
+from app.models import CacheInvalidation
+from app.core.cache import apply_invalidation, clear_all_caches
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CACHE_SYNC = os.getenv("CACHE_SYNC", "auto").lower()
+CACHE_SYNC_ENABLED = CACHE_SYNC == "true" or (CACHE_SYNC == "auto" and WEB_CONCURRENCY > 1)
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL_MS", "500")) / 1000
+
+CHANNEL = "ysb_cache"
+# SQLite log rows kept; a worker further behind than this clears its caches
+SQLITE_LOG_RETENTION = 10000
+
+
+def _encode(topic: str, key: str) -> str:
+    return f"{topic}:{key}"
+
+
+def _decode(message: str):
+    topic, _, key = message.partition(":")
+    return topic, key
+
+
+class CacheSync:
+    """Publishes invalidations to, and applies them from, the other workers"""
+
+    def __init__(self, enabled: bool = CACHE_SYNC_ENABLED):
+        self.enabled = enabled
+        self.dialect = engine.dialect.name
+        self.received = 0
+        self.published = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, topic: str, key: str, connection=None):
+        if not self.enabled:
+            return
+        if connection is None:
+            with engine.begin() as conn:
+                self._send(conn, topic, key)
+        else:
+            self._send(connection, topic, key)
+        self.published += 1
+
+    def _send(self, conn, topic: str, key: str):
+        if self.dialect == "postgresql":
+            conn.execute(select(func.pg_notify(CHANNEL, _encode(topic, key))))
+        else:
+            conn.execute(insert(CacheInvalidation).values(topic=topic, key=key))
+
+    def _deliver(self, topic: str, key: str):
+        self.received += 1
+        apply_invalidation(topic, key)
+
+    def _listen_postgres(self):
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                raw.detach()  # A long-lived LISTEN connection stays out of the pool
+                connection = raw.dbapi_connection
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                clear_all_caches()
+                while not self._stop.is_set():
+                    if select_module.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._deliver(*_decode(connection.notifies.pop(0).payload))
+            except Exception as e:
+                print(f"⚠️ Cache sync listener reconnecting: {e}")
+                self._stop.wait(1.0)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+    def _poll_sqlite(self):
+        last_id = None
+        while not self._stop.wait(CACHE_SYNC_INTERVAL):
+            try:
+                with engine.connect() as conn:
+                    if last_id is None:
+                        last_id = conn.execute(select(func.max(CacheInvalidation.id))).scalar() or 0
+                    rows = conn.execute(
+                        select(CacheInvalidation.id, CacheInvalidation.topic, CacheInvalidation.key)
+                        .where(CacheInvalidation.id > last_id)
+                        .order_by(CacheInvalidation.id)
+                    ).all()
+                    # Ids are gapless (SQLite has one writer), so a jump means
+                    # the rows this worker had not seen yet were pruned
+                    if rows and rows[0].id != last_id + 1:
+                        clear_all_caches()
+                    for row in rows:
+                        self._deliver(row.topic, row.key)
+                        last_id = row.id
+                    # Prune whenever the log crosses another thousand rows
+                    if rows and last_id % 1000 < len(rows):
+                        conn.execute(delete(CacheInvalidation).where(
+                            CacheInvalidation.id <= last_id - SQLITE_LOG_RETENTION
+                        ))
+                    conn.commit()
+            except Exception as e:
+                print(f"⚠️ Cache sync poll failed: {e}")
+
+    def start(self):
+        """Start listening for other workers' invalidations"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        target = self._listen_postgres if self.dialect == "postgresql" else self._poll_sqlite
+        self._thread = threading.Thread(target=target, name="cache-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": "listen_notify" if self.dialect == "postgresql" else "sqlite_log",
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+cache_sync = CacheSync()
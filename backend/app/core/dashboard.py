@@ -0,0 +1,118 @@
+"""
+Everything the dashboard's landing page shows for a season, in one payload.
+
+The page used to fetch seasons, teams, the budget summary, expenses and
+revenues separately, paying HTTP, session setup and serialization each time.
+``dashboard`` assembles the same data from four independent parts: season
+totals (one sum plus one GROUP BY per ledger, which also give the summary),
+team summaries (``team_summaries``, one GROUP BY per table), and the latest
+expenses and revenues.
+
+With DASHBOARD_PARALLEL on - the default on Postgres - the parts run at
+the same time in the threadpool, each on its own session (so a request holds
+up to four pooled connections at once). SQLite serializes them anyway, so
+there they share the request's session. Archived seasons
+answer their totals from the stored rollup; they have no live teams or
+transactions left.
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal, engine
+from app.models import Season, Team, Budget, Expense, Revenue
+from app.schemas import BudgetSummary, DashboardResponse, ExpenseResponse, RevenueResponse, SeasonResponse
+from app.core.archive import archived_report
+from app.core.summaries import team_summaries
+
+DASHBOARD_PARALLEL = os.getenv(
+    "DASHBOARD_PARALLEL", "true" if engine.dialect.name == "postgresql" else "false"
+).lower() == "true"
+
+
+def _totals(db: Session, season: Season) -> Dict[str, Any]:
+    report = archived_report(db, season.id)
+    if report is not None:
+        total_budgeted = report.total_budgeted
+        expenses_by_category = report.expenses_by_category
+        revenues_by_category = report.revenues_by_category
+    else:
+        total_budgeted = float(db.query(func.sum(Budget.budgeted_amount)).filter(
+            Budget.season_id == season.id
+        ).scalar() or 0.0)
+        expenses_by_category = {
+            category.value: float(amount)
+            for category, amount in db.query(Expense.category, func.sum(Expense.amount))
+            .filter(Expense.season_id == season.id)
+            .group_by(Expense.category)
+        }
+        revenues_by_category = {
+            category.value: float(amount)
+            for category, amount in db.query(Revenue.category, func.sum(Revenue.amount))
+            .filter(Revenue.season_id == season.id)
+            .group_by(Revenue.category)
+        }
+
+    total_expenses = sum(expenses_by_category.values())
+    total_revenue = sum(revenues_by_category.values())
+    return dict(
+        summary=BudgetSummary(
+            season_id=season.id,
+            season_name=season.name,
+            total_budgeted=total_budgeted,
+            total_expenses=total_expenses,
+            total_revenue=total_revenue,
+            remaining_budget=total_budgeted - total_expenses,
+            profit_loss=total_revenue - total_expenses
+        ),
+        expenses_by_category=expenses_by_category,
+        revenues_by_category=revenues_by_category
+    )
+
+
+def _teams(db: Session, season: Season) -> Dict[str, Any]:
+    teams = db.query(Team).filter(Team.season_id == season.id).order_by(Team.name).all()
+    return dict(teams=team_summaries(db, teams))
+
+
+def _recent(model, schema, field: str, limit: int) -> Callable[[Session, Season], Dict[str, Any]]:
+    def part(db: Session, season: Season) -> Dict[str, Any]:
+        rows = (
+            db.query(model)
+            .filter(model.season_id == season.id)
+            .order_by(model.payment_date.desc(), model.created_at.desc())
+            .limit(limit)
+        )
+        return {field: [schema.model_validate(row) for row in rows]}
+    return part
+
+
+def _on_own_session(part, season: Season) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        return part(db, season)
+    finally:
+        db.close()
+
+
+async def dashboard(db: Session, season: Season, limit: int) -> DashboardResponse:
+    """The landing page's payload for ``season``, with the ``limit`` latest expenses and revenues"""
+    parts: List[Callable[[Session, Season], Dict[str, Any]]] = [
+        _totals,
+        _teams,
+        _recent(Expense, ExpenseResponse, "recent_expenses", limit),
+        _recent(Revenue, RevenueResponse, "recent_revenues", limit),
+    ]
+    if DASHBOARD_PARALLEL:
+        # Hand the request's connection back first: the parts take one each
+        db.close()
+        results = await asyncio.gather(*(run_in_threadpool(_on_own_session, part, season) for part in parts))
+    else:
+        results = [part(db, season) for part in parts]
+
+    payload: Dict[str, Any] = {"season": SeasonResponse.model_validate(season)}
+    for result in results:
+        payload.update(result)
+    return DashboardResponse(**payload)
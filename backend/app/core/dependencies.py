@@ -1,13 +1,39 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from typing import Optional
+import os
+import time
 from app.database import get_db
 from app.models import User, UserRole
-from app.core.security import decode_access_token
+from app.core.cache import TTLCache, on_invalidation, publish_invalidation
+from app.core.security import decode_access_token_payload
 
 security = HTTPBearer(auto_error=False)
 
+# Resolved token -> detached User, so authenticated requests skip the JWT
+# decode and the user query. Entries never outlive the token itself.
+token_cache = TTLCache(
+    "auth_tokens",
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "60"))
+)
+
+
+def invalidate_user(user_id: str):
+    """Forget cached tokens for a user (called whenever the user row changes)"""
+    token_cache.invalidate(lambda token, user: user.id == user_id)
+
+
+on_invalidation("user", invalidate_user)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    publish_invalidation("user", target.id, connection)
+
 
 def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
@@ -15,13 +41,20 @@ def get_current_user(
 ) -> User:
     """Get current authenticated user from JWT token - optional for now"""
     if credentials:
+        token = credentials.credentials
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
         try:
-            token = credentials.credentials
-            user_id = decode_access_token(token)
+            payload = decode_access_token_payload(token)
+            user_id = payload.get("sub") if payload else None
             
             if user_id:
                 user = db.query(User).filter(User.id == user_id).first()
                 if user:
+                    db.expunge(user)
+                    expires_in = payload.get("exp", 0) - time.time()
+                    token_cache.set(token, user, ttl=min(token_cache.ttl, expires_in))
                     return user
         except:
             pass
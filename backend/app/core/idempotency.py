@@ -0,0 +1,228 @@
+"""
+Idempotency keys for POST requests.
+
+A client that may retry a POST (flaky field Wi-Fi) sends an
+``Idempotency-Key`` header, e.g. a UUID per logical submission. The first
+request with a key runs normally and its response is stored in
+``idempotency_keys`` for IDEMPOTENCY_TTL seconds; a retry with the same key
+gets that response replayed (with ``Idempotent-Replayed: true``) and the
+write is not executed again.
+
+Keys are scoped to the route and the caller's Authorization header, and
+remember a hash of the request body: reusing a key for a different request
+is answered 422. A duplicate that arrives while the first request is still
+running waits for it - on a local future in the same worker, by polling the
+row from another worker - for up to IDEMPOTENCY_WAIT seconds, then gets 409.
+Responses with a 5xx status are not stored, so those retries run again.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from app.database import engine
+from app.models import IdempotencyKey
+
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "30"))
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# Larger responses are passed through without being stored
+MAX_STORED_BODY = 1024 * 1024
+POLL_INTERVAL = 0.1
+# Headers that describe this exchange rather than the stored result
+NOT_REPLAYED = (b"access-control-", b"server-timing", b"x-profile")
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+class IdempotencyStore:
+    """The ``idempotency_keys`` table; every method is blocking"""
+
+    def claim(self, key: str, request_hash: str) -> Tuple[str, Optional[Row]]:
+        """("new", None) if this request owns the key, else ("done" | "in_flight" | "mismatch", row)"""
+        for _ in range(2):
+            now = _utcnow()
+            try:
+                with engine.begin() as conn:
+                    # Until it finishes, the claim itself expires after the
+                    # wait window, so a crashed worker cannot block the key
+                    conn.execute(insert(IdempotencyKey).values(
+                        key=key, request_hash=request_hash,
+                        expires_at=now + timedelta(seconds=2 * IDEMPOTENCY_WAIT)
+                    ))
+                return "new", None
+            except IntegrityError:
+                pass
+            row = self.load(key)
+            if row is None or row.expires_at < now:
+                self.purge(key)
+                continue
+            if row.request_hash != request_hash:
+                return "mismatch", row
+            return ("in_flight" if row.status_code is None else "done"), row
+        return "in_flight", None
+
+    def load(self, key: str) -> Optional[Row]:
+        with engine.connect() as conn:
+            return conn.execute(select(IdempotencyKey.__table__).where(IdempotencyKey.key == key)).first()
+
+    def store(self, key: str, status_code: int, headers, body: bytes):
+        with engine.begin() as conn:
+            conn.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(
+                    status_code=status_code, headers=headers, body=body,
+                    expires_at=_utcnow() + timedelta(seconds=IDEMPOTENCY_TTL)
+                )
+            )
+
+    def purge(self, key: Optional[str] = None) -> int:
+        """Drop one key (e.g. after a failed request), or every expired key"""
+        with engine.begin() as conn:
+            criteria = IdempotencyKey.key == key if key else IdempotencyKey.expires_at < _utcnow()
+            return conn.execute(delete(IdempotencyKey).where(criteria)).rowcount
+
+
+store = IdempotencyStore()
+
+
+def _scope_key(scope, key: bytes) -> str:
+    headers = dict(scope.get("headers") or [])
+    parts = (key, scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""),
+             headers.get(b"authorization", b""))
+    return hashlib.sha256(b"\0".join(parts)).hexdigest()
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _respond(send, status_code: int, headers, body: bytes):
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _error(send, status_code: int, detail: str):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await _respond(send, status_code, [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ], body)
+
+
+async def _replay(send, row):
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers]
+    await _respond(send, row.status_code, headers + [(b"idempotent-replayed", b"true")], row.body)
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware storing and replaying POST responses per Idempotency-Key"""
+
+    def __init__(self, app):
+        self.app = app
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not IDEMPOTENCY_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        header = dict(scope.get("headers") or []).get(HEADER)
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+        if not header or len(header) > MAX_KEY_LENGTH:
+            await _error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        body = await _read_body(receive)
+        key = _scope_key(scope, header)
+        request_hash = hashlib.sha256(body).hexdigest()
+        deadline = asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT
+
+        while True:
+            outcome, row = await run_in_threadpool(store.claim, key, request_hash)
+            if outcome == "new":
+                await self._execute(scope, receive, body, send, key)
+                return
+            if outcome == "mismatch":
+                await _error(send, 422, "Idempotency-Key was already used for a different request")
+                return
+            if outcome == "done":
+                await _replay(send, row)
+                return
+            # In flight: wait for the first request, then look again
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                await _error(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+            future = self._in_flight.get(key)
+            if future is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(POLL_INTERVAL, remaining))
+
+    async def _execute(self, scope, receive, body: bytes, send, key: str):
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        response = {"status": 500, "headers": [], "body": [], "size": 0}
+        sent = False
+
+        async def receive_body():
+            nonlocal sent
+            if sent:
+                # Body already replayed: wait for the client to go away
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] <= MAX_STORED_BODY:
+                    response["body"].append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, capture)
+            if response["status"] >= 500 or response["size"] > MAX_STORED_BODY:
+                await run_in_threadpool(store.purge, key)
+            else:
+                headers = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in response["headers"]
+                    if not name.lower().startswith(NOT_REPLAYED)
+                ]
+                await run_in_threadpool(store.store, key, response["status"], headers, b"".join(response["body"]))
+        except BaseException:
+            await run_in_threadpool(store.purge, key)
+            raise
+        finally:
+            # Duplicates waiting on this request look the key up again
+            self._in_flight.pop(key, None)
+            future.set_result(None)
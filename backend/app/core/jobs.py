@@ -0,0 +1,119 @@
+"""
+Maintenance jobs run by the scheduler (app/core/scheduler.py).
+
+- ``season_rollups`` (every REPORT_SNAPSHOT_INTERVAL seconds; off when 0)
+  rebuilds the transparency report snapshot of every live season.
+- ``integrity_check`` (INTEGRITY_CHECK_CRON, nightly by default) counts rows
+  whose references disagree, e.g. an expense filed under one season for a
+  team of another. It only reports; nothing is changed.
+- ``archive_closed_seasons`` (ARCHIVE_CRON, when ARCHIVE_AFTER_DAYS > 0)
+  archives closed seasons that ended more than that many days ago, a few per
+  run.
+- ``purge_idempotency_keys`` (hourly) deletes expired stored responses.
+"""
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Season, Team, Player, Budget, Expense, Revenue, ReportSnapshot
+from app.core.archive import archive_season
+from app.core.idempotency import IDEMPOTENCY_ENABLED, store as idempotency_store
+from app.core.reports import REPORT_SNAPSHOT_INTERVAL, season_report
+
+INTEGRITY_CHECK_CRON = os.getenv("INTEGRITY_CHECK_CRON", "0 3 * * *")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_CRON = os.getenv("ARCHIVE_CRON", "30 3 * * *")
+
+# Seasons archived per run, so one run stays short
+ARCHIVE_BATCH = 5
+# Offending ids kept per integrity check
+INTEGRITY_SAMPLE = 10
+
+
+def build_report_snapshots(db: Session) -> Dict[str, Any]:
+    """Rebuild the report snapshot of every season that is not archived"""
+    seasons = db.query(Season).filter(~Season.archive.has()).all()
+    for season in seasons:
+        report = season_report(db, season)
+        db.merge(ReportSnapshot(
+            season_id=season.id,
+            report=report.model_dump(mode="json"),
+            built_at=datetime.utcnow()
+        ))
+        db.commit()  # One short transaction per season
+    return {"seasons": len(seasons)}
+
+
+def integrity_check(db: Session) -> Dict[str, Any]:
+    """Count (and sample) rows whose references disagree"""
+    roster_sizes = (
+        db.query(Player.team_id, func.count(Player.id).label("players"))
+        .group_by(Player.team_id)
+        .subquery()
+    )
+    checks = {
+        "team_roster_count_mismatch": db.query(Team.id)
+        .join(roster_sizes, roster_sizes.c.team_id == Team.id)
+        .filter(Team.current_players != roster_sizes.c.players),
+        "players_without_team": db.query(Player.id)
+        .outerjoin(Team, Team.id == Player.team_id)
+        .filter(Team.id.is_(None)),
+    }
+    for model in (Expense, Revenue, Budget):
+        checks[f"{model.__tablename__}_team_in_other_season"] = (
+            db.query(model.id)
+            .join(Team, Team.id == model.team_id)
+            .filter(Team.season_id != model.season_id)
+        )
+        checks[f"{model.__tablename__}_without_season"] = (
+            db.query(model.id)
+            .outerjoin(Season, Season.id == model.season_id)
+            .filter(Season.id.is_(None))
+        )
+
+    results = {}
+    for name, query in checks.items():
+        count = query.count()
+        results[name] = {
+            "count": count,
+            "sample": [row_id for (row_id,) in query.limit(INTEGRITY_SAMPLE)] if count else []
+        }
+    issues = sum(result["count"] for result in results.values())
+    if issues:
+        print(f"⚠️ Integrity check found {issues} inconsistent rows")
+    return {"issues": issues, "checks": results}
+
+
+def archive_closed_seasons(db: Session) -> Dict[str, Any]:
+    """Archive closed seasons that ended more than ARCHIVE_AFTER_DAYS ago"""
+    cutoff = date.today() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    seasons = (
+        db.query(Season)
+        .filter(Season.is_active == False, Season.end_date < cutoff, ~Season.archive.has())
+        .order_by(Season.end_date)
+        .limit(ARCHIVE_BATCH)
+        .all()
+    )
+    archived = {}
+    for season in seasons:
+        archived[season.id] = archive_season(db, season).row_counts
+        db.commit()
+    return {"archived": archived}
+
+
+def purge_idempotency_keys(db: Session) -> Dict[str, Any]:
+    """Delete stored responses whose TTL has passed"""
+    return {"deleted": idempotency_store.purge()}
+
+
+def register_jobs(scheduler):
+    """Add the maintenance jobs enabled by configuration"""
+    if REPORT_SNAPSHOT_INTERVAL > 0:
+        scheduler.add_interval("season_rollups", REPORT_SNAPSHOT_INTERVAL, build_report_snapshots)
+    if INTEGRITY_CHECK_CRON:
+        scheduler.add_cron("integrity_check", INTEGRITY_CHECK_CRON, integrity_check)
+    if ARCHIVE_AFTER_DAYS > 0:
+        scheduler.add_cron("archive_closed_seasons", ARCHIVE_CRON, archive_closed_seasons)
+    if IDEMPOTENCY_ENABLED:
+        scheduler.add_interval("purge_idempotency_keys", 3600, purge_idempotency_keys)
@@ -0,0 +1,216 @@
+"""
+Prometheus metrics, rendered in the text exposition format at ``/metrics``.
+
+Everything is collected in-process: request latency histograms by route
+template and status (fed by ``TimingMiddleware``), import throughput,
+scheduled job durations, cache hit rates, connection pool usage and
+event-loop lag. Values are per worker
+process, so scrape each worker (or sum them) when running more than one.
+"""
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.cache import cache_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+LOOP_LAG_INTERVAL = 0.5
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_labels(labels, le=le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str], **extra) -> str:
+    merged = dict(labels, **extra)
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in merged.items()) + "}"
+
+
+class Metrics:
+    """Process-wide metric store"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self.import_rows: Dict[str, int] = {}
+        self.import_seconds: Dict[str, float] = {}
+        self.import_last_rate: Dict[str, float] = {}
+        self.jobs: Dict[Tuple[str, str], Histogram] = {}
+        self.job_last_success: Dict[str, float] = {}
+        self.loop_lag = Histogram(LOOP_LAG_BUCKETS)
+        self.loop_lag_last = 0.0
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def observe_request(self, method: str, route: Optional[str], status_code: int, seconds: float):
+        key = (method, route or UNMATCHED_ROUTE, str(status_code))
+        with self._lock:
+            histogram = self.requests.get(key)
+            if histogram is None:
+                histogram = self.requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_import(self, kind: str, rows: int, seconds: float):
+        with self._lock:
+            self.import_rows[kind] = self.import_rows.get(kind, 0) + rows
+            self.import_seconds[kind] = self.import_seconds.get(kind, 0.0) + seconds
+            if seconds > 0:
+                self.import_last_rate[kind] = rows / seconds
+
+    def observe_job(self, name: str, status: str, seconds: float):
+        with self._lock:
+            histogram = self.jobs.get((name, status))
+            if histogram is None:
+                histogram = self.jobs[(name, status)] = Histogram(JOB_BUCKETS)
+            histogram.observe(seconds)
+            if status == "ok":
+                self.job_last_success[name] = time.time()
+
+    async def _watch_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag = max(0.0, loop.time() - expected)
+            self.loop_lag_last = lag
+            self.loop_lag.observe(lag)
+
+    def start_loop_lag_monitor(self):
+        """Start sampling event-loop lag on the running loop"""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.get_running_loop().create_task(self._watch_loop_lag())
+
+    async def stop_loop_lag_monitor(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    def render(self, engine=None) -> str:
+        """All metrics in Prometheus text format"""
+        lines = [
+            "# HELP ysb_http_request_duration_seconds Request latency by route template and status",
+            "# TYPE ysb_http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route, status_code), histogram in sorted(self.requests.items()):
+                lines += histogram.render(
+                    "ysb_http_request_duration_seconds",
+                    {"method": method, "route": route, "status": status_code}
+                )
+
+            lines += [
+                "# HELP ysb_import_rows_total Rows imported from CSV uploads",
+                "# TYPE ysb_import_rows_total counter",
+            ]
+            lines += [f"ysb_import_rows_total{_labels({'kind': k})} {v}" for k, v in sorted(self.import_rows.items())]
+            lines += [
+                "# HELP ysb_import_seconds_total Time spent processing CSV uploads",
+                "# TYPE ysb_import_seconds_total counter",
+            ]
+            lines += [f"ysb_import_seconds_total{_labels({'kind': k})} {v}" for k, v in sorted(self.import_seconds.items())]
+            lines += [
+                "# HELP ysb_import_rows_per_second Throughput of the most recent import",
+                "# TYPE ysb_import_rows_per_second gauge",
+            ]
+            lines += [
+                f"ysb_import_rows_per_second{_labels({'kind': k})} {v}" for k, v in sorted(self.import_last_rate.items())
+            ]
+
+            lines += [
+                "# HELP ysb_job_duration_seconds Scheduled job run time by outcome (runs executed by this worker)",
+                "# TYPE ysb_job_duration_seconds histogram",
+            ]
+            for (name, status), histogram in sorted(self.jobs.items()):
+                lines += histogram.render("ysb_job_duration_seconds", {"job": name, "status": status})
+            lines += [
+                "# HELP ysb_job_last_success_timestamp_seconds When this worker last finished the job successfully",
+                "# TYPE ysb_job_last_success_timestamp_seconds gauge",
+            ]
+            lines += [
+                f"ysb_job_last_success_timestamp_seconds{_labels({'job': k})} {v}"
+                for k, v in sorted(self.job_last_success.items())
+            ]
+
+            lines += [
+                "# HELP ysb_event_loop_lag_seconds How late the event loop ran a timer",
+                "# TYPE ysb_event_loop_lag_seconds histogram",
+            ]
+            lines += self.loop_lag.render("ysb_event_loop_lag_seconds", {})
+            lines += [
+                "# HELP ysb_event_loop_lag_last_seconds Most recent event-loop lag sample",
+                "# TYPE ysb_event_loop_lag_last_seconds gauge",
+                f"ysb_event_loop_lag_last_seconds {self.loop_lag_last}",
+            ]
+
+        caches = cache_stats()
+        for name, kind, field in (
+            ("ysb_cache_hits_total", "counter", "hits"),
+            ("ysb_cache_misses_total", "counter", "misses"),
+            ("ysb_cache_hit_ratio", "gauge", "hit_rate"),
+            ("ysb_cache_entries", "gauge", "size"),
+        ):
+            lines.append(f"# TYPE {name} {kind}")
+            lines += [f"{name}{_labels({'cache': cache})} {stats[field]}" for cache, stats in sorted(caches.items())]
+
+        if engine is not None:
+            pool = engine.pool
+            for name, method in (
+                ("ysb_db_pool_size", "size"),
+                ("ysb_db_pool_checked_out", "checkedout"),
+                ("ysb_db_pool_checked_in", "checkedin"),
+                ("ysb_db_pool_overflow", "overflow"),
+            ):
+                if hasattr(pool, method):
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name} {getattr(pool, method)()}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class ImportTimer:
+    """Times one CSV import: ``timer = ImportTimer("teams")`` ... ``timer.done(rows)``"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.perf_counter()
+
+    def done(self, rows: int):
+        metrics.observe_import(self.kind, rows, time.perf_counter() - self.started)
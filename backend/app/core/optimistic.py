@@ -0,0 +1,105 @@
+"""
+Optimistic concurrency for teams and budgets.
+
+Both tables carry a ``version`` that every write bumps. A write that depends
+on the row as read (validate, then write) is a compare-and-swap: the UPDATE
+only applies ``WHERE version = <version read>``. If another writer got there
+first, nothing is locked or overwritten - the row is read again and the
+change retried, up to CAS_MAX_ATTEMPTS times. A caller that passes the
+version it showed the user gets a conflict instead of a retry, since only
+the user can redo their edit.
+
+Counter adjustments skip the read entirely: ``increment`` is a single
+``SET column = column + :delta`` whose guard lives in its WHERE clause, so
+concurrent adjustments all apply and never conflict.
+"""
+import os
+from typing import Any, Callable, Dict, Iterable, Optional
+from sqlalchemy import select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ClauseElement
+from app.core.writes import NOTED, note_written
+
+CAS_MAX_ATTEMPTS = int(os.getenv("CAS_MAX_ATTEMPTS", "5"))
+
+
+class VersionConflict(Exception):
+    """The row changed under the caller (or kept changing for every retry)"""
+
+    def __init__(self, current_version: Optional[int]):
+        super().__init__(f"Row is at version {current_version}")
+        self.current_version = current_version
+
+
+def compare_and_swap(db: Session, model, row_id: str, version: int, values: Dict[str, Any]) -> Optional[Row]:
+    """Apply ``values`` only if the row is still at ``version``; the new row, or None"""
+    table = model.__table__
+    row = db.execute(
+        update(table)
+        .where(table.c.id == row_id, table.c.version == version)
+        .values(**values, version=table.c.version + 1)
+        .returning(*table.c)
+        .execution_options(**NOTED)
+    ).first()
+    if row is not None:
+        note_written(db, table, [row])
+    return row
+
+
+def update_with_retry(
+    db: Session,
+    model,
+    row_id: str,
+    change: Callable[[Row], Dict[str, Any]],
+    expected_version: Optional[int] = None,
+    attempts: int = CAS_MAX_ATTEMPTS,
+) -> Optional[Row]:
+    """Read the row, compute ``change(row)`` and compare-and-swap it in.
+
+    ``change`` may raise (e.g. an HTTPException for an invalid edit); it is
+    called again with the fresh row after every lost race. Returns the updated
+    row, or None if the row does not exist.
+    """
+    table = model.__table__
+    current = None
+    for _ in range(attempts):
+        current = db.execute(select(table).where(table.c.id == row_id)).first()
+        if current is None:
+            return None
+        if expected_version is not None and current.version != expected_version:
+            raise VersionConflict(current.version)
+        updated = compare_and_swap(db, model, row_id, current.version, change(current))
+        if updated is not None:
+            return updated
+        if expected_version is not None:
+            raise VersionConflict(None)
+    raise VersionConflict(current.version if current is not None else None)
+
+
+def increment(
+    db: Session,
+    model,
+    row_id: str,
+    deltas: Dict[str, Any],
+    where: Iterable[ClauseElement] = (),
+    values: Optional[Dict[str, Any]] = None,
+) -> Optional[Row]:
+    """Add ``deltas`` to columns in one statement, guarded by ``where``.
+
+    Returns the updated row, or None if the row is missing or the guard
+    rejected the change. ``values`` are plain assignments made alongside.
+    """
+    table = model.__table__
+    assignments = {name: table.c[name] + delta for name, delta in deltas.items()}
+    assignments.update(values or {})
+    row = db.execute(
+        update(table)
+        .where(table.c.id == row_id, *where)
+        .values(**assignments, version=table.c.version + 1)
+        .returning(*table.c)
+        .execution_options(**NOTED)
+    ).first()
+    if row is not None:
+        note_written(db, table, [row])
+    return row
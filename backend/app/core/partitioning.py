@@ -0,0 +1,108 @@
+"""
+Season partitions for the expense and revenue ledgers (Postgres only).
+
+With PARTITION_BY_SEASON=true on a Postgres database, ``expenses`` and
+``revenues`` are created as ``PARTITION BY LIST (season_id)`` tables (see
+``season_partitioned`` in models). Each season gets its own partition, created
+when the season is, so season-scoped queries only touch that season's rows and
+indexes. A DEFAULT partition catches rows for seasons that have no partition
+yet. Old seasons can be detached into a cold-storage schema (and optionally a
+cheaper tablespace) and attached again later.
+
+The layout applies to tables created while the flag is on; existing
+unpartitioned tables are left as they are.
+"""
+import os
+import re
+from typing import Iterable, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARTITIONED_TABLES = ("expenses", "revenues")
+COLD_SCHEMA = os.getenv("PARTITION_COLD_SCHEMA", "cold_storage")
+COLD_TABLESPACE = os.getenv("PARTITION_COLD_TABLESPACE")  # Optional
+
+
+def partition_name(table: str, season_id: str) -> str:
+    suffix = re.sub(r"[^a-z0-9]", "_", season_id.lower())[:40]
+    return f"{table}_s_{suffix}"
+
+
+def _literal(season_id: str) -> str:
+    # Partition bounds are DDL and cannot be bound parameters
+    return "'" + season_id.replace("'", "''") + "'"
+
+
+def _table_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def _move_from_default(db: Session, table: str, name: str, season_id: str):
+    db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {table}_default WHERE season_id = :season_id RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"season_id": season_id}
+    )
+
+
+def ensure_default_partitions(db: Session):
+    for table in PARTITIONED_TABLES:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+
+def ensure_season_partitions(db: Session, season_ids: Iterable[str]) -> List[str]:
+    """Create the ledger partitions for these seasons, if missing.
+
+    The partition is built as a standalone table, any rows that already
+    landed in the DEFAULT partition for the season are moved into it, and it
+    is then attached - so this works for new seasons and for existing seasons
+    that predate partitioning alike. Seasons detached to cold storage are
+    skipped. Runs in the caller's transaction; returns the partitions created.
+    """
+    created = []
+    for season_id in season_ids:
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, season_id)
+            if _table_exists(db, name) or _table_exists(db, f"{COLD_SCHEMA}.{name}"):
+                continue
+            db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            _move_from_default(db, table, name, season_id)
+            db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES IN ({_literal(season_id)})"))
+            created.append(name)
+    return created
+
+
+def detach_season_partitions(db: Session, season_id: str) -> List[str]:
+    """Detach a season's ledger partitions and move them to cold storage"""
+    db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {COLD_SCHEMA}"))
+    moved = []
+    for table in PARTITIONED_TABLES:
+        name = partition_name(table, season_id)
+        if not _table_exists(db, name):
+            continue
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.execute(text(f"ALTER TABLE {name} SET SCHEMA {COLD_SCHEMA}"))
+        if COLD_TABLESPACE:
+            db.execute(text(f"ALTER TABLE {COLD_SCHEMA}.{name} SET TABLESPACE {COLD_TABLESPACE}"))
+        moved.append(name)
+    return moved
+
+
+def attach_season_partitions(db: Session, season_id: str) -> List[str]:
+    """Bring a season's partitions back from cold storage"""
+    schema = db.execute(text("SELECT current_schema()")).scalar()
+    restored = []
+    for table in PARTITIONED_TABLES:
+        name = partition_name(table, season_id)
+        if not _table_exists(db, f"{COLD_SCHEMA}.{name}"):
+            continue
+        if COLD_TABLESPACE:
+            db.execute(text(f"ALTER TABLE {COLD_SCHEMA}.{name} SET TABLESPACE pg_default"))
+        db.execute(text(f"ALTER TABLE {COLD_SCHEMA}.{name} SET SCHEMA {schema}"))
+        # Pick up anything written for the season while it was detached
+        _move_from_default(db, table, name, season_id)
+        db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES IN ({_literal(season_id)})"))
+        restored.append(name)
+    return restored
@@ -0,0 +1,160 @@
+"""
+On-demand request profiling.
+
+Set PROFILE_TOKEN to enable it. A request that sends ``X-Profile-Token``
+with that value and asks for a profile - ``X-Profile: cprofile|sample``
+header or ``?_profile=cprofile|sample`` - runs under the profiler:
+
+- ``cprofile``: deterministic cProfile, saved as a ``.prof`` pstats dump
+  (``python -m pstats`` / snakeviz)
+- ``sample``: a wall-clock stack sampler over the event-loop thread, saved
+  as ``.collapsed`` stacks for flamegraph.pl / speedscope
+
+Profiles are written to PROFILE_DIR and named in the ``X-Profile-Id``
+response header; the admin router lists and serves them. Only one request is
+profiled at a time, and both profilers see the whole event-loop thread, so
+profile on a quiet worker for a clean picture.
+"""
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "2")) / 1000
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+MODES = {"cprofile": ".prof", "sample": ".collapsed"}
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _requested_mode(scope) -> Optional[str]:
+    headers = dict(scope.get("headers") or [])
+    token = headers.get(b"x-profile-token", b"").decode("latin-1")
+    if not PROFILE_TOKEN or not hmac.compare_digest(token, PROFILE_TOKEN):
+        return None
+    mode = headers.get(b"x-profile", b"").decode("latin-1")
+    if not mode:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        mode = (query.get("_profile") or [""])[0]
+    return mode if mode in MODES else None
+
+
+def _profile_name(scope, mode: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    return f"{stamp}-{scope['method'].lower()}-{slug[:80]}{MODES[mode]}"
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if name.endswith(tuple(MODES.values())):
+            path = os.path.join(PROFILE_DIR, name)
+            profiles.append({"name": name, "bytes": os.path.getsize(path)})
+    return profiles
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of a stored profile, or None if there is no such profile"""
+    if name != os.path.basename(name) or not name.endswith(tuple(MODES.values())):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def _prune():
+    for profile in list_profiles()[PROFILE_KEEP:]:
+        os.remove(os.path.join(PROFILE_DIR, profile["name"]))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running opted-in requests under a profiler"""
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        mode = _requested_mode(scope) if scope["type"] == "http" and PROFILE_TOKEN else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, self._with_header(send, b"x-profile", b"busy"))
+            return
+
+        name = _profile_name(scope, mode)
+        try:
+            if mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, self._with_header(send, b"x-profile-id", name.encode()))
+                finally:
+                    profiler.disable()
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+            else:
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+                try:
+                    await self.app(scope, receive, self._with_header(send, b"x-profile-id", name.encode()))
+                finally:
+                    sampler.stop()
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                sampler.dump(os.path.join(PROFILE_DIR, name))
+            _prune()
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def _with_header(send, key: bytes, value: bytes):
+        async def wrapped(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(key, value)]
+            await send(message)
+        return wrapped
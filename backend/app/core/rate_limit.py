@@ -0,0 +1,212 @@
+"""
+In-process rate limiting and load shedding.
+
+Requests are sorted into route classes (auth, reports, imports, writes);
+reports are the transparency routes, while budget summaries stay plain reads.
+Each class has a token bucket per client - the user of a valid bearer token,
+otherwise the client IP - refilled at RATE_LIMIT_<CLASS> = "rate/burst"
+(requests per second / bucket size). An empty bucket answers 429 with
+Retry-After.
+
+Reports and imports are also "heavy": when MAX_HEAVY_IN_FLIGHT of them are
+already running, further heavy requests are shed with 503 and Retry-After
+instead of queueing behind them, so cheap requests keep their latency.
+Plain reads and CORS preflights are never limited.
+
+Tokens only name the client once their signature checks out, so a stream of
+made-up tokens shares the sender's IP bucket. The IP is the peer address;
+``X-Forwarded-For`` is only read behind TRUSTED_PROXY_HOPS proxies that
+append to it, taking the address the outermost trusted proxy saw. Limiting
+is off unless RATE_LIMIT_ENABLED or TRUSTED_PROXY_HOPS is set (``0`` when the
+API is exposed directly), so a proxied deployment does not put every client
+in one bucket by default.
+"""
+import hashlib
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.core.cache import TTLCache
+from app.core.security import decode_access_token_payload
+
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+# On by default only once TRUSTED_PROXY_HOPS is set: behind an unconfigured
+# proxy every client would share the proxy's bucket
+RATE_LIMIT_ENABLED = os.getenv(
+    "RATE_LIMIT_ENABLED", "true" if "TRUSTED_PROXY_HOPS" in os.environ else "false"
+).lower() == "true"
+MAX_HEAVY_IN_FLIGHT = int(os.getenv("MAX_HEAVY_IN_FLIGHT", "4"))
+MAX_BUCKETS = 10000
+
+DEFAULT_LIMITS = {
+    "auth": "1/5",
+    "reports": "2/10",
+    "imports": "0.2/3",
+    "writes": "20/60",
+}
+HEAVY_CLASSES = {"reports", "imports"}
+
+
+def _parse_limit(spec: str) -> Tuple[float, float]:
+    rate, burst = spec.split("/")
+    return float(rate), float(burst)
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Which limit applies to a request, or None for cheap unlimited reads"""
+    if method in ("OPTIONS", "HEAD"):
+        return None
+    if path.startswith("/api/v1/auth/") and method == "POST":
+        return "auth"
+    if path.startswith("/api/v1/import/") and method == "POST":
+        return "imports"
+    if path.startswith("/api/v1/transparency/"):
+        return "reports"
+    if method in ("POST", "PUT", "PATCH", "DELETE"):
+        return "writes"
+    return None
+
+
+class RateLimiter:
+    """Token buckets per (route class, client) plus heavy-request accounting"""
+
+    def __init__(self, limits: Dict[str, str] = None, max_heavy_in_flight: int = MAX_HEAVY_IN_FLIGHT):
+        limits = limits or {
+            name: os.getenv(f"RATE_LIMIT_{name.upper()}", spec) for name, spec in DEFAULT_LIMITS.items()
+        }
+        self.limits = {name: _parse_limit(spec) for name, spec in limits.items()}
+        self.max_heavy_in_flight = max_heavy_in_flight
+        self.heavy_in_flight = 0
+        self._buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self.counters = {name: {"allowed": 0, "limited": 0, "shed": 0} for name in self.limits}
+
+    def take(self, route: str, client: str) -> float:
+        """Spend a token; returns 0 if allowed, else seconds until one is available"""
+        rate, burst = self.limits[route]
+        now = time.monotonic()
+        key = (route, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate if rate > 0 else 60.0
+
+    def stats(self) -> dict:
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "heavy_in_flight": self.heavy_in_flight,
+            "max_heavy_in_flight": self.max_heavy_in_flight,
+            "tracked_clients": len(self._buckets),
+            "routes": {
+                name: dict(counts, rate=self.limits[name][0], burst=self.limits[name][1])
+                for name, counts in self.counters.items()
+            },
+        }
+
+
+limiter = RateLimiter()
+
+
+# Verified token -> user id, so the signature is checked once per token per minute
+_token_users = TTLCache("rate_limit_tokens", maxsize=MAX_BUCKETS, ttl=60.0)
+
+
+def _token_user(token: str) -> Optional[str]:
+    key = hashlib.sha256(token.encode("latin-1")).hexdigest()
+    user_id = _token_users.get(key)
+    if user_id is None:
+        payload = decode_access_token_payload(token)
+        user_id = payload.get("sub") if payload else None
+        if user_id:
+            _token_users.set(key, user_id)
+    return user_id
+
+
+def _client_ip(scope, headers) -> str:
+    forwarded = headers.get(b"x-forwarded-for") if TRUSTED_PROXY_HOPS > 0 else None
+    if forwarded:
+        # Each trusted proxy appended the address it received from; anything
+        # further left was sent by the client and may be made up
+        hops = [part.strip() for part in forwarded.decode("latin-1").split(",") if part.strip()]
+        if hops:
+            return hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _client_key(scope) -> str:
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"")
+    if authorization.lower().startswith(b"bearer "):
+        user_id = _token_user(authorization[7:].decode("latin-1"))
+        if user_id:
+            return "user:" + user_id
+    return "ip:" + _client_ip(scope, headers)
+
+
+async def _reject(send, status_code: int, retry_after: float, detail: str):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying ``limiter`` to every HTTP request"""
+
+    def __init__(self, app, limiter: RateLimiter = limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_class(scope["method"], scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        counters = self.limiter.counters[route]
+        heavy = route in HEAVY_CLASSES
+        if heavy and self.limiter.heavy_in_flight >= self.limiter.max_heavy_in_flight:
+            counters["shed"] += 1
+            await _reject(send, 503, 1, "Server busy, please retry shortly")
+            return
+
+        wait = self.limiter.take(route, _client_key(scope))
+        if wait:
+            counters["limited"] += 1
+            await _reject(send, 429, wait, "Too many requests")
+            return
+
+        counters["allowed"] += 1
+        if not heavy:
+            await self.app(scope, receive, send)
+            return
+
+        self.limiter.heavy_in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.heavy_in_flight -= 1
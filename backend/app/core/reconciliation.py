@@ -0,0 +1,215 @@
+"""
+Registration fee reconciliation.
+
+Three records of the same money should agree for every team: the fees its
+roster owes (``current_players * registration_fee``), the payments marked on
+its players, and the REGISTRATION_FEES revenue booked for it. Reconciling an
+organization costs a fixed number of queries however large it is:
+
+- one query joins each team to its players and its registration revenue,
+  both pre-aggregated with GROUP BY, so the database joins two small grouped
+  sets instead of the code looping per team;
+- one GROUP BY totals registration revenue booked season-wide (no team);
+- one query selects only the players whose payment disagrees with their
+  team's fee, streamed in batches.
+
+The result is newline-delimited JSON: a ``team`` line per team with an issue,
+a ``player`` line per mismatching player, then a ``summary`` line. Archived
+seasons are skipped, since their rows no longer live in these tables.
+"""
+import json
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Season, Team, Player, Revenue, RevenueCategory
+
+# Amounts closer than this (half a cent) count as equal
+TOLERANCE = 0.005
+# Player rows fetched per round trip while streaming
+PLAYER_BATCH = 1000
+
+
+def reconcilable_seasons(db: Session, org_id: str, season_id: Optional[str] = None) -> List[Season]:
+    """The organization's seasons whose rows are still live"""
+    query = db.query(Season).filter(Season.organization_id == org_id, ~Season.archive.has())
+    if season_id:
+        query = query.filter(Season.id == season_id)
+    return query.order_by(Season.start_date).all()
+
+
+def _money(amount) -> float:
+    return round(float(amount or 0.0), 2)
+
+
+def _team_issues(row) -> List[str]:
+    issues = []
+    if row.roster != row.current_players:
+        issues.append("roster_count_mismatch")
+    if row.collected < row.expected - TOLERANCE:
+        issues.append("fees_outstanding")
+    elif row.collected > row.expected + TOLERANCE:
+        issues.append("fees_overcollected")
+    if row.booked < row.collected - TOLERANCE:
+        issues.append("revenue_not_booked")
+    elif row.booked > row.collected + TOLERANCE:
+        issues.append("revenue_exceeds_payments")
+    return issues
+
+
+def _player_issue(row) -> str:
+    if not row.paid:
+        return "amount_without_payment"
+    if row.amount < TOLERANCE:
+        return "paid_without_amount"
+    return "underpaid" if row.amount < row.fee else "overpaid"
+
+
+def team_totals(db: Session, season_ids: List[str]):
+    """Expected, collected and booked registration fees per team"""
+    paid = func.coalesce(Player.registration_fee_paid, False)
+    players = (
+        select(
+            Player.team_id,
+            func.count(Player.id).label("roster"),
+            func.sum(case((paid, 1), else_=0)).label("paid_players"),
+            func.sum(case((paid, Player.registration_fee_amount), else_=0.0)).label("collected"),
+        )
+        .join(Team, Team.id == Player.team_id)
+        .where(Team.season_id.in_(season_ids))
+        .group_by(Player.team_id)
+        .subquery()
+    )
+    revenues = (
+        select(Revenue.team_id, func.sum(Revenue.amount).label("booked"))
+        .where(
+            Revenue.season_id.in_(season_ids),
+            Revenue.category == RevenueCategory.REGISTRATION_FEES,
+            Revenue.team_id.isnot(None),
+        )
+        .group_by(Revenue.team_id)
+        .subquery()
+    )
+    current_players = func.coalesce(Team.current_players, 0)
+    return db.execute(
+        select(
+            Team.id, Team.name, Team.season_id,
+            current_players.label("current_players"),
+            func.coalesce(Team.registration_fee, 0.0).label("fee"),
+            (current_players * func.coalesce(Team.registration_fee, 0.0)).label("expected"),
+            func.coalesce(players.c.roster, 0).label("roster"),
+            func.coalesce(players.c.paid_players, 0).label("paid_players"),
+            func.coalesce(players.c.collected, 0.0).label("collected"),
+            func.coalesce(revenues.c.booked, 0.0).label("booked"),
+        )
+        .outerjoin(players, players.c.team_id == Team.id)
+        .outerjoin(revenues, revenues.c.team_id == Team.id)
+        .where(Team.season_id.in_(season_ids))
+        .order_by(Team.season_id, Team.name)
+    )
+
+
+def unassigned_revenue(db: Session, season_ids: List[str]) -> Dict[str, float]:
+    """Registration revenue booked per season without a team"""
+    return {
+        season_id: _money(amount)
+        for season_id, amount in db.query(Revenue.season_id, func.sum(Revenue.amount))
+        .filter(
+            Revenue.season_id.in_(season_ids),
+            Revenue.category == RevenueCategory.REGISTRATION_FEES,
+            Revenue.team_id.is_(None),
+        )
+        .group_by(Revenue.season_id)
+    }
+
+
+def mismatched_players(db: Session, season_ids: List[str]):
+    """Players whose recorded payment disagrees with their team's fee"""
+    paid = func.coalesce(Player.registration_fee_paid, False)
+    amount = func.coalesce(Player.registration_fee_amount, 0.0)
+    fee = func.coalesce(Team.registration_fee, 0.0)
+    return db.execute(
+        select(
+            Player.id, Player.first_name, Player.last_name, Player.team_id,
+            Team.name.label("team_name"), Team.season_id,
+            paid.label("paid"), amount.label("amount"), fee.label("fee"),
+        )
+        .join(Team, Team.id == Player.team_id)
+        .where(
+            Team.season_id.in_(season_ids),
+            or_(
+                # Paid, but not the team's fee
+                paid & (func.abs(amount - fee) > TOLERANCE),
+                # An amount recorded without the payment flag
+                ~paid & (amount > TOLERANCE),
+            ),
+        )
+        .order_by(Team.season_id, Team.name, Player.last_name, Player.first_name)
+        .execution_options(yield_per=PLAYER_BATCH)
+    )
+
+
+def reconcile(season_ids: List[str]) -> Iterator[str]:
+    """NDJSON lines for the given seasons, on a session of its own"""
+    db = SessionLocal()
+    try:
+        totals: Dict[str, Any] = {
+            "teams": 0, "teams_with_issues": 0, "players_with_issues": 0,
+            "expected": 0.0, "collected": 0.0, "booked": 0.0,
+        }
+        for row in team_totals(db, season_ids):
+            totals["teams"] += 1
+            totals["expected"] += row.expected
+            totals["collected"] += row.collected
+            totals["booked"] += row.booked
+            issues = _team_issues(row)
+            if not issues:
+                continue
+            totals["teams_with_issues"] += 1
+            yield json.dumps({
+                "type": "team",
+                "team_id": row.id,
+                "team_name": row.name,
+                "season_id": row.season_id,
+                "issues": issues,
+                "current_players": row.current_players,
+                "roster": row.roster,
+                "paid_players": row.paid_players,
+                "registration_fee": _money(row.fee),
+                "expected": _money(row.expected),
+                "collected": _money(row.collected),
+                "booked": _money(row.booked),
+                "outstanding": _money(row.expected - row.collected),
+                "unbooked": _money(row.collected - row.booked),
+            }) + "\n"
+
+        for row in mismatched_players(db, season_ids):
+            totals["players_with_issues"] += 1
+            yield json.dumps({
+                "type": "player",
+                "player_id": row.id,
+                "player_name": f"{row.first_name} {row.last_name}",
+                "team_id": row.team_id,
+                "team_name": row.team_name,
+                "season_id": row.season_id,
+                "issue": _player_issue(row),
+                "registration_fee_paid": bool(row.paid),
+                "registration_fee_amount": _money(row.amount),
+                "team_registration_fee": _money(row.fee),
+            }) + "\n"
+
+        unassigned = unassigned_revenue(db, season_ids)
+        yield json.dumps({
+            "type": "summary",
+            "season_ids": season_ids,
+            "teams": totals["teams"],
+            "teams_with_issues": totals["teams_with_issues"],
+            "players_with_issues": totals["players_with_issues"],
+            "expected": _money(totals["expected"]),
+            "collected": _money(totals["collected"]),
+            "booked": _money(totals["booked"]),
+            "booked_without_team": unassigned,
+            "outstanding": _money(totals["expected"] - totals["collected"]),
+        }) + "\n"
+    finally:
+        db.close()
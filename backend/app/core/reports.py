@@ -0,0 +1,107 @@
+"""
+Season report rollups built from grouped queries.
+
+A season report costs a fixed number of queries no matter how many teams the
+season has: per-team totals, category breakdowns and collected registration
+fees are each one GROUP BY.
+
+With REPORT_SNAPSHOT_INTERVAL set, the scheduler also stores every live
+season's report in ``report_snapshots`` on that interval, and the report
+endpoints serve a snapshot instead of rebuilding it. Snapshots older than two
+intervals are ignored, so a stalled scheduler falls back to live reports.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import Season, Team, Expense, Revenue, Budget, Player, ReportSnapshot
+from app.schemas import PlayerCostBreakdown, TransparencyReport
+
+REPORT_SNAPSHOT_INTERVAL = float(os.getenv("REPORT_SNAPSHOT_INTERVAL", "0"))
+
+
+def season_report(db: Session, season: Season) -> TransparencyReport:
+    """Financial transparency report for one season"""
+    season_id = season.id
+
+    total_budgeted = db.query(func.sum(Budget.budgeted_amount)).filter(
+        Budget.season_id == season_id
+    ).scalar() or 0.0
+
+    expenses_by_category = {
+        category.value: float(amount)
+        for category, amount in db.query(Expense.category, func.sum(Expense.amount)).filter(
+            Expense.season_id == season_id
+        ).group_by(Expense.category)
+    }
+
+    revenues_by_category = {
+        category.value: float(amount)
+        for category, amount in db.query(Revenue.category, func.sum(Revenue.amount)).filter(
+            Revenue.season_id == season_id
+        ).group_by(Revenue.category)
+    }
+
+    total_expenses = sum(expenses_by_category.values())
+    total_revenue = sum(revenues_by_category.values())
+
+    # Per-team category breakdown in one pass
+    team_categories = {}
+    for team_id, category, amount in (
+        db.query(Expense.team_id, Expense.category, func.sum(Expense.amount))
+        .join(Team, Team.id == Expense.team_id)
+        .filter(Team.season_id == season_id)
+        .group_by(Expense.team_id, Expense.category)
+    ):
+        team_categories.setdefault(team_id, {})[category.value] = float(amount)
+
+    registration_fees = dict(
+        db.query(Player.team_id, func.sum(Player.registration_fee_amount))
+        .join(Team, Team.id == Player.team_id)
+        .filter(Team.season_id == season_id, Player.registration_fee_paid == True)
+        .group_by(Player.team_id)
+        .all()
+    )
+
+    player_breakdowns = []
+    for team in db.query(Team).filter(Team.season_id == season_id):
+        category_breakdown = team_categories.get(team.id, {})
+        total_cost = sum(category_breakdown.values())
+        fees = float(registration_fees.get(team.id) or 0.0)
+        player_count = team.current_players or 1
+        player_breakdowns.append(PlayerCostBreakdown(
+            team_id=team.id,
+            team_name=team.name,
+            total_cost=total_cost,
+            player_count=player_count,
+            cost_per_player=total_cost / player_count if player_count > 0 else 0,
+            registration_fee=fees,
+            other_costs=total_cost - fees,
+            breakdown_by_category=category_breakdown
+        ))
+
+    return TransparencyReport(
+        organization_id="",
+        organization_name=season.name,
+        season_id=season_id,
+        total_budgeted=float(total_budgeted),
+        total_expenses=float(total_expenses),
+        total_revenue=float(total_revenue),
+        expenses_by_category=expenses_by_category,
+        revenues_by_category=revenues_by_category,
+        player_cost_breakdown=player_breakdowns,
+        profit_loss=float(total_revenue - total_expenses)
+    )
+
+
+def snapshot_reports(db: Session, season_ids: List[str]) -> Dict[str, TransparencyReport]:
+    """Current snapshots for whichever of these seasons have one"""
+    if REPORT_SNAPSHOT_INTERVAL <= 0 or not season_ids:
+        return {}
+    cutoff = datetime.utcnow() - timedelta(seconds=2 * REPORT_SNAPSHOT_INTERVAL)
+    return {
+        season_id: TransparencyReport(**report)
+        for season_id, report in db.query(ReportSnapshot.season_id, ReportSnapshot.report)
+        .filter(ReportSnapshot.season_id.in_(season_ids), ReportSnapshot.built_at >= cutoff)
+    }
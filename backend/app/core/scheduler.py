@@ -0,0 +1,298 @@
+"""
+In-process scheduler for maintenance jobs.
+
+Jobs run on an interval or a cron expression (UTC, five fields: minute hour
+day-of-month month day-of-week). The scheduler is one asyncio task per
+worker, started and stopped with the app; each job body runs in the
+threadpool with its own session, one job at a time, so maintenance never
+runs inside a user request nor blocks the event loop.
+
+Every worker runs the scheduler, but each run is claimed first with a
+conditional UPDATE of the job's ``scheduled_jobs`` row: it only succeeds if
+no one holds the lease and no one started the job since it became due, so
+exactly one worker executes each run. The lease expires after
+JOB_LEASE_SECONDS in case a worker dies mid-job. The same row records the
+last outcome, duration and result for ``/api/v1/admin/jobs``.
+"""
+import asyncio
+import os
+import socket
+import time
+import traceback
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal, engine
+from app.models import ScheduledJob
+from app.core.metrics import metrics
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+JOB_LEASE = float(os.getenv("JOB_LEASE_SECONDS", "900"))
+
+# Longest the loop sleeps before re-checking (clock changes, triggers)
+MAX_SLEEP = 60.0
+
+# A job body gets a session (the scheduler commits it on success) and returns
+# a JSON-serializable summary that is stored as the job's last result
+JobFunc = Callable[[Session], Optional[Dict[str, Any]]]
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow().replace(microsecond=0)
+
+
+class CronSchedule:
+    """Five-field cron expression: ``*``, ``*/n``, ``a-b``, ``a-b/n`` and lists"""
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))  # weekday 0 and 7 are both Sunday
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        # Like cron, a restricted day-of-month and day-of-week match either
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(part: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in part.split(","):
+            spec, _, step = item.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = end = int(spec)
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field {item!r} is outside {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+@dataclass
+class Job:
+    name: str
+    func: JobFunc
+    interval: Optional[float] = None  # seconds
+    cron: Optional[CronSchedule] = None
+    next_run: Optional[datetime] = None
+    forced: bool = False
+
+    @property
+    def schedule(self) -> str:
+        return f"every {self.interval:g}s" if self.interval else f"cron {self.cron.expression}"
+
+    def due_since(self) -> datetime:
+        """Runs started before this moment do not count for the current run"""
+        if self.interval:
+            return self.next_run - timedelta(seconds=self.interval) + timedelta(seconds=1)
+        return self.next_run
+
+    def advance(self, now: datetime):
+        if self.interval:
+            self.next_run = now + timedelta(seconds=self.interval)
+        else:
+            self.next_run = self.cron.next_after(now)
+
+
+class Scheduler:
+    """Runs registered jobs on this worker's event loop"""
+
+    def __init__(self, enabled: bool = SCHEDULER_ENABLED, lease: float = JOB_LEASE):
+        self.enabled = enabled
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, Job] = {}
+        self.running: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def add_interval(self, name: str, seconds: float, func: JobFunc):
+        self.jobs[name] = Job(name=name, func=func, interval=seconds)
+
+    def add_cron(self, name: str, expression: str, func: JobFunc):
+        self.jobs[name] = Job(name=name, func=func, cron=CronSchedule(expression))
+
+    def start(self):
+        """Start the scheduler loop on the running event loop"""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        now = _utcnow()
+        for job in self.jobs.values():
+            # Interval jobs are due at once; the claim skips them if another
+            # worker ran them recently
+            job.next_run = now if job.interval else job.cron.next_after(now)
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 30.0):
+        """Let a running job finish (up to ``timeout``), then stop"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            pass  # The lease expires on its own
+        self._task = None
+
+    def trigger(self, name: str):
+        """Run a job as soon as possible, regardless of its schedule"""
+        job = self.jobs[name]
+        job.forced = True
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while not self._stopping:
+            now = _utcnow()
+            for job in list(self.jobs.values()):
+                if self._stopping:
+                    break
+                if job.forced or job.next_run <= now:
+                    forced, job.forced = job.forced, False
+                    await self._execute(job, None if forced else job.due_since())
+                    if not forced:
+                        job.advance(_utcnow())
+            if self._stopping:
+                break
+            wait = min([(job.next_run - _utcnow()).total_seconds() for job in self.jobs.values()] + [MAX_SLEEP])
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(wait, 0.1))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: Job, due_since: Optional[datetime]):
+        try:
+            if not await run_in_threadpool(self._claim, job.name, due_since):
+                return
+        except Exception as e:
+            print(f"⚠️ Could not claim job {job.name}: {e}")
+            return
+        self.running = job.name
+        started = time.perf_counter()
+        try:
+            result = await run_in_threadpool(self._call, job)
+            status, error = "ok", None
+        except Exception:
+            result, status, error = None, "error", traceback.format_exc()
+            print(f"⚠️ Job {job.name} failed: {error.splitlines()[-1]}")
+        seconds = time.perf_counter() - started
+        self.running = None
+        metrics.observe_job(job.name, status, seconds)
+        try:
+            await run_in_threadpool(self._release, job.name, status, seconds, result, error)
+        except Exception as e:
+            print(f"⚠️ Could not record job {job.name}: {e}")
+
+    @staticmethod
+    def _call(job: Job):
+        db = SessionLocal()
+        try:
+            result = job.func(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _claim(self, name: str, due_since: Optional[datetime]) -> bool:
+        now = _utcnow()
+        claim = dict(locked_by=self.owner, locked_until=now + timedelta(seconds=self.lease), last_started_at=now)
+        conditions = [
+            ScheduledJob.name == name,
+            or_(ScheduledJob.locked_until.is_(None), ScheduledJob.locked_until < now),
+        ]
+        if due_since is not None:
+            conditions.append(or_(ScheduledJob.last_started_at.is_(None), ScheduledJob.last_started_at < due_since))
+        with engine.begin() as conn:
+            if conn.execute(update(ScheduledJob).where(*conditions).values(**claim)).rowcount == 1:
+                return True
+            if conn.execute(select(ScheduledJob.name).where(ScheduledJob.name == name)).first() is not None:
+                return False
+        try:
+            # First run anywhere: whoever inserts the row owns it
+            with engine.begin() as conn:
+                conn.execute(insert(ScheduledJob).values(name=name, **claim))
+            return True
+        except IntegrityError:
+            return False
+
+    def _release(self, name: str, status: str, seconds: float, result, error: Optional[str]):
+        with engine.begin() as conn:
+            conn.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == name, ScheduledJob.locked_by == self.owner)
+                .values(
+                    locked_by=None, locked_until=None, last_finished_at=_utcnow(), last_status=status,
+                    last_duration_ms=round(seconds * 1000, 2), last_result=result, last_error=error
+                )
+            )
+
+    def status(self, db: Session) -> List[Dict[str, Any]]:
+        """Every job's schedule plus its shared run record"""
+        rows = {row.name: row for row in db.query(ScheduledJob).filter(ScheduledJob.name.in_(list(self.jobs)))}
+        jobs = []
+        for name, job in sorted(self.jobs.items()):
+            row = rows.get(name)
+            jobs.append({
+                "name": name,
+                "schedule": job.schedule,
+                "next_run": job.next_run,
+                "running_here": self.running == name,
+                "locked_by": row.locked_by if row else None,
+                "last_started_at": row.last_started_at if row else None,
+                "last_finished_at": row.last_finished_at if row else None,
+                "last_status": row.last_status if row else None,
+                "last_duration_ms": row.last_duration_ms if row else None,
+                "last_result": row.last_result if row else None,
+                "last_error": row.last_error if row else None,
+            })
+        return jobs
+
+
+scheduler = Scheduler()
@@ -0,0 +1,151 @@
+"""
+Opt-in slow-query log.
+
+With SLOW_QUERY_LOG_ENABLED, every statement that takes longer than
+SLOW_QUERY_MS is recorded with its SQL, the types of its parameters and its
+duration in a ring buffer of the last SLOW_QUERY_BUFFER_SIZE entries. Bound
+values are never stored - they include password hashes and emails - since
+the admin endpoints serving the log are readable by anyone. A SLOW_QUERY_EXPLAIN_SAMPLE
+fraction of them also get their plan captured right away - ``EXPLAIN`` on
+Postgres, ``EXPLAIN QUERY PLAN`` on SQLite - on the same connection, so the
+plan reflects the data the statement actually saw. EXPLAIN without ANALYZE
+never executes the statement.
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.2"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+
+MAX_STATEMENT_LENGTH = 10000
+MAX_PARAMETERS_LENGTH = 2000
+EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+QUOTED_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def redact_parameters(parameters, executemany: bool = False) -> str:
+    """The shape of bound parameters, e.g. ``(str, float, None)``, without their values"""
+    def shape(params) -> str:
+        if isinstance(params, dict):
+            return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in params.items()) + "}"
+        if isinstance(params, (list, tuple)):
+            return "(" + ", ".join("None" if value is None else type(value).__name__ for value in params) + ")"
+        return type(params).__name__
+
+    if executemany and isinstance(parameters, (list, tuple)):
+        return f"{len(parameters)} rows of " + (shape(parameters[0]) if parameters else "()")
+    return shape(parameters)
+
+
+class SlowQueryLog:
+    """Ring buffer of statements slower than ``threshold_ms``"""
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        explain_sample: float = SLOW_QUERY_EXPLAIN_SAMPLE,
+        size: int = SLOW_QUERY_BUFFER_SIZE
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.entries: deque = deque(maxlen=size)
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine):
+        if not event.contains(engine, "before_cursor_execute", self._before):
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _handle_error(self, context):
+        starts = context.connection.info.get("slow_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement[:MAX_STATEMENT_LENGTH],
+            "parameters": redact_parameters(parameters, executemany)[:MAX_PARAMETERS_LENGTH],
+            "executemany": executemany,
+            "plan": None,
+        }
+        if (
+            not executemany
+            and statement.lstrip().lower().startswith(EXPLAINABLE)
+            and random.random() < self.explain_sample
+        ):
+            entry["plan"] = self._explain(conn, statement, parameters)
+
+        with self._lock:
+            self.entries.append(entry)
+            self.recorded += 1
+
+    @staticmethod
+    def _explain(conn, statement, parameters) -> List[str]:
+        sqlite = conn.dialect.name == "sqlite"
+        prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+        # A raw DBAPI cursor, so the EXPLAIN is not itself timed and logged.
+        # On Postgres a failed statement aborts the transaction, so the
+        # EXPLAIN runs inside a savepoint that is rolled back on error.
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if not sqlite:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                # Postgres prints bound values into the plan as literals
+                plan = [
+                    QUOTED_LITERAL.sub("'?'", " ".join(str(column) for column in row))
+                    for row in cursor.fetchall()
+                ]
+            except Exception as e:
+                if not sqlite:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                return [f"EXPLAIN failed: {e}"]
+            if not sqlite:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        finally:
+            cursor.close()
+
+    def recent(self, limit: Optional[int] = None) -> List[dict]:
+        """Recorded entries, newest first"""
+        with self._lock:
+            entries = list(reversed(self.entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SLOW_QUERY_LOG_ENABLED,
+            "threshold_ms": self.threshold_ms,
+            "explain_sample": self.explain_sample,
+            "buffer_size": self.entries.maxlen,
+            "recorded": self.recorded,
+        }
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,376 @@
+"""
+Budget summaries, and a live stream of their changes.
+
+``season_summary`` and ``team_summaries`` back ``/budgets/summary``,
+``/budgets/team/{id}/summary`` and ``/budgets/teams/summary``; team totals
+take one GROUP BY per table for any number of teams. Instead of polling
+those, a dashboard can open ``/budgets/summary/stream`` (server-sent events)
+for its season and teams:
+
+- engine events note which seasons and teams each committed write to
+  expenses, revenues, budgets, players or teams touched, from the rows the
+  write helpers record (``app.core.writes.note_written``) or else from the
+  statement's parameters. Statements whose season or team cannot be read
+  either way (most other updates and deletes) mark every summary as changed;
+- ``summary_hub`` waits LIVE_SUMMARY_DELAY_MS after a change so a burst (an
+  import, a batch) settles, recomputes each changed summary that somebody is
+  watching once, and pushes only the fields that differ to all of its
+  subscribers;
+- with cache sync on, the changed keys also go to the other workers as
+  ``summaries`` invalidations, so a write on one worker reaches streams held
+  by another.
+
+A subscriber gets a ``summary`` event per key first, then ``delta`` events.
+A client that falls SUBSCRIBER_QUEUE events behind is disconnected; its
+EventSource reconnects and starts again from a fresh summary.
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models import Season, Team, Budget, Expense, Revenue, Player
+from app.schemas import BudgetSummary, TeamBudgetSummary
+from app.core.archive import archived_report
+from app.core.cache import on_invalidation
+from app.core.writes import WRITTEN_ROWS, record_written_rows
+
+LIVE_SUMMARY_DELAY = float(os.getenv("LIVE_SUMMARY_DELAY_MS", "500")) / 1000
+LIVE_SUMMARY_KEEPALIVE = float(os.getenv("LIVE_SUMMARY_KEEPALIVE", "15"))
+# How long a disconnected EventSource waits before reconnecting
+LIVE_SUMMARY_RETRY_MS = 3000
+
+# Events buffered for one client before it is dropped as too slow
+SUBSCRIBER_QUEUE = 100
+# Tables the summaries are computed from
+WATCHED_TABLES = {"expenses", "revenues", "budgets", "players", "teams"}
+# Key meaning "every summary may have changed"
+EVERYTHING = "*"
+# More changed keys than this are sent to other workers as EVERYTHING
+MAX_PUBLISHED_KEYS = 50
+
+
+def season_key(season_id: str) -> str:
+    return f"season:{season_id}"
+
+
+def team_key(team_id: str) -> str:
+    return f"team:{team_id}"
+
+
+def season_summary(db: Session, season: Season) -> BudgetSummary:
+    """Budget, expense and revenue totals for a season"""
+    # Archived seasons answer from their stored final rollup
+    report = archived_report(db, season.id)
+    if report is not None:
+        return BudgetSummary(
+            season_id=season.id,
+            season_name=season.name,
+            total_budgeted=report.total_budgeted,
+            total_expenses=report.total_expenses,
+            total_revenue=report.total_revenue,
+            remaining_budget=report.total_budgeted - report.total_expenses,
+            profit_loss=report.profit_loss
+        )
+
+    total_budgeted = db.query(func.sum(Budget.budgeted_amount)).filter(
+        Budget.season_id == season.id
+    ).scalar() or 0.0
+
+    total_expenses = db.query(func.sum(Expense.amount)).filter(
+        Expense.season_id == season.id
+    ).scalar() or 0.0
+
+    total_revenue = db.query(func.sum(Revenue.amount)).filter(
+        Revenue.season_id == season.id
+    ).scalar() or 0.0
+
+    return BudgetSummary(
+        season_id=season.id,
+        season_name=season.name,
+        total_budgeted=float(total_budgeted),
+        total_expenses=float(total_expenses),
+        total_revenue=float(total_revenue),
+        remaining_budget=float(total_budgeted - total_expenses),
+        profit_loss=float(total_revenue - total_expenses)
+    )
+
+
+def _totals_by_team(db: Session, column, team_ids: List[str], *criteria) -> Dict[str, float]:
+    model = column.class_
+    return {
+        team_id: float(total or 0.0)
+        for team_id, total in db.query(model.team_id, func.sum(column))
+        .filter(model.team_id.in_(team_ids), *criteria)
+        .group_by(model.team_id)
+    }
+
+
+def team_summaries(db: Session, teams: List[Team]) -> List[TeamBudgetSummary]:
+    """Summaries for many teams, one GROUP BY per table however many there are"""
+    team_ids = [team.id for team in teams]
+    if not team_ids:
+        return []
+    budgeted = _totals_by_team(db, Budget.budgeted_amount, team_ids)
+    expenses = _totals_by_team(db, Expense.amount, team_ids)
+    revenue = _totals_by_team(db, Revenue.amount, team_ids)
+    collected = _totals_by_team(db, Player.registration_fee_amount, team_ids, Player.registration_fee_paid == True)
+
+    summaries = []
+    for team in teams:
+        total_budgeted = budgeted.get(team.id, 0.0)
+        total_expenses = expenses.get(team.id, 0.0)
+        total_revenue = revenue.get(team.id, 0.0)
+        summaries.append(TeamBudgetSummary(
+            team_id=team.id,
+            team_name=team.name,
+            total_budgeted=total_budgeted,
+            total_expenses=total_expenses,
+            total_revenue=total_revenue,
+            remaining_budget=total_budgeted - total_expenses,
+            profit_loss=total_revenue - total_expenses,
+            player_count=team.current_players,
+            registration_fees_collected=collected.get(team.id, 0.0),
+            registration_fees_expected=float(team.current_players * team.registration_fee)
+        ))
+    return summaries
+
+
+def team_summary(db: Session, team: Team) -> TeamBudgetSummary:
+    """Budget, expense, revenue and registration fee totals for a team"""
+    return team_summaries(db, [team])[0]
+
+
+def compute_summaries(keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Current summaries for season/team keys, on a session of its own; missing rows are left out"""
+    season_ids = [key[len("season:"):] for key in keys if key.startswith("season:")]
+    team_ids = [key[len("team:"):] for key in keys if key.startswith("team:")]
+    summaries = {}
+    db = SessionLocal()
+    try:
+        if season_ids:
+            for season in db.query(Season).filter(Season.id.in_(season_ids)):
+                summaries[season_key(season.id)] = season_summary(db, season).model_dump()
+        if team_ids:
+            teams = db.query(Team).filter(Team.id.in_(team_ids)).all()
+            for summary in team_summaries(db, teams):
+                summaries[team_key(summary.team_id)] = summary.model_dump()
+    finally:
+        db.close()
+    return summaries
+
+
+def _changed_keys(table: str, rows: List[Dict[str, Any]]) -> Set[str]:
+    keys = set()
+    for row in rows or [{}]:
+        row_keys = set()
+        if row.get("season_id"):
+            row_keys.add(season_key(row["season_id"]))
+        team_id = row.get("id") if table == "teams" else row.get("team_id")
+        if team_id:
+            row_keys.add(team_key(team_id))
+        if not row_keys:
+            return {EVERYTHING}
+        keys |= row_keys
+    return keys
+
+
+def _after_execute(conn, clauseelement, multiparams, params, execution_options, result):
+    table = getattr(clauseelement, "table", None)
+    if not getattr(clauseelement, "is_dml", False) or getattr(table, "name", None) not in WATCHED_TABLES:
+        return
+    if execution_options.get("rows_noted"):
+        return
+    rows = [row for row in (multiparams or [params]) if isinstance(row, dict)]
+    conn.info.setdefault("summary_changes", set()).update(_changed_keys(table.name, rows))
+
+
+def _commit(conn):
+    changes = conn.info.pop("summary_changes", set())
+    for table, row in conn.info.pop(WRITTEN_ROWS, ()):
+        if table in WATCHED_TABLES:
+            changes |= _changed_keys(table, [row])
+    if changes:
+        summary_hub.changed(changes, publish=True)
+
+
+def _rollback(conn):
+    conn.info.pop("summary_changes", None)
+    conn.info.pop(WRITTEN_ROWS, None)
+
+
+def watch_engine(engine: Engine):
+    """Feed ``summary_hub`` from writes committed on ``engine``"""
+    if not event.contains(engine, "after_execute", _after_execute):
+        event.listen(engine, "after_execute", _after_execute)
+        event.listen(engine, "commit", _commit)
+        event.listen(engine, "rollback", _rollback)
+        record_written_rows(engine)
+
+
+class Subscription:
+    """One client's queue of (event, data) pairs"""
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self.closed = False
+
+    def push(self, event_name: str, data: Dict[str, Any]) -> bool:
+        try:
+            self.queue.put_nowait((event_name, data))
+            return True
+        except asyncio.QueueFull:
+            self.closed = True
+            return False
+
+    def close(self):
+        """End the stream once the queued events are sent"""
+        if not self.closed:
+            self.closed = True
+            try:
+                self.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+
+class SummaryHub:
+    """Recomputes watched summaries after commits and fans deltas out to subscribers"""
+
+    def __init__(self):
+        self.deltas_sent = 0
+        self.recomputed = 0
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Set[str] = set()
+        self._unpublished: Set[str] = set()
+        # Changes arrive from whichever thread committed them
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start delivering changes; call from the event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                self.unsubscribe(subscription)
+
+    def changed(self, keys: Iterable[str], publish: bool = False):
+        """Mark summaries as changed (``publish``: also tell the other workers); any thread"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._lock:
+            self._dirty.update(keys)
+            if publish:
+                self._unpublished.update(keys)
+        loop.call_soon_threadsafe(self._wake.set)
+
+    async def subscribe(self, keys: List[str]) -> Subscription:
+        """A subscription to these keys, with each one's current summary queued"""
+        subscription = Subscription(keys)
+        for key in keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+        missing = [key for key in keys if key not in self._latest]
+        if missing:
+            computed = await run_in_threadpool(compute_summaries, missing)
+            for key, summary in computed.items():
+                # A refresh that ran meanwhile has the newer value
+                self._latest.setdefault(key, summary)
+        for key in keys:
+            if key in self._latest:
+                subscription.push("summary", self._latest[key])
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        for key in subscription.keys:
+            subscriptions = self._subscribers.get(key)
+            if subscriptions is None:
+                continue
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[key]
+                self._latest.pop(key, None)
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            # Let the rest of a burst commit and share one refresh
+            await asyncio.sleep(LIVE_SUMMARY_DELAY)
+            self._wake.clear()
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                unpublished, self._unpublished = self._unpublished, set()
+            try:
+                if unpublished:
+                    await run_in_threadpool(_publish, unpublished)
+                await self._refresh(dirty)
+            except Exception as e:
+                print(f"⚠️ Live summary refresh failed: {e}")
+
+    async def _refresh(self, dirty: Set[str]):
+        watched = set(self._subscribers)
+        keys = watched if EVERYTHING in dirty else dirty & watched
+        if not keys:
+            return
+        computed = await run_in_threadpool(compute_summaries, keys)
+        self.recomputed += len(keys)
+        for key, summary in computed.items():
+            previous = self._latest.get(key)
+            if key not in self._subscribers:
+                continue  # Everybody left while it was computed
+            self._latest[key] = summary
+            if previous is None:
+                continue
+            changes = {field: value for field, value in summary.items() if previous.get(field) != value}
+            if not changes:
+                continue
+            changes.update({field: summary[field] for field in ("season_id", "team_id") if field in summary})
+            for subscription in list(self._subscribers[key]):
+                if not subscription.push("delta", changes):
+                    self.unsubscribe(subscription)
+            self.deltas_sent += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watched_keys": len(self._subscribers),
+            "subscribers": len({s for subscriptions in self._subscribers.values() for s in subscriptions}),
+            "recomputed": self.recomputed,
+            "deltas_sent": self.deltas_sent,
+        }
+
+
+def _publish(keys: Set[str]):
+    from app.core.cache_sync import cache_sync
+    if not cache_sync.enabled:
+        return
+    if EVERYTHING in keys or len(keys) > MAX_PUBLISHED_KEYS:
+        keys = {EVERYTHING}
+    for key in keys:
+        cache_sync.publish("summaries", key)
+
+
+summary_hub = SummaryHub()
+
+# Changes committed by other workers
+on_invalidation("summaries", lambda key: summary_hub.changed([key]))
@@ -0,0 +1,85 @@
+"""
+Quick expense templates and their per-organization cache.
+
+The quick-expense screen reads an organization's templates - its own plus the
+shared ones that have no organization - every time it opens, so each
+organization's list is cached in ``template_cache``. Any insert, update or
+delete of a template publishes a ``templates`` invalidation for its
+organization (or for all of them, when a shared template changes); cache
+sync carries it to every other worker once the change commits.
+"""
+import os
+import string
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session
+from app.models import QuickExpenseTemplate
+from app.schemas import QuickExpenseTemplateResponse
+from app.core.cache import TTLCache, on_invalidation, publish_invalidation
+
+# Cache key of the shared templates, and invalidation key meaning "every organization"
+SHARED = "*"
+
+template_cache = TTLCache(
+    "expense_templates",
+    maxsize=int(os.getenv("TEMPLATE_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TEMPLATE_CACHE_TTL", "300"))
+)
+
+
+def invalidate_templates(organization_id: str):
+    """Forget the cached templates of an organization (SHARED: of all of them)"""
+    if organization_id == SHARED:
+        template_cache.invalidate()
+    else:
+        template_cache.pop(organization_id)
+
+
+on_invalidation("templates", invalidate_templates)
+
+
+@event.listens_for(QuickExpenseTemplate, "after_insert")
+@event.listens_for(QuickExpenseTemplate, "after_update")
+@event.listens_for(QuickExpenseTemplate, "after_delete")
+def _template_changed(mapper, connection, target):
+    # A template moved between organizations leaves both lists stale
+    history = inspect(target).attrs.organization_id.history
+    for organization_id in {target.organization_id, *history.deleted}:
+        publish_invalidation("templates", organization_id or SHARED, connection)
+
+
+def organization_templates(db: Session, organization_id: Optional[str]) -> List[QuickExpenseTemplateResponse]:
+    """An organization's templates plus the shared ones (only the shared ones for None)"""
+    key = organization_id or SHARED
+    templates = template_cache.get(key)
+    if templates is None:
+        query = db.query(QuickExpenseTemplate)
+        if organization_id:
+            query = query.filter(or_(
+                QuickExpenseTemplate.organization_id == organization_id,
+                QuickExpenseTemplate.organization_id.is_(None)
+            ))
+        else:
+            query = query.filter(QuickExpenseTemplate.organization_id.is_(None))
+        templates = [
+            QuickExpenseTemplateResponse.model_validate(template)
+            for template in query.order_by(QuickExpenseTemplate.name)
+        ]
+        template_cache.set(key, templates)
+    return templates
+
+
+class _Fields(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"  # Unknown placeholders are left as written
+
+
+def render_description(template: QuickExpenseTemplate, team_name: str, payment_date: date) -> str:
+    """Fill a template's description for one team; "<name> - <team>" without one"""
+    pattern = template.description_template or "{template} - {team}"
+    fields = _Fields(team=team_name, template=template.name, date=payment_date.isoformat())
+    try:
+        return string.Formatter().vformat(pattern, (), fields)
+    except (ValueError, IndexError, AttributeError):
+        return pattern  # Not a format string after all (e.g. a stray brace)
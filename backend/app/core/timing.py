@@ -0,0 +1,137 @@
+"""
+Per-request timing.
+
+``TimingMiddleware`` measures each request's wall time, and SQLAlchemy engine
+events add up the time and number of SQL statements it ran. The totals are
+returned in a ``Server-Timing`` header and written as one JSON log line per
+request. Requests that run more than QUERY_COUNT_THRESHOLD statements are
+flagged (and logged as warnings) - a request whose query count grows with the
+data is almost always an N+1 loop.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import metrics
+
+QUERY_COUNT_THRESHOLD = int(os.getenv("QUERY_COUNT_THRESHOLD", "25"))
+REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "true").lower() == "true"
+
+logger = logging.getLogger("app.requests")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class RequestStats:
+    """SQL statements and time spent in the database during one request"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats for the request being handled, or None outside a request"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _handle_error(context):
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine):
+    """Count statements run on ``engine`` towards the current request"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, falling back to the raw path"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
+
+
+class TimingMiddleware:
+    """ASGI middleware adding Server-Timing and a log line to every HTTP request"""
+
+    def __init__(self, app, threshold: int = QUERY_COUNT_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                header = (
+                    f'app;dur={elapsed_ms:.1f}, '
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            metrics.observe_request(
+                scope["method"], getattr(scope.get("route"), "path", None), status_code, elapsed
+            )
+            if REQUEST_LOG_ENABLED:
+                self._log(scope, status_code, stats, elapsed * 1000)
+
+    def _log(self, scope, status_code: int, stats: RequestStats, elapsed_ms: float):
+        flagged = stats.queries > self.threshold
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_template(scope),
+            "status": status_code,
+            "duration_ms": round(elapsed_ms, 2),
+            "db_ms": round(stats.db_seconds * 1000, 2),
+            "queries": stats.queries,
+        }
+        if flagged:
+            record["flagged"] = "query_count"
+        logger.log(logging.WARNING if flagged else logging.INFO, json.dumps(record))
@@ -0,0 +1,122 @@
+"""
+Write-behind batching for bursty quick actions.
+
+On tournament days many coaches post quick expenses and registration fees at
+the same moment. With WRITE_BEHIND_ENABLED=true those endpoints hand their
+validated record to an in-process queue instead of writing it themselves. A
+single flusher task wakes every few milliseconds, coalesces everything queued
+so far into one transaction per record kind (bulk reference checks plus
+multi-row INSERTs) and then resolves each request's future, so a request only
+returns once its row is committed.
+"""
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "5")) / 1000
+MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+
+# A handler writes a batch of records in the given session (without committing)
+# and returns one outcome per record: None on success, or the exception the
+# request should raise (e.g. an HTTPException 404 for a missing team).
+FlushHandler = Callable[[Session, List[Dict[str, Any]]], List[Optional[Exception]]]
+
+
+class WriteBehindQueue:
+    """Coalesces queued records into batched commits"""
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, max_batch: int = MAX_BATCH):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._handlers: Dict[str, FlushHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._loop = None
+
+    def register(self, kind: str, handler: FlushHandler):
+        self._handlers[kind] = handler
+
+    async def submit(self, kind: str, record: Dict[str, Any]):
+        """Queue a record and wait until the batch containing it is committed"""
+        self._ensure_flusher()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((kind, record, future))
+        return await future
+
+    async def close(self):
+        """Flush whatever is still queued and stop the flusher"""
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self._flush(pending)
+        self._flusher = None
+        self._queue = None
+        self._loop = None
+
+    def _ensure_flusher(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use on this event loop (the queue is loop-bound)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._flusher = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            pending = [await self._queue.get()]
+            # Give the rest of the burst a moment to arrive
+            await asyncio.sleep(self.flush_interval)
+            while len(pending) < self.max_batch and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            await self._flush(pending)
+
+    async def _flush(self, pending: List[Tuple[str, Dict[str, Any], asyncio.Future]]):
+        by_kind: Dict[str, list] = {}
+        for kind, record, future in pending:
+            by_kind.setdefault(kind, []).append((record, future))
+
+        for kind, items in by_kind.items():
+            records = [record for record, _ in items]
+            try:
+                outcomes = await run_in_threadpool(self._write, kind, records)
+            except Exception as e:
+                outcomes = [e] * len(records)
+            for (_, future), outcome in zip(items, outcomes):
+                if future.done():
+                    continue  # The request went away
+                if outcome is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(outcome)
+
+    def _write(self, kind: str, records: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        handler = self._handlers[kind]
+        db = SessionLocal()
+        try:
+            outcomes = handler(db, records)
+            db.commit()
+            return outcomes
+        except Exception as e:
+            db.rollback()
+            if len(records) == 1:
+                return [e]
+        finally:
+            db.close()
+        # One bad record failed the whole batch - retry individually so only
+        # that request sees the error
+        return [self._write(kind, [record])[0] for record in records]
+
+
+write_behind = WriteBehindQueue()
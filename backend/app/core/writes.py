@@ -0,0 +1,303 @@
+"""
+Single-round-trip write helpers.
+
+Create endpoints used to SELECT each referenced row, INSERT, COMMIT and then
+refresh the new row - five round trips for one expense. These helpers fold the
+reference checks into the INSERT itself (``INSERT ... SELECT ... WHERE EXISTS``)
+and read the new row back with ``RETURNING``, so the happy path is a single
+statement. Only when nothing was inserted do we look up which reference was
+missing, to keep the same 404 responses the endpoints always returned.
+
+Statements run here carry the ``rows_noted`` execution option and record the
+ids of the rows they wrote under ``conn.info[WRITTEN_ROWS]`` (``note_written``),
+since an INSERT ... SELECT or multi-row INSERT has no per-row parameters for
+engine listeners such as the live summaries to read.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import case, exists, func, insert, literal, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ClauseElement
+from app.models import Team, generate_uuid
+from app.schemas import BatchCreateResponse, BatchItemResult
+
+# Rows per multi-row INSERT (and ids per IN list) for batch writes
+BATCH_SIZE = 500
+
+# (model, id value, 404 detail) - checked in order when an insert is rejected
+Reference = Tuple[Any, Optional[str], str]
+
+# conn.info entry listing (table name, ids) of each row written by a noted statement
+WRITTEN_ROWS = "written_rows"
+# Execution options marking a statement whose rows are recorded by note_written
+NOTED = {"rows_noted": True}
+# Columns recorded per written row
+_NOTED_COLUMNS = ("id", "season_id", "team_id")
+# Engines with a listener that consumes WRITTEN_ROWS on commit and rollback
+_recording_engines: Set[Engine] = set()
+
+
+def record_written_rows(engine: Engine):
+    """Have ``note_written`` record rows written on ``engine``"""
+    _recording_engines.add(engine)
+
+
+def note_written(db: Session, table, rows: Iterable[Any]):
+    """Record the ids of rows written to ``table`` on the session's connection.
+
+    ``rows`` are dicts or result rows; values that are SQL expressions are
+    left out. Listeners read the list at commit and drop it on rollback;
+    without one (``record_written_rows``) nothing is recorded.
+    """
+    conn = db.connection()
+    if conn.engine not in _recording_engines:
+        return
+    written = conn.info.setdefault(WRITTEN_ROWS, [])
+    for row in rows:
+        row = getattr(row, "_mapping", row)
+        written.append((table.name, {
+            column: row[column] for column in _NOTED_COLUMNS
+            if column in row and not isinstance(row[column], ClauseElement)
+        }))
+
+
+def row_exists(model, row_id: str):
+    """EXISTS clause for a row of ``model`` with the given primary key"""
+    return exists().where(model.id == row_id)
+
+
+def _as_column(table, name: str, value: Any):
+    if isinstance(value, ClauseElement) or hasattr(value, "__clause_element__"):
+        return value.label(name)
+    return literal(value, type_=table.c[name].type).label(name)
+
+
+def _first_missing(db: Session, references: Sequence[Reference]) -> Optional[str]:
+    for model, row_id, detail in references:
+        if row_id is None:
+            continue
+        if not db.query(row_exists(model, row_id)).scalar():
+            return detail
+    return None
+
+
+def raise_missing_reference(db: Session, references: Sequence[Reference]):
+    """Raise the 404 for the first reference that does not exist.
+
+    References with a ``None`` id are not checked. If every reference checks
+    out the last one is reported, which lets callers list a reference that is
+    only reachable through another (e.g. a team's season) last.
+    """
+    detail = _first_missing(db, references)
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=detail or (references[-1][2] if references else "Not found")
+    )
+
+
+def _unknown_foreign_keys(db: Session, table, values: Dict[str, Any]) -> List[str]:
+    """Foreign key columns of ``values`` whose value names no row"""
+    unknown = []
+    for foreign_key in table.foreign_keys:
+        value = values.get(foreign_key.parent.name)
+        if value is None or isinstance(value, ClauseElement) or hasattr(value, "__clause_element__"):
+            continue
+        if not db.execute(select(exists().where(foreign_key.column == value))).scalar():
+            unknown.append(foreign_key.parent.name)
+    return unknown
+
+
+# SQLSTATE (Postgres) and message prefix (SQLite) of each integrity violation
+_VIOLATIONS = {
+    "foreign_key": ("23503", "FOREIGN KEY constraint failed"),
+    "unique": ("23505", "UNIQUE constraint failed"),
+    "not_null": ("23502", "NOT NULL constraint failed"),
+    "check": ("23514", "CHECK constraint failed"),
+}
+
+
+def integrity_violation(error: IntegrityError) -> Optional[str]:
+    """Which constraint an IntegrityError broke ("foreign_key", "unique", ...), if recognisable"""
+    code = getattr(error.orig, "pgcode", None)
+    message = str(error.orig)
+    for kind, (sqlstate, prefix) in _VIOLATIONS.items():
+        if code == sqlstate or message.startswith(prefix):
+            return kind
+    return None
+
+
+def raise_integrity_error(
+    db: Session,
+    error: IntegrityError,
+    references: Sequence[Reference],
+    table,
+    values: Dict[str, Any],
+):
+    """Answer a rejected write of ``values`` to ``table``.
+
+    A missing row from ``references`` answers its 404. Any other broken
+    foreign key (one the caller does not list, e.g. ``created_by``) answers
+    422 naming the column, a duplicate 409, and anything else 422.
+    """
+    kind = integrity_violation(error)
+    if kind == "foreign_key":
+        detail = _first_missing(db, references)
+        if detail:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+        unknown = _unknown_foreign_keys(db, table, values)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown reference: {', '.join(unknown)}" if unknown else "Unknown reference"
+        )
+    if kind == "unique":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A row with these values already exists"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Invalid values: a required field is missing or out of range"
+    )
+
+
+def insert_returning(
+    db: Session,
+    model,
+    values: Dict[str, Any],
+    where: Iterable[ClauseElement] = (),
+    references: Sequence[Reference] = (),
+    commit: bool = True,
+):
+    """Insert one row guarded by ``where`` and return it via RETURNING.
+
+    ``values`` maps column names to Python values or SQL expressions (which may
+    reference other tables, e.g. ``Team.season_id``). ``where`` holds the
+    conditions that must hold for the row to be written - normally
+    ``row_exists`` clauses for the foreign keys. When the guard rejects the row,
+    or the database raises an integrity error on a foreign key, the transaction
+    is rolled back and the matching 404 from ``references`` is raised; other
+    integrity errors answer 409 (unique) or 422 (see ``raise_integrity_error``).
+    """
+    table = model.__table__
+    source = select(*[_as_column(table, name, value) for name, value in values.items()])
+    for clause in where:
+        source = source.where(clause)
+
+    stmt = insert(table).from_select(list(values), source).returning(*table.c)
+    try:
+        row = db.execute(stmt.execution_options(**NOTED)).first()
+    except IntegrityError as e:
+        db.rollback()
+        raise_integrity_error(db, e, references, table, values)
+
+    if row is None:
+        db.rollback()
+        raise_missing_reference(db, references)
+
+    note_written(db, table, [row])
+    if commit:
+        db.commit()
+    return row
+
+
+def existing_ids(db: Session, model, ids: Iterable[str]) -> Set[str]:
+    """Return the subset of ``ids`` that exist in ``model``'s table"""
+    ids = list(set(ids))
+    found = set()
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start:start + BATCH_SIZE]
+        found.update(row_id for (row_id,) in db.query(model.id).filter(model.id.in_(chunk)))
+    return found
+
+
+def insert_batch(
+    db: Session,
+    model,
+    rows: List[Dict[str, Any]],
+    references: Dict[str, Tuple[Any, str]],
+    commit: bool = True,
+) -> BatchCreateResponse:
+    """Validate and insert many rows in one transaction.
+
+    ``references`` maps a foreign key column to ``(model, 404 detail)``. All
+    referenced ids are checked with one IN query per column; rows pointing at
+    a missing row are reported and skipped, the rest are written with
+    multi-row INSERTs and committed together. Ids are assigned up front
+    (unless the row already carries one) so each result can name the row it
+    created.
+    """
+    known = {
+        column: existing_ids(db, ref_model, (row[column] for row in rows if row.get(column) is not None))
+        for column, (ref_model, _) in references.items()
+    }
+
+    results = []
+    valid = []
+    for index, row in enumerate(rows):
+        error = next(
+            (
+                detail for column, (_, detail) in references.items()
+                if row.get(column) is not None and row[column] not in known[column]
+            ),
+            None
+        )
+        if error:
+            results.append(BatchItemResult(index=index, error=error))
+            continue
+        row = dict(row, id=row.get("id") or generate_uuid())
+        valid.append(row)
+        results.append(BatchItemResult(index=index, id=row["id"]))
+
+    for start in range(0, len(valid), BATCH_SIZE):
+        db.execute(insert(model).values(valid[start:start + BATCH_SIZE]).execution_options(**NOTED))
+    note_written(db, model.__table__, valid)
+    if commit:
+        db.commit()
+
+    return BatchCreateResponse(
+        created=len(valid),
+        failed=len(rows) - len(valid),
+        results=results
+    )
+
+
+def adjust_team_rosters(db: Session, changes: Dict[str, int]):
+    """Move ``Team.current_players`` by the players added to (or removed from) each roster.
+
+    ``changes`` maps team ids to a player delta. The count is the team's
+    registered player count, which registration fees and
+    ``/teams/{id}/player-count`` also set, so roster writes add their delta
+    rather than recounting (removals stop at zero). One UPDATE per distinct
+    delta and chunk of teams, run in the caller's transaction. Additions that
+    would take a team above ``max_players`` roll the transaction back with
+    a 400.
+    """
+    by_delta: Dict[int, List[str]] = {}
+    for team_id, delta in changes.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(team_id)
+
+    new_count = func.coalesce(Team.current_players, 0)
+    for delta, team_ids in by_delta.items():
+        for start in range(0, len(team_ids), BATCH_SIZE):
+            chunk = team_ids[start:start + BATCH_SIZE]
+            stmt = (
+                update(Team)
+                .where(Team.id.in_(chunk))
+                .values(current_players=case((new_count + delta < 0, 0), else_=new_count + delta), version=Team.version + 1)
+                .returning(Team.id)
+                .execution_options(**NOTED)
+            )
+            if delta > 0:
+                stmt = stmt.where(or_(Team.max_players.is_(None), new_count + delta <= Team.max_players))
+            updated = {team_id for (team_id,) in db.execute(stmt)}
+            note_written(db, Team.__table__, [{"id": team_id} for team_id in updated])
+            if len(updated) < len(chunk):
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Player count cannot go above max_players for team(s): "
+                    + ", ".join(sorted(set(chunk) - updated))
+                )
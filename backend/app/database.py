@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.core.slow_queries import SLOW_QUERY_LOG_ENABLED, slow_query_log  # noqa: E402 - reads env after load_dotenv
+
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "sqlite:///./youth_sports_budget.db"
@@ -18,6 +20,15 @@ if DATABASE_URL.startswith("sqlite"):
 else:
     engine = create_engine(DATABASE_URL)
 
+if SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.install(engine)
+
+# Optional Postgres layout: list-partition expenses/revenues by season_id
+PARTITION_BY_SEASON = (
+    engine.dialect.name == "postgresql"
+    and os.getenv("PARTITION_BY_SEASON", "false").lower() == "true"
+)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -10,15 +10,12 @@ backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from app.database import engine, Base
-from app.models import (
-    User, Organization, Season, Team, Budget, Expense, Revenue, Player, QuickExpenseTemplate
-)
+from app.startup import init_db
 
 if __name__ == "__main__":
     print("Creating database tables...")
     try:
-        Base.metadata.create_all(bind=engine)
+        init_db(force=True)
         print("✅ Database tables created successfully!")
         print("\nYou can now start the server with:")
         print("  uvicorn app.main:app --reload")
@@ -1,6 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import auth, budgets, expenses, revenues, seasons, teams, organizations, quick_actions, transparency, imports
+from app.core.rate_limit import RateLimitMiddleware, limiter
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.timing import TimingMiddleware, instrument_engine
+from app.core.metrics import metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.summaries import summary_hub, watch_engine
+from app.database import engine
+from app.api.v1 import auth, budgets, expenses, revenues, seasons, teams, organizations, quick_actions, templates, transparency, imports, players, admin, dashboard
 
 app = FastAPI(
     title="Youth Sports Budget API",
@@ -8,6 +15,14 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Store and replay POST responses for requests sent with an Idempotency-Key
+# (inside CORS, so replays get CORS headers for the retrying browser)
+app.add_middleware(IdempotencyMiddleware)
+
+# Token-bucket rate limiting and load shedding for expensive routes (inside
+# CORS, so browsers can read a 429's Retry-After)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 # Allow all origins in production (you can restrict this later)
 import os
@@ -25,6 +40,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in cProfile / stack-sampling of single requests (needs PROFILE_TOKEN)
+app.add_middleware(ProfilingMiddleware)
+
+# Wall time, DB time and SQL count per request (outermost, so it sees everything)
+instrument_engine(engine)
+app.add_middleware(TimingMiddleware)
+
+# Push summary changes to /budgets/summary/stream subscribers as writes commit
+watch_engine(engine)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(organizations.router, prefix="/api/v1/organizations", tags=["Organizations"])
@@ -33,21 +58,49 @@ app.include_router(teams.router, prefix="/api/v1/teams", tags=["Teams"])
 app.include_router(budgets.router, prefix="/api/v1/budgets", tags=["Budgets"])
 app.include_router(expenses.router, prefix="/api/v1/expenses", tags=["Expenses"])
 app.include_router(revenues.router, prefix="/api/v1/revenues", tags=["Revenues"])
+app.include_router(players.router, prefix="/api/v1/players", tags=["Players"])
 app.include_router(quick_actions.router, prefix="/api/v1/quick", tags=["Quick Actions"])
+app.include_router(templates.router, prefix="/api/v1/templates", tags=["Quick Expense Templates"])
 app.include_router(transparency.router, prefix="/api/v1/transparency", tags=["Financial Transparency"])
 app.include_router(imports.router, prefix="/api/v1/import", tags=["Data Import"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on application startup"""
     try:
-        from app.database import engine, Base
-        from app.models import *
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database initialized")
+        from app.startup import init_db
+        if init_db():
+            print("✅ Database initialized")
+        else:
+            print("✅ Database schema up to date")
     except Exception as e:
         print(f"⚠️ Database initialization note: {e}")
+    metrics.start_loop_lag_monitor()
+    from app.core.cache_sync import cache_sync
+    cache_sync.start()
+    summary_hub.start()
+    from app.core.jobs import register_jobs
+    from app.core.scheduler import scheduler
+    register_jobs(scheduler)
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Commit any write-behind records, finish queued expense checks and end summary streams"""
+    from app.core.scheduler import scheduler
+    await scheduler.stop()
+    from app.core.write_behind import write_behind
+    await write_behind.close()
+    from app.core.anomalies import expense_checks
+    await expense_checks.close()
+    await summary_hub.stop()
+    await metrics.stop_loop_lag_monitor()
+    from app.core.cache_sync import cache_sync
+    cache_sync.stop()
 
 
 @app.get("/")
@@ -62,3 +115,22 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "healthy"}
+
+
+@app.get("/limits")
+def limits():
+    """Rate limiter and load shedding counters"""
+    return limiter.stats()
+
+
+@app.get("/workers")
+def workers():
+    """This worker's process id, cache sync and live summary counters"""
+    from app.core.cache_sync import cache_sync
+    return {"pid": os.getpid(), "cache_sync": cache_sync.stats(), "live_summaries": summary_hub.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus metrics in text exposition format"""
+    return Response(metrics.render(engine), media_type="text/plain; version=0.0.4")
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, Date, Enum as SQLEnum, JSON
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, Date, Enum as SQLEnum, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, PARTITION_BY_SEASON
 import uuid
 import enum
 
@@ -10,6 +10,13 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+def season_partitioned():
+    """Table args for ledger tables that are list-partitioned by season on Postgres"""
+    if PARTITION_BY_SEASON:
+        return {"postgresql_partition_by": "LIST (season_id)"}
+    return {}
+
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     COACH = "coach"
@@ -101,6 +108,7 @@ class Season(Base):
     organization = relationship("Organization", back_populates="seasons")
     teams = relationship("Team", back_populates="season", cascade="all, delete-orphan")
     budgets = relationship("Budget", back_populates="season", cascade="all, delete-orphan")
+    archive = relationship("SeasonArchive", uselist=False, cascade="all, delete-orphan")
 
 
 class Team(Base):
@@ -116,6 +124,7 @@ class Team(Base):
     max_players = Column(Integer, default=20)
     current_players = Column(Integer, default=0)
     registration_fee = Column(Float, default=0.0)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped by every update
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -136,6 +145,7 @@ class Budget(Base):
     category = Column(String, nullable=False)  # Expense category or "total"
     budgeted_amount = Column(Float, nullable=False, default=0.0)
     notes = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped by every update
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -146,9 +156,11 @@ class Budget(Base):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = season_partitioned()
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    season_id = Column(String, ForeignKey("seasons.id"), nullable=False)
+    # Part of the primary key when partitioned - Postgres requires it
+    season_id = Column(String, ForeignKey("seasons.id"), nullable=False, primary_key=PARTITION_BY_SEASON)
     team_id = Column(String, ForeignKey("teams.id"), nullable=True)  # Null for season-wide expenses
     category = Column(SQLEnum(ExpenseCategory), nullable=False)
     description = Column(String, nullable=False)
@@ -168,9 +180,11 @@ class Expense(Base):
 
 class Revenue(Base):
     __tablename__ = "revenues"
+    __table_args__ = season_partitioned()
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    season_id = Column(String, ForeignKey("seasons.id"), nullable=False)
+    # Part of the primary key when partitioned - Postgres requires it
+    season_id = Column(String, ForeignKey("seasons.id"), nullable=False, primary_key=PARTITION_BY_SEASON)
     team_id = Column(String, ForeignKey("teams.id"), nullable=True)  # Null for season-wide revenue
     category = Column(SQLEnum(RevenueCategory), nullable=False)
     description = Column(String, nullable=False)
@@ -191,7 +205,7 @@ class Player(Base):
     __tablename__ = "players"
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    team_id = Column(String, ForeignKey("teams.id"), nullable=False)
+    team_id = Column(String, ForeignKey("teams.id"), nullable=False, index=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     date_of_birth = Column(Date, nullable=True)
@@ -223,3 +237,102 @@ class QuickExpenseTemplate(Base):
 
     # Relationships
     organization = relationship("Organization")
+
+
+class SeasonArchive(Base):
+    __tablename__ = "season_archives"
+
+    season_id = Column(String, ForeignKey("seasons.id"), primary_key=True)
+    rollup = Column(JSON, nullable=False)  # Final transparency report for the season
+    row_counts = Column(JSON, nullable=False)  # Archived rows per table
+    payload = Column(LargeBinary, nullable=False)  # zlib-compressed JSON of the archived rows
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SchemaMeta(Base):
+    __tablename__ = "schema_meta"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+
+
+class CacheInvalidation(Base):
+    # Cross-worker cache invalidation log, polled by SQLite cache sync
+    __tablename__ = "cache_invalidations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    topic = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+
+
+class ReportSnapshot(Base):
+    # Season transparency report prebuilt by the scheduler
+    __tablename__ = "report_snapshots"
+
+    season_id = Column(String, ForeignKey("seasons.id"), primary_key=True)
+    report = Column(JSON, nullable=False)
+    built_at = Column(DateTime, nullable=False)  # UTC
+
+
+class ScheduledJob(Base):
+    # Run lease and last outcome of a scheduler job, shared by all workers
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    locked_by = Column(String)
+    locked_until = Column(DateTime)  # UTC
+    last_started_at = Column(DateTime)  # UTC
+    last_finished_at = Column(DateTime)  # UTC
+    last_status = Column(String)
+    last_duration_ms = Column(Float)
+    last_result = Column(JSON)
+    last_error = Column(Text)
+
+
+class IdempotencyKey(Base):
+    # First response to a request sent with an Idempotency-Key header
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # Hash of the header value, route and caller
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer)  # Null while the first request is in flight
+    headers = Column(JSON)
+    body = Column(LargeBinary)
+    expires_at = Column(DateTime, nullable=False)  # UTC
+
+
+class ExpenseFingerprint(Base):
+    # Hashed duplicate-detection buckets of one expense (see app/core/anomalies.py)
+    __tablename__ = "expense_fingerprints"
+
+    expense_id = Column(String, primary_key=True)
+    season_id = Column(String, ForeignKey("seasons.id"), nullable=False, index=True)
+    exact_key = Column(String, nullable=False, index=True)  # Vendor, amount, date and receipt
+    amount_key = Column(String, nullable=False, index=True)  # Vendor and amount
+    receipt_key = Column(String, nullable=True, index=True)  # Vendor and receipt number
+    payment_date = Column(Date, nullable=False)
+
+
+class ExpenseCategoryStats(Base):
+    # Running sums of log10(amount) per season and category, for z-scores
+    __tablename__ = "expense_category_stats"
+
+    season_id = Column(String, ForeignKey("seasons.id"), primary_key=True)
+    category = Column(SQLEnum(ExpenseCategory), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+    total_sq = Column(Float, nullable=False, default=0.0)
+
+
+class ExpenseAnomaly(Base):
+    # A suspected duplicate or outlier found by the expense anomaly detector
+    __tablename__ = "expense_anomalies"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    season_id = Column(String, ForeignKey("seasons.id"), nullable=False, index=True)
+    expense_id = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # exact_duplicate, near_duplicate, receipt_reused, amount_outlier
+    related_expense_id = Column(String, nullable=True)  # The earlier expense it duplicates
+    score = Column(Float, nullable=True)  # z-score of an outlier
+    detail = Column(String, nullable=False)
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
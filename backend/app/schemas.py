@@ -1,11 +1,23 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, field_validator, model_validator
+from typing import ClassVar, Optional, List, Tuple
 from datetime import date, datetime
 from app.models import (
     UserRole, SeasonType, ExpenseCategory, RevenueCategory
 )
 
 
+class PartialUpdate(BaseModel):
+    """PATCH body: omitted fields are left alone, and NOT_NULL fields cannot be sent as null"""
+    NOT_NULL: ClassVar[Tuple[str, ...]] = ()
+
+    @model_validator(mode="after")
+    def _reject_nulls(self):
+        nulls = [name for name in self.NOT_NULL if name in self.model_fields_set and getattr(self, name) is None]
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+
 # Organization schemas
 class OrganizationBase(BaseModel):
     name: str
@@ -95,15 +107,35 @@ class TeamCreate(TeamBase):
     coach_id: Optional[str] = None
 
 
+class TeamUpdate(PartialUpdate):
+    NOT_NULL = ("name", "age_group", "sport", "max_players", "registration_fee")
+
+    name: Optional[str] = None
+    age_group: Optional[str] = None
+    sport: Optional[str] = None
+    gender: Optional[str] = None
+    coach_id: Optional[str] = None
+    max_players: Optional[int] = None
+    registration_fee: Optional[float] = None
+    version: Optional[int] = None  # Version the edit was based on; omit to apply to the latest
+
+
 class TeamResponse(TeamBase):
     id: str
     season_id: str
     coach_id: Optional[str] = None
     current_players: int
+    version: int
     created_at: datetime
 
     model_config = {"from_attributes": True}
 
+    @field_validator("current_players", mode="before")
+    @classmethod
+    def _null_count_is_zero(cls, value):
+        # The column is nullable; a team with no count has no players
+        return value or 0
+
 
 # Budget schemas
 class BudgetBase(BaseModel):
@@ -117,10 +149,20 @@ class BudgetCreate(BudgetBase):
     team_id: Optional[str] = None
 
 
+class BudgetUpdate(PartialUpdate):
+    NOT_NULL = ("category", "budgeted_amount")
+
+    category: Optional[str] = None
+    budgeted_amount: Optional[float] = None
+    notes: Optional[str] = None
+    version: Optional[int] = None  # Version the edit was based on; omit to apply to the latest
+
+
 class BudgetResponse(BudgetBase):
     id: str
     season_id: str
     team_id: Optional[str] = None
+    version: int
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -153,6 +195,25 @@ class ExpenseResponse(ExpenseBase):
     model_config = {"from_attributes": True}
 
 
+class ExpenseAnomalyResponse(BaseModel):
+    id: int
+    season_id: str
+    expense_id: str
+    kind: str  # exact_duplicate, near_duplicate, receipt_reused, amount_outlier
+    related_expense_id: Optional[str] = None
+    score: Optional[float] = None
+    detail: str
+    detected_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ExpenseScanResponse(BaseModel):
+    season_id: str
+    expenses: int  # Expenses scanned
+    anomalies: dict  # Findings per kind
+
+
 # Revenue schemas
 class RevenueBase(BaseModel):
     category: RevenueCategory
@@ -205,6 +266,24 @@ class PlayerResponse(PlayerBase):
     model_config = {"from_attributes": True}
 
 
+class PlayerPage(BaseModel):
+    items: List[PlayerResponse]
+    next_cursor: Optional[str] = None  # Pass as `after` to fetch the next page
+
+
+# Batch create schemas
+class BatchItemResult(BaseModel):
+    index: int  # Position of the item in the request array
+    id: Optional[str] = None  # Id of the created row
+    error: Optional[str] = None  # Why the item was rejected
+
+
+class BatchCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchItemResult]
+
+
 # Dashboard/Summary schemas
 class BudgetSummary(BaseModel):
     season_id: str
@@ -233,6 +312,54 @@ class BulkRegistrationFeeEntry(BaseModel):
     notes: Optional[str] = None
 
 
+class QuickExpenseTemplateBase(BaseModel):
+    name: str
+    category: ExpenseCategory
+    default_amount: Optional[float] = None
+    description_template: Optional[str] = None  # May use {team}, {template} and {date}
+    is_common: bool = True
+
+
+class QuickExpenseTemplateCreate(QuickExpenseTemplateBase):
+    organization_id: Optional[str] = None  # None for a template every organization sees
+
+
+class QuickExpenseTemplateUpdate(PartialUpdate):
+    NOT_NULL = ("name", "category", "is_common")
+
+    name: Optional[str] = None
+    category: Optional[ExpenseCategory] = None
+    default_amount: Optional[float] = None
+    description_template: Optional[str] = None
+    is_common: Optional[bool] = None
+
+
+class QuickExpenseTemplateResponse(QuickExpenseTemplateBase):
+    id: str
+    organization_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class TemplateApplyEntry(BaseModel):
+    season_id: str
+    team_ids: List[str]
+    payment_date: date
+    amount: Optional[float] = None  # Defaults to the template's default_amount
+    description: Optional[str] = None  # Defaults to the template's description_template
+    vendor: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class CountAdjustment(BaseModel):
+    delta: int  # Negative to decrease
+
+
+class AmountAdjustment(BaseModel):
+    delta: float  # Negative to decrease
+
+
 # Financial Transparency schemas
 class PlayerCostBreakdown(BaseModel):
     team_id: str
@@ -269,3 +396,13 @@ class TeamBudgetSummary(BaseModel):
     player_count: int
     registration_fees_collected: float
     registration_fees_expected: float
+
+
+class DashboardResponse(BaseModel):
+    season: SeasonResponse
+    summary: BudgetSummary
+    teams: List[TeamBudgetSummary]
+    expenses_by_category: dict
+    revenues_by_category: dict
+    recent_expenses: List[ExpenseResponse]
+    recent_revenues: List[RevenueResponse]
@@ -1,18 +1,98 @@
 """
-Startup script to initialize database on first run
+Schema bootstrap, run once per process start.
+
+``create_all`` reflects every table, which is slow on a remote database, so
+it only runs when the schema fingerprint stored in ``schema_meta`` differs
+from the one computed from the models - i.e. on a fresh database or after a
+model change. Otherwise boot costs a single SELECT. Since ``create_all``
+never alters existing tables, columns added to a model since are added with
+``ALTER TABLE`` (they need a server default or must be nullable).
 """
-from app.database import engine, Base
+import hashlib
+import time
+from sqlalchemy import inspect, select, text
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.database import engine, Base, SessionLocal, PARTITION_BY_SEASON
 from app.models import (
-    User, Organization, Season, Team, Budget, Expense, Revenue, Player, QuickExpenseTemplate
+    User, Organization, Season, Team, Budget, Expense, Revenue, Player, QuickExpenseTemplate, SeasonArchive, SchemaMeta,
+    CacheInvalidation, ReportSnapshot, ScheduledJob, IdempotencyKey, ExpenseFingerprint, ExpenseCategoryStats,
+    ExpenseAnomaly
 )
 
-def init_db():
-    """Initialize database tables"""
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table, column and index the models define"""
+    parts = [f"partitioned={PARTITION_BY_SEASON}"]
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        columns = ",".join(
+            f"{c.name}:{c.type}:{c.primary_key}:{c.nullable}" for c in table.columns
+        )
+        indexes = ",".join(sorted(i.name for i in table.indexes))
+        parts.append(f"{table.name}({columns})[{indexes}]")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _stored_fingerprint():
     try:
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database initialized")
-    except Exception as e:
-        print(f"⚠️ Database init warning: {e}")
+        with engine.connect() as conn:
+            return conn.execute(
+                select(SchemaMeta.value).where(SchemaMeta.key == SCHEMA_VERSION_KEY)
+            ).scalar()
+    except SQLAlchemyError:
+        return None  # No schema_meta table yet
+
 
-# Auto-initialize on import
-init_db()
+def _add_missing_columns():
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                print(f"✅ Added column {table.name}.{column.name}")
+            except SQLAlchemyError:
+                # Fine if another worker added it first
+                if column.name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                    raise
+
+
+def init_db(force: bool = False) -> bool:
+    """Create missing tables if the schema changed; returns True if it ran"""
+    fingerprint = schema_fingerprint()
+    if not force and _stored_fingerprint() == fingerprint:
+        return False
+
+    # Workers booting together race to create the same tables; a retry
+    # sees the other worker's tables and skips them
+    for attempt in range(3):
+        try:
+            Base.metadata.create_all(bind=engine)
+            break
+        except SQLAlchemyError:
+            if attempt == 2:
+                raise
+            time.sleep(0.5)
+    _add_missing_columns()
+
+    db = SessionLocal()
+    try:
+        if PARTITION_BY_SEASON:
+            from app.core.partitioning import ensure_default_partitions, ensure_season_partitions
+            ensure_default_partitions(db)
+            ensure_season_partitions(db, [s.id for s in db.query(Season.id)])
+        db.merge(SchemaMeta(key=SCHEMA_VERSION_KEY, value=fingerprint))
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # Another worker stored the fingerprint first
+    finally:
+        db.close()
+    return True
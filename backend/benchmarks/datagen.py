@@ -0,0 +1,261 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+``generate(db, scale, seed)`` fills an empty database with organizations,
+seasons, teams, players, budgets, expenses and revenues. The same scale and
+seed always produce the same rows, ids included, so results are comparable
+across commits. ``import_csv`` builds CSV uploads for the importers the
+same way.
+
+Scales are per parent: ``large`` is 10 organizations x 20 seasons x 200
+teams, with 50k expenses per season.
+"""
+import csv
+import io
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.database import PARTITION_BY_SEASON
+from app.models import (
+    Organization, Season, Team, Player, Budget, Expense, Revenue, User,
+    ExpenseCategory, RevenueCategory, SeasonType, UserRole
+)
+from app.core.partitioning import ensure_season_partitions
+from app.core.writes import BATCH_SIZE
+
+AGE_GROUPS = ["U8", "U10", "U12", "U14", "U16"]
+SPORTS = ["Soccer", "Basketball", "Baseball", "Volleyball"]
+GENDERS = ["boys", "girls", "coed"]
+FIRST_NAMES = ["Ava", "Liam", "Mia", "Noah", "Zoe", "Eli", "Ivy", "Leo", "Ada", "Max", "Ruby", "Sam"]
+LAST_NAMES = ["Garcia", "Smith", "Nguyen", "Patel", "Kim", "Lopez", "Brown", "Okafor", "Rossi", "Cohen"]
+VENDORS = ["Field Co", "Ref Association", "Uniform Depot", "Sports Mart", "City Parks", "Trophy Shop"]
+
+# Rows the benchmark suite picks its targets from, per kind
+SAMPLE_SIZE = 100
+
+
+@dataclass
+class Scale:
+    organizations: int
+    seasons: int  # per organization
+    teams: int  # per season
+    players: int  # per team
+    expenses: int  # per season
+    revenues: int  # per season
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        seasons = self.organizations * self.seasons
+        teams = seasons * self.teams
+        return {
+            "organizations": self.organizations,
+            "seasons": seasons,
+            "teams": teams,
+            "players": teams * self.players,
+            "budgets": teams * 3 + seasons,
+            "expenses": seasons * self.expenses,
+            "revenues": seasons * self.revenues,
+        }
+
+
+SCALES = {
+    "tiny": Scale(organizations=1, seasons=2, teams=10, players=12, expenses=1000, revenues=100),
+    "small": Scale(organizations=2, seasons=4, teams=40, players=15, expenses=5000, revenues=400),
+    "medium": Scale(organizations=5, seasons=10, teams=100, players=15, expenses=20000, revenues=1500),
+    "large": Scale(organizations=10, seasons=20, teams=200, players=15, expenses=50000, revenues=4000),
+}
+
+
+@dataclass
+class Dataset:
+    """Ids of generated rows (every org/season/team, a sample of the rest)"""
+    organization_ids: List[str] = field(default_factory=list)
+    season_ids: List[str] = field(default_factory=list)
+    active_season_ids: List[str] = field(default_factory=list)
+    team_ids: List[str] = field(default_factory=list)
+    teams_by_season: Dict[str, List[str]] = field(default_factory=dict)
+    player_ids: List[str] = field(default_factory=list)
+    expense_ids: List[str] = field(default_factory=list)
+    revenue_ids: List[str] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _day(rng: random.Random, start: date, days: int) -> date:
+    return start + timedelta(days=rng.randrange(days))
+
+
+def _insert(db: Session, model, rows: List[dict]):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(model).values(rows[start:start + BATCH_SIZE]))
+
+
+def _season_rows(rng, season_id, start, team_ids, scale: Scale, dataset: Dataset):
+    expense_categories = list(ExpenseCategory)
+    revenue_categories = list(RevenueCategory)
+
+    expenses = []
+    for _ in range(scale.expenses):
+        expense_id = _uuid(rng)
+        expenses.append(dict(
+            id=expense_id, season_id=season_id,
+            team_id=rng.choice(team_ids) if rng.random() < 0.9 else None,
+            category=rng.choice(expense_categories),
+            description=f"Expense {rng.randrange(100000)}",
+            amount=round(rng.uniform(5, 800), 2),
+            vendor=rng.choice(VENDORS),
+            payment_date=_day(rng, start, 90),
+            created_by="anonymous"
+        ))
+        if len(dataset.expense_ids) < SAMPLE_SIZE:
+            dataset.expense_ids.append(expense_id)
+
+    revenues = []
+    for _ in range(scale.revenues):
+        revenue_id = _uuid(rng)
+        revenues.append(dict(
+            id=revenue_id, season_id=season_id,
+            team_id=rng.choice(team_ids) if rng.random() < 0.8 else None,
+            category=rng.choice(revenue_categories),
+            description=f"Revenue {rng.randrange(100000)}",
+            amount=round(rng.uniform(20, 3000), 2),
+            payment_date=_day(rng, start, 90),
+            created_by="anonymous"
+        ))
+        if len(dataset.revenue_ids) < SAMPLE_SIZE:
+            dataset.revenue_ids.append(revenue_id)
+    return expenses, revenues
+
+
+def generate(db: Session, scale: Scale, seed: int = 1) -> Dataset:
+    """Fill an empty database; commits once per season"""
+    rng = random.Random(seed)
+    dataset = Dataset(counts=scale.totals)
+
+    # Ledger rows are created by "anonymous"; give the foreign key a target
+    db.execute(insert(User).values(
+        id="anonymous", email="anonymous@example.com", full_name="Anonymous",
+        hashed_password="!", role=UserRole.VIEWER
+    ))
+
+    for org_index in range(scale.organizations):
+        org_id = _uuid(rng)
+        dataset.organization_ids.append(org_id)
+        db.execute(insert(Organization).values(
+            id=org_id, name=f"League {org_index + 1}", is_public=True,
+            description="Synthetic benchmark organization"
+        ))
+
+        for season_index in range(scale.seasons):
+            year = 2000 + season_index
+            season_id = _uuid(rng)
+            active = season_index == scale.seasons - 1
+            start = date(year, 9, 1)
+            dataset.season_ids.append(season_id)
+            if active:
+                dataset.active_season_ids.append(season_id)
+            db.execute(insert(Season).values(
+                id=season_id, organization_id=org_id, name=f"Fall {year}", season_type=SeasonType.FALL,
+                year=year, start_date=start, end_date=date(year, 11, 30), is_active=active
+            ))
+            if PARTITION_BY_SEASON:
+                ensure_season_partitions(db, [season_id])
+
+            teams, players, budgets = [], [], []
+            for team_index in range(scale.teams):
+                team_id = _uuid(rng)
+                fee = float(rng.choice([75, 100, 125, 150]))
+                teams.append(dict(
+                    id=team_id, season_id=season_id, name=f"Team {team_index + 1}",
+                    age_group=rng.choice(AGE_GROUPS), sport=rng.choice(SPORTS), gender=rng.choice(GENDERS),
+                    max_players=scale.players + 5, current_players=scale.players, registration_fee=fee
+                ))
+                for jersey in range(scale.players):
+                    player_id = _uuid(rng)
+                    paid = rng.random() < 0.85
+                    players.append(dict(
+                        id=player_id, team_id=team_id,
+                        first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                        date_of_birth=date(year - rng.randrange(7, 17), rng.randrange(1, 13), rng.randrange(1, 29)),
+                        registration_fee_paid=paid, registration_fee_amount=fee if paid else 0.0,
+                        registration_date=_day(rng, start - timedelta(days=30), 30) if paid else None,
+                        jersey_number=jersey + 1
+                    ))
+                    if len(dataset.player_ids) < SAMPLE_SIZE:
+                        dataset.player_ids.append(player_id)
+                for category in rng.sample(list(ExpenseCategory), 3):
+                    budgets.append(dict(
+                        id=_uuid(rng), season_id=season_id, team_id=team_id,
+                        category=category.value, budgeted_amount=float(rng.randrange(500, 5000, 50))
+                    ))
+            budgets.append(dict(
+                id=_uuid(rng), season_id=season_id, team_id=None,
+                category="total", budgeted_amount=float(rng.randrange(50000, 500000, 1000))
+            ))
+            team_ids = [team["id"] for team in teams]
+            dataset.team_ids.extend(team_ids)
+            dataset.teams_by_season[season_id] = team_ids
+
+            expenses, revenues = _season_rows(rng, season_id, start, team_ids, scale, dataset)
+            _insert(db, Team, teams)
+            _insert(db, Player, players)
+            _insert(db, Budget, budgets)
+            _insert(db, Expense, expenses)
+            _insert(db, Revenue, revenues)
+            db.commit()
+
+    return dataset
+
+
+def import_csv(kind: str, rows: int, dataset: Dataset, seed: int = 1) -> str:
+    """A CSV upload of ``rows`` rows for ``/import/<kind>``"""
+    rng = random.Random(f"{kind}:{seed}")
+    season_id = dataset.active_season_ids[0]
+    team_ids = dataset.team_ids[-SAMPLE_SIZE:]
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    if kind == "organizations":
+        writer.writerow(["name", "description", "website", "contact_email", "contact_phone", "is_public"])
+        for i in range(rows):
+            writer.writerow([f"Imported League {i}", "Imported", "", f"league{i}@example.com", "", "true"])
+    elif kind == "seasons":
+        writer.writerow(["name", "season_type", "year", "start_date", "end_date", "is_active", "organization_id"])
+        for i in range(rows):
+            year = 1900 + i % 100
+            writer.writerow([f"Imported {i}", "spring", year, f"{year}-03-01", f"{year}-05-31", "false",
+                             rng.choice(dataset.organization_ids)])
+    elif kind == "teams":
+        writer.writerow(["name", "age_group", "sport", "gender", "max_players", "registration_fee", "season_id", "coach_id"])
+        for i in range(rows):
+            writer.writerow([f"Imported Team {i}", rng.choice(AGE_GROUPS), rng.choice(SPORTS), rng.choice(GENDERS),
+                             20, 100, season_id, ""])
+    elif kind == "expenses":
+        writer.writerow(["season_id", "team_id", "category", "description", "amount", "vendor",
+                         "receipt_number", "payment_date", "notes"])
+        for i in range(rows):
+            writer.writerow([season_id, rng.choice(team_ids), rng.choice(list(ExpenseCategory)).value,
+                             f"Imported expense {i}", round(rng.uniform(5, 800), 2), rng.choice(VENDORS),
+                             f"R{i}", "2024-09-15", ""])
+    elif kind == "revenues":
+        writer.writerow(["season_id", "team_id", "category", "description", "amount", "source", "payment_date", "notes"])
+        for i in range(rows):
+            writer.writerow([season_id, rng.choice(team_ids), rng.choice(list(RevenueCategory)).value,
+                             f"Imported revenue {i}", round(rng.uniform(20, 3000), 2), "", "2024-09-15", ""])
+    elif kind == "players":
+        writer.writerow(["team_id", "first_name", "last_name", "date_of_birth", "parent_name", "parent_email",
+                         "parent_phone", "registration_fee_paid", "registration_fee_amount", "registration_date",
+                         "jersey_number", "notes"])
+        for i in range(rows):
+            writer.writerow([rng.choice(team_ids), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), "2014-05-01",
+                             "", "", "", "true", 100, "2024-08-20", i % 99 + 1, ""])
+    else:
+        raise ValueError(f"Unknown import kind: {kind}")
+    return out.getvalue()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Report latency as season history grows.
+
+Adds one season of ledger data at a time and, after each, times the
+season-scoped reports for the newest season. Run it once with
+PARTITION_BY_SEASON=true and once without to compare the partitioned layout:
+
+    BENCH_DATABASE_URL=postgresql://localhost/ysb_bench PARTITION_BY_SEASON=true \\
+        python benchmarks/season_history.py --seasons 20 --expenses 20000
+
+BENCH_DATABASE_URL must point at a scratch database - all tables are dropped.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench_season_history.db")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["REQUEST_LOG_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from app.database import Base, PARTITION_BY_SEASON, SessionLocal, engine  # noqa: E402
+from app.models import Expense, ExpenseCategory, Revenue, RevenueCategory, Season, SeasonType, Team, generate_uuid  # noqa: E402
+from app.core.partitioning import ensure_default_partitions, ensure_season_partitions  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def add_season(db, rng, year, teams, expenses):
+    season_id = generate_uuid()
+    db.execute(insert(Season).values(
+        id=season_id, name=f"Fall {year}", season_type=SeasonType.FALL, year=year,
+        start_date=date(year, 9, 1), end_date=date(year, 11, 30), is_active=False
+    ))
+    if PARTITION_BY_SEASON:
+        ensure_season_partitions(db, [season_id])
+    team_ids = [generate_uuid() for _ in range(teams)]
+    db.execute(insert(Team).values([
+        dict(id=team_id, season_id=season_id, name=f"Team {i}", age_group="U10", sport="Soccer", current_players=15)
+        for i, team_id in enumerate(team_ids)
+    ]))
+    categories = list(ExpenseCategory)
+    for start in range(0, expenses, 500):
+        db.execute(insert(Expense).values([
+            dict(
+                season_id=season_id, team_id=rng.choice(team_ids), category=rng.choice(categories),
+                description="bench", amount=round(rng.uniform(5, 500), 2),
+                payment_date=date(year, 9, 1) + timedelta(days=rng.randrange(90)), created_by="anonymous"
+            )
+            for _ in range(min(500, expenses - start))
+        ]))
+    db.execute(insert(Revenue).values([
+        dict(
+            season_id=season_id, team_id=team_id, category=RevenueCategory.REGISTRATION_FEES,
+            description="bench", amount=1500.0, payment_date=date(year, 9, 1), created_by="anonymous"
+        )
+        for team_id in team_ids
+    ]))
+    db.commit()
+    return season_id
+
+
+def time_ms(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--expenses", type=int, default=5000, help="expenses per season")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if PARTITION_BY_SEASON:
+        ensure_default_partitions(db)
+        db.commit()
+
+    rng = random.Random(args.seed)
+    print(f"layout: {'partitioned' if PARTITION_BY_SEASON else 'single table'} ({engine.dialect.name})")
+    print(f"{'seasons':>8} {'expenses':>10} {'summary ms':>11} {'report ms':>10}")
+    with TestClient(app) as client:
+        for n in range(1, args.seasons + 1):
+            season_id = add_season(db, rng, 2000 + n, args.teams, args.expenses)
+            summary = time_ms(client, f"/api/v1/budgets/summary?season_id={season_id}", args.repeat)
+            report = time_ms(client, f"/api/v1/transparency/season/{season_id}/report", args.repeat)
+            print(f"{n:>8} {n * args.expenses:>10} {summary:>11.1f} {report:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measure time from process start to the first successful /health response.
+
+Each run spawns uvicorn the way start.sh does and polls /health until it
+answers 200. The first run uses an empty database (cold: the schema is
+created); the rest reuse it (warm: the schema check is a single SELECT):
+
+    python benchmarks/startup_time.py --runs 5
+
+BENCH_DATABASE_URL must point at a scratch database - it is deleted first
+when it is a SQLite file.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench_startup.db")
+
+
+def time_to_ready(port: int, timeout: float) -> float:
+    env = dict(os.environ, DATABASE_URL=DATABASE_URL, PORT=str(port))
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="warm runs after the cold one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    if DATABASE_URL.startswith("sqlite:///"):
+        path = os.path.join(BACKEND_DIR, DATABASE_URL[len("sqlite:///"):])
+        if os.path.exists(path):
+            os.remove(path)
+
+    cold = time_to_ready(args.port, args.timeout)
+    warm = [time_to_ready(args.port, args.timeout) for _ in range(args.runs)]
+    print(f"cold start: {cold:8.1f} ms")
+    print(f"warm start: {statistics.median(warm):8.1f} ms (median of {len(warm)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Benchmark every API endpoint and importer against deterministic data.
+
+Builds a fresh database with benchmarks/datagen.py at the chosen scale, then
+times each route in-process (full middleware stack, no network) and reports
+p50/p95/p99 latency, plus rows/second for the CSV importers:
+
+    python benchmarks/suite.py --scale small
+    python benchmarks/suite.py --scale small --save-baseline   # after a known-good commit
+    python benchmarks/suite.py --scale small --baseline benchmarks/baseline.json
+
+With --baseline it exits non-zero when any endpoint's p50 got more than
+--tolerance slower (or an importer that much lower in rows/s). Baselines
+are machine-specific: compare runs from the same host, scale and database.
+
+BENCH_DATABASE_URL must point at a scratch database - all tables are dropped.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench_suite.db")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["REQUEST_LOG_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Team  # noqa: E402
+from app.startup import init_db  # noqa: E402
+from benchmarks.datagen import SCALES, Dataset, generate, import_csv  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+IMPORT_KINDS = ["organizations", "seasons", "teams", "expenses", "revenues", "players"]
+# Differences below this are noise whatever the percentage
+NOISE_FLOOR_MS = 1.0
+
+# Routes not timed, and why
+SKIPPED = {
+    ("POST", "/api/v1/seasons/{season_id}/partitions/detach"): "needs PARTITION_BY_SEASON on Postgres",
+    ("POST", "/api/v1/seasons/{season_id}/partitions/attach"): "needs PARTITION_BY_SEASON on Postgres",
+    ("GET", "/api/v1/admin/profiles/{name}"): "needs a stored profile",
+    ("POST", "/api/v1/admin/jobs/{name}/run"): "starts background maintenance",
+    ("GET", "/api/v1/budgets/summary/stream"): "long-lived event stream",
+}
+
+
+class Context:
+    """Generated ids plus state shared between cases"""
+
+    def __init__(self, dataset: Dataset):
+        self.data = dataset
+        self.season_id = dataset.active_season_ids[0]
+        self.closed_season_id = dataset.season_ids[0]
+        self.org_id = dataset.organization_ids[0]
+        self.team_id = dataset.team_ids[-1]
+        self.token = None
+        self.player_cursor = None
+        self.budget_id = None
+        self.template_id = None
+
+    def pick(self, ids: List[str], i: int) -> str:
+        return ids[i % len(ids)]
+
+
+@dataclass
+class Case:
+    name: str
+    method: str
+    route: str
+    # Returns the request's url and kwargs; may do untimed setup first
+    request: Callable[[TestClient, Context, int], dict]
+    repeat: Optional[int] = None
+
+
+def _season(i, **extra):
+    return dict(name=f"Bench {i}", season_type="spring", year=1990, start_date="1990-03-01",
+                end_date="1990-05-31", is_active=False, **extra)
+
+
+def _expense(ctx, i):
+    return dict(category="equipment", description=f"bench {i}", amount=10 + i, payment_date="2024-09-10",
+                season_id=ctx.season_id, team_id=ctx.team_id)
+
+
+def _revenue(ctx, i):
+    return dict(category="donations", description=f"bench {i}", amount=10 + i, payment_date="2024-09-10",
+                season_id=ctx.season_id, team_id=ctx.team_id)
+
+
+def _create(client, url, payload) -> str:
+    response = client.post(url, json=payload)
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def _archive(client, ctx, i):
+    client.post(f"/api/v1/seasons/{ctx.closed_season_id}/restore")  # 404 unless archived
+    return dict(url=f"/api/v1/seasons/{ctx.closed_season_id}/archive")
+
+
+def _restore(client, ctx, i):
+    client.post(f"/api/v1/seasons/{ctx.closed_season_id}/archive")  # 409 if already archived
+    return dict(url=f"/api/v1/seasons/{ctx.closed_season_id}/restore")
+
+
+def _me(client, ctx, i):
+    if ctx.token is None:
+        response = client.post("/api/v1/auth/login", json=dict(email="bench0@example.com", password="benchpass"))
+        ctx.token = response.json()["access_token"]
+    return dict(url="/api/v1/auth/me", headers={"Authorization": f"Bearer {ctx.token}"})
+
+
+def _budget(client, ctx) -> str:
+    if ctx.budget_id is None:
+        ctx.budget_id = _create(client, "/api/v1/budgets/", dict(
+            category="travel", budgeted_amount=1000, season_id=ctx.season_id, team_id=ctx.team_id
+        ))
+    return ctx.budget_id
+
+
+def _template_payload(ctx, i):
+    return dict(name=f"Bench {i}", category="referee_fees", default_amount=60,
+                description_template="Referees {date} - {team}", organization_id=ctx.org_id)
+
+
+def _template(client, ctx) -> str:
+    if ctx.template_id is None:
+        ctx.template_id = _create(client, "/api/v1/templates/", _template_payload(ctx, 0))
+    return ctx.template_id
+
+
+def _players_next_page(client, ctx, i):
+    if ctx.player_cursor is None:
+        ctx.player_cursor = client.get("/api/v1/players/", params=dict(limit=100)).json()["next_cursor"]
+    return dict(url="/api/v1/players/", params=dict(limit=100, after=ctx.player_cursor))
+
+
+CASES = [
+    Case("root", "GET", "/", lambda c, ctx, i: dict(url="/")),
+    Case("health", "GET", "/health", lambda c, ctx, i: dict(url="/health")),
+    Case("limits", "GET", "/limits", lambda c, ctx, i: dict(url="/limits")),
+    Case("metrics", "GET", "/metrics", lambda c, ctx, i: dict(url="/metrics")),
+    Case("workers", "GET", "/workers", lambda c, ctx, i: dict(url="/workers")),
+
+    Case("auth.register", "POST", "/api/v1/auth/register", lambda c, ctx, i: dict(
+        url="/api/v1/auth/register",
+        json=dict(email=f"bench{i}@example.com", password="benchpass", full_name=f"Bench {i}")
+    ), repeat=5),
+    Case("auth.login", "POST", "/api/v1/auth/login", lambda c, ctx, i: dict(
+        url="/api/v1/auth/login", json=dict(email="bench0@example.com", password="benchpass")
+    ), repeat=5),
+    Case("auth.me", "GET", "/api/v1/auth/me", _me),
+
+    Case("organizations.list", "GET", "/api/v1/organizations/", lambda c, ctx, i: dict(url="/api/v1/organizations/")),
+    Case("organizations.create", "POST", "/api/v1/organizations/", lambda c, ctx, i: dict(
+        url="/api/v1/organizations/", json=dict(name=f"Bench org {i}")
+    )),
+    Case("organizations.get", "GET", "/api/v1/organizations/{org_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/organizations/{ctx.pick(ctx.data.organization_ids, i)}"
+    )),
+
+    Case("seasons.list", "GET", "/api/v1/seasons/", lambda c, ctx, i: dict(url="/api/v1/seasons/")),
+    Case("seasons.create", "POST", "/api/v1/seasons/", lambda c, ctx, i: dict(
+        url="/api/v1/seasons/", json=_season(i)
+    )),
+    Case("seasons.get", "GET", "/api/v1/seasons/{season_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/seasons/{ctx.pick(ctx.data.season_ids, i)}"
+    )),
+    Case("seasons.update", "PUT", "/api/v1/seasons/{season_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/seasons/{_create(c, '/api/v1/seasons/', _season(i))}", json=_season(i, organization_id=ctx.org_id)
+    )),
+    Case("seasons.delete", "DELETE", "/api/v1/seasons/{season_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/seasons/{_create(c, '/api/v1/seasons/', _season(i))}"
+    )),
+    Case("seasons.archive", "POST", "/api/v1/seasons/{season_id}/archive", _archive, repeat=5),
+    Case("seasons.restore", "POST", "/api/v1/seasons/{season_id}/restore", _restore, repeat=5),
+
+    Case("teams.list", "GET", "/api/v1/teams/", lambda c, ctx, i: dict(
+        url="/api/v1/teams/", params=dict(season_id=ctx.season_id)
+    )),
+    Case("teams.create", "POST", "/api/v1/teams/", lambda c, ctx, i: dict(
+        url="/api/v1/teams/", json=dict(season_id=ctx.season_id, name=f"Bench {i}", age_group="U10", sport="Soccer")
+    )),
+    Case("teams.get", "GET", "/api/v1/teams/{team_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/teams/{ctx.pick(ctx.data.team_ids, i)}"
+    )),
+    Case("teams.update", "PATCH", "/api/v1/teams/{team_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/teams/{ctx.pick(ctx.data.team_ids, i)}", json=dict(registration_fee=100 + i)
+    )),
+    Case("teams.player_count", "POST", "/api/v1/teams/{team_id}/player-count", lambda c, ctx, i: dict(
+        url=f"/api/v1/teams/{ctx.pick(ctx.data.team_ids, i)}/player-count", json=dict(delta=1)
+    )),
+
+    Case("budgets.list", "GET", "/api/v1/budgets/", lambda c, ctx, i: dict(
+        url="/api/v1/budgets/", params=dict(season_id=ctx.season_id)
+    )),
+    Case("budgets.create", "POST", "/api/v1/budgets/", lambda c, ctx, i: dict(
+        url="/api/v1/budgets/", json=dict(category="travel", budgeted_amount=100, season_id=ctx.season_id,
+                                          team_id=ctx.team_id)
+    )),
+    Case("budgets.batch", "POST", "/api/v1/budgets/batch", lambda c, ctx, i: dict(
+        url="/api/v1/budgets/batch",
+        json=[dict(category="travel", budgeted_amount=n, season_id=ctx.season_id) for n in range(100)]
+    )),
+    Case("budgets.update", "PATCH", "/api/v1/budgets/{budget_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/budgets/{_budget(c, ctx)}", json=dict(notes=f"bench {i}")
+    )),
+    Case("budgets.adjust", "POST", "/api/v1/budgets/{budget_id}/adjust", lambda c, ctx, i: dict(
+        url=f"/api/v1/budgets/{_budget(c, ctx)}/adjust", json=dict(delta=5)
+    )),
+    Case("budgets.summary", "GET", "/api/v1/budgets/summary", lambda c, ctx, i: dict(
+        url="/api/v1/budgets/summary", params=dict(season_id=ctx.pick(ctx.data.active_season_ids, i))
+    )),
+    Case("budgets.teams_summary", "GET", "/api/v1/budgets/teams/summary", lambda c, ctx, i: dict(
+        url="/api/v1/budgets/teams/summary", params=dict(season_id=ctx.pick(ctx.data.active_season_ids, i))
+    )),
+    Case("budgets.team_summary", "GET", "/api/v1/budgets/team/{team_id}/summary", lambda c, ctx, i: dict(
+        url=f"/api/v1/budgets/team/{ctx.pick(ctx.data.team_ids, i)}/summary"
+    )),
+
+    Case("expenses.list", "GET", "/api/v1/expenses/", lambda c, ctx, i: dict(
+        url="/api/v1/expenses/", params=dict(team_id=ctx.pick(ctx.data.team_ids, i))
+    )),
+    Case("expenses.create", "POST", "/api/v1/expenses/", lambda c, ctx, i: dict(
+        url="/api/v1/expenses/", json=_expense(ctx, i)
+    )),
+    Case("expenses.batch", "POST", "/api/v1/expenses/batch", lambda c, ctx, i: dict(
+        url="/api/v1/expenses/batch", json=[_expense(ctx, n) for n in range(100)]
+    )),
+    Case("expenses.anomalies", "GET", "/api/v1/expenses/anomalies", lambda c, ctx, i: dict(
+        url="/api/v1/expenses/anomalies", params=dict(season_id=ctx.pick(ctx.data.active_season_ids, i))
+    )),
+    Case("expenses.anomalies_scan", "POST", "/api/v1/expenses/anomalies/scan", lambda c, ctx, i: dict(
+        url="/api/v1/expenses/anomalies/scan", params=dict(season_id=ctx.pick(ctx.data.active_season_ids, i))
+    ), repeat=5),
+    Case("expenses.get", "GET", "/api/v1/expenses/{expense_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/expenses/{ctx.pick(ctx.data.expense_ids, i)}"
+    )),
+    Case("expenses.delete", "DELETE", "/api/v1/expenses/{expense_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/expenses/{_create(c, '/api/v1/expenses/', _expense(ctx, i))}"
+    )),
+
+    Case("revenues.list", "GET", "/api/v1/revenues/", lambda c, ctx, i: dict(
+        url="/api/v1/revenues/", params=dict(team_id=ctx.pick(ctx.data.team_ids, i))
+    )),
+    Case("revenues.create", "POST", "/api/v1/revenues/", lambda c, ctx, i: dict(
+        url="/api/v1/revenues/", json=_revenue(ctx, i)
+    )),
+    Case("revenues.batch", "POST", "/api/v1/revenues/batch", lambda c, ctx, i: dict(
+        url="/api/v1/revenues/batch", json=[_revenue(ctx, n) for n in range(100)]
+    )),
+    Case("revenues.get", "GET", "/api/v1/revenues/{revenue_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/revenues/{ctx.pick(ctx.data.revenue_ids, i)}"
+    )),
+    Case("revenues.delete", "DELETE", "/api/v1/revenues/{revenue_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/revenues/{_create(c, '/api/v1/revenues/', _revenue(ctx, i))}"
+    )),
+
+    Case("players.list", "GET", "/api/v1/players/", lambda c, ctx, i: dict(
+        url="/api/v1/players/", params=dict(team_id=ctx.pick(ctx.data.team_ids, i))
+    )),
+    Case("players.list_page", "GET", "/api/v1/players/", _players_next_page),
+    Case("players.create", "POST", "/api/v1/players/", lambda c, ctx, i: dict(
+        url="/api/v1/players/", json=dict(team_id=ctx.team_id, first_name="Bench", last_name=f"P{i}")
+    )),
+    Case("players.batch", "POST", "/api/v1/players/batch", lambda c, ctx, i: dict(
+        url="/api/v1/players/batch",
+        json=[dict(team_id=ctx.team_id, first_name="Bench", last_name=f"B{n}") for n in range(100)]
+    )),
+    Case("players.get", "GET", "/api/v1/players/{player_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/players/{ctx.pick(ctx.data.player_ids, i)}"
+    )),
+    Case("players.delete", "DELETE", "/api/v1/players/{player_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/players/{_create(c, '/api/v1/players/', dict(team_id=ctx.team_id, first_name='D', last_name=str(i)))}"
+    )),
+
+    Case("quick.registration_fees", "POST", "/api/v1/quick/bulk-registration-fees", lambda c, ctx, i: dict(
+        url="/api/v1/quick/bulk-registration-fees",
+        json=dict(team_id=ctx.pick(ctx.data.team_ids, i), player_count=15, fee_per_player=100, payment_date="2024-09-01")
+    )),
+    Case("quick.expense", "POST", "/api/v1/quick/quick-expense", lambda c, ctx, i: dict(
+        url="/api/v1/quick/quick-expense", params=dict(category="referee_fees", season_id=ctx.season_id),
+        json=dict(team_id=ctx.team_id, amount=60, description="Refs", payment_date="2024-09-14", player_count=15)
+    )),
+
+    Case("templates.list", "GET", "/api/v1/templates/", lambda c, ctx, i: dict(
+        url="/api/v1/templates/", params=dict(organization_id=ctx.org_id)
+    )),
+    Case("templates.create", "POST", "/api/v1/templates/", lambda c, ctx, i: dict(
+        url="/api/v1/templates/", json=_template_payload(ctx, i)
+    )),
+    Case("templates.get", "GET", "/api/v1/templates/{template_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/templates/{_template(c, ctx)}"
+    )),
+    Case("templates.update", "PATCH", "/api/v1/templates/{template_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/templates/{_template(c, ctx)}", json=dict(default_amount=60 + i)
+    )),
+    Case("templates.apply", "POST", "/api/v1/templates/{template_id}/apply", lambda c, ctx, i: dict(
+        url=f"/api/v1/templates/{_template(c, ctx)}/apply",
+        json=dict(season_id=ctx.season_id, team_ids=ctx.data.teams_by_season[ctx.season_id][:20],
+                  payment_date="2024-09-14")
+    )),
+    Case("templates.delete", "DELETE", "/api/v1/templates/{template_id}", lambda c, ctx, i: dict(
+        url=f"/api/v1/templates/{_create(c, '/api/v1/templates/', _template_payload(ctx, i))}"
+    )),
+
+    Case("dashboard.season", "GET", "/api/v1/dashboard/", lambda c, ctx, i: dict(
+        url="/api/v1/dashboard/", params=dict(season_id=ctx.pick(ctx.data.active_season_ids, i))
+    )),
+    Case("transparency.season", "GET", "/api/v1/transparency/season/{season_id}/report", lambda c, ctx, i: dict(
+        url=f"/api/v1/transparency/season/{ctx.pick(ctx.data.active_season_ids, i)}/report"
+    )),
+    Case("transparency.organization", "GET", "/api/v1/transparency/organization/{org_id}/report",
+         lambda c, ctx, i: dict(url=f"/api/v1/transparency/organization/{ctx.pick(ctx.data.organization_ids, i)}/report"),
+         repeat=5),
+    Case("transparency.fee_reconciliation", "GET", "/api/v1/transparency/organization/{org_id}/fee-reconciliation",
+         lambda c, ctx, i: dict(url=f"/api/v1/transparency/organization/{ctx.pick(ctx.data.organization_ids, i)}/fee-reconciliation"),
+         repeat=5),
+    Case("transparency.player_costs", "GET", "/api/v1/transparency/team/{team_id}/player-costs", lambda c, ctx, i: dict(
+        url=f"/api/v1/transparency/team/{ctx.pick(ctx.data.team_ids, i)}/player-costs"
+    )),
+
+    Case("import.template", "GET", "/api/v1/import/templates/{entity_type}", lambda c, ctx, i: dict(
+        url=f"/api/v1/import/templates/{IMPORT_KINDS[i % len(IMPORT_KINDS)]}"
+    )),
+    Case("admin.slow_queries", "GET", "/api/v1/admin/slow-queries", lambda c, ctx, i: dict(url="/api/v1/admin/slow-queries")),
+    Case("admin.slow_queries_clear", "DELETE", "/api/v1/admin/slow-queries",
+         lambda c, ctx, i: dict(url="/api/v1/admin/slow-queries")),
+    Case("admin.profiles", "GET", "/api/v1/admin/profiles", lambda c, ctx, i: dict(url="/api/v1/admin/profiles")),
+    Case("admin.jobs", "GET", "/api/v1/admin/jobs", lambda c, ctx, i: dict(url="/api/v1/admin/jobs")),
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "samples": len(samples),
+    }
+
+
+def run_case(client: TestClient, ctx: Context, case: Case, repeat: int) -> Dict[str, float]:
+    samples, errors = [], 0
+    for i in range(case.repeat or repeat):
+        kwargs = case.request(client, ctx, i)
+        url = kwargs.pop("url")
+        start = time.perf_counter()
+        response = client.request(case.method, url, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+    result = summarize(samples)
+    result["errors"] = errors
+    return result
+
+
+def run_import(client: TestClient, ctx: Context, kind: str, rows: int, repeat: int) -> Dict[str, float]:
+    content = import_csv(kind, rows, ctx.data)
+    samples, errors = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.post(f"/api/v1/import/{kind}", files={"file": (f"{kind}.csv", content, "text/csv")})
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400 or response.json().get("errors"):
+            errors += 1
+    result = summarize(samples)
+    result["rows"] = rows
+    result["rows_per_s"] = round(rows / (result["p50_ms"] / 1000), 1)
+    result["errors"] = errors
+    return result
+
+
+def uncovered_routes() -> List[str]:
+    covered = {(case.method, case.route) for case in CASES}
+    covered |= {("POST", f"/api/v1/import/{kind}") for kind in IMPORT_KINDS}
+    missing = []
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            key = (method, route.path)
+            if method == "HEAD" or key in covered or key in SKIPPED:
+                continue
+            if getattr(route, "include_in_schema", True):
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'case':<34} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if "rows_per_s" in result:
+            old, new = before["rows_per_s"], result["rows_per_s"]
+            change = (new - old) / old if old else 0.0
+            regressed = change < -tolerance
+            unit = "rows/s"
+        else:
+            old, new = before["p50_ms"], result["p50_ms"]
+            change = (new - old) / old if old else 0.0
+            regressed = change > tolerance and new - old > NOISE_FLOOR_MS
+            unit = "ms"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<34} {old:>10.1f} {new:>10.1f} {change:>+7.0%} {unit}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=30, help="requests per endpoint")
+    parser.add_argument("--import-rows", type=int, default=2000)
+    parser.add_argument("--import-repeat", type=int, default=3)
+    parser.add_argument("--only", help="comma-separated case name prefixes to run")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--output", help="also write results as JSON here")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    Base.metadata.drop_all(bind=engine)
+    init_db(force=True)
+    db = SessionLocal()
+    start = time.perf_counter()
+    dataset = generate(db, scale, args.seed)
+    # Roster cases add players to the same teams on every run; lift the
+    # generated caps so max_players checks do not reject them
+    db.query(Team).update({Team.max_players: 1000000})
+    db.commit()
+    db.close()
+    print(f"generated {args.scale} dataset in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{count} {kind}" for kind, count in dataset.counts.items()))
+
+    ctx = Context(dataset)
+    prefixes = tuple(args.only.split(",")) if args.only else None
+    results = {}
+    print(f"\n{'case':<34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rows/s':>10} {'errors':>7}")
+    with TestClient(app) as client:
+        for case in CASES:
+            if prefixes and not case.name.startswith(prefixes):
+                continue
+            result = results[case.name] = run_case(client, ctx, case, args.repeat)
+            print(f"{case.name:<34} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                  f"{'':>10} {result['errors']:>7}")
+        for kind in IMPORT_KINDS:
+            name = f"import.{kind}"
+            if prefixes and not name.startswith(prefixes):
+                continue
+            result = results[name] = run_import(client, ctx, kind, args.import_rows, args.import_repeat)
+            print(f"{name:<34} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                  f"{result['rows_per_s']:>10.0f} {result['errors']:>7}")
+
+    missing = uncovered_routes()
+    if missing and not prefixes:
+        print("\nroutes without a benchmark: " + ", ".join(missing))
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "import_rows": args.import_rows,
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nbaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ("scale", "database", "import_rows"):
+            if baseline["meta"].get(key) != report["meta"][key]:
+                print(f"warning: baseline {key} is {baseline['meta'].get(key)!r}, this run used {report['meta'][key]!r}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
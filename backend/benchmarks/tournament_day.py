@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Tournament-day load test.
+
+Replays the first-Saturday traffic mix with concurrent async clients:
+
+- coaches entering bulk registration fees and quick expenses
+- treasurers polling the season and team budget summaries
+- parents reading the public transparency reports
+- one large CSV expense import started a third of the way in
+
+and reports throughput, p50/p95/p99 latency and error rate per scenario,
+plus database lock waits. The app runs in-process by default; --spawn starts
+a local uvicorn (optionally with --workers) on the same database, and --url
+targets a server you started yourself with DATABASE_URL=$BENCH_DATABASE_URL:
+
+    python benchmarks/tournament_day.py --users 50 --duration 60
+    BENCH_DATABASE_URL=postgresql://localhost/ysb_bench \\
+        python benchmarks/tournament_day.py --spawn --workers 4
+
+Lock waits: on Postgres, backends waiting on a lock are sampled from
+pg_stat_activity. On SQLite there is no such view, so in-process runs count
+"database is locked" errors and time every write statement - SQLite waits
+for the write lock inside the statement, so write p99 is the lock wait.
+
+BENCH_DATABASE_URL must point at a scratch database - all tables are dropped.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench_tournament.db")
+os.environ["REQUEST_LOG_ENABLED"] = "false"
+if "--rate-limit" not in sys.argv:
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.startup import init_db  # noqa: E402
+from benchmarks.datagen import SCALES, generate, import_csv  # noqa: E402
+
+# Share of virtual-user iterations per scenario
+TRAFFIC_MIX = {
+    "registration_fees": 0.20,
+    "quick_expense": 0.25,
+    "dashboard_summary": 0.35,
+    "transparency": 0.20,
+}
+# Think time between a virtual user's requests, in seconds
+THINK_TIME = (0.05, 0.5)
+
+
+class Recorder:
+    """Latency samples and outcomes per scenario"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[int, int] = defaultdict(int)
+
+    def record(self, scenario: str, seconds: float, status_code: int):
+        self.samples[scenario].append(seconds * 1000)
+        self.statuses[status_code] += 1
+        if status_code >= 400:
+            self.errors[scenario] += 1
+
+
+class LockMonitor:
+    """Database lock waits during the run"""
+
+    def __init__(self, in_process: bool):
+        self.dialect = engine.dialect.name
+        self.in_process = in_process
+        self.samples: List[int] = []
+        self.locked_errors = 0
+        self.write_ms: List[float] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["lock_monitor_start"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.write_ms.append((time.perf_counter() - conn.info.pop("lock_monitor_start")) * 1000)
+
+    def _error(self, context):
+        if "database is locked" in str(context.original_exception):
+            self.locked_errors += 1
+
+    def _poll(self):
+        with engine.connect() as conn:
+            while not self._stop.wait(0.25):
+                waiting = conn.execute(text(
+                    "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'"
+                )).scalar()
+                self.samples.append(waiting)
+                conn.rollback()
+
+    def start(self):
+        if self.dialect == "postgresql":
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+        elif self.in_process:
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+            event.listen(engine, "handle_error", self._error)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def report(self) -> str:
+        if self.dialect == "postgresql":
+            if not self.samples:
+                return "lock waits: no samples"
+            busy = sum(1 for n in self.samples if n)
+            return (f"lock waits: {busy / len(self.samples):.0%} of samples had waiting backends, "
+                    f"max {max(self.samples)} waiting")
+        if not self.in_process:
+            return "lock waits: not observable for an out-of-process SQLite server (see error rate)"
+        writes = sorted(self.write_ms)
+        if not writes:
+            return f"lock waits: no writes, {self.locked_errors} 'database is locked' errors"
+        return (f"lock waits: {self.locked_errors} 'database is locked' errors; write statements "
+                f"p50 {writes[len(writes) // 2]:.1f} ms, p99 {writes[int(len(writes) * 0.99)]:.1f} ms, "
+                f"max {writes[-1]:.1f} ms")
+
+
+async def timed(client, recorder, scenario, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status_code = response.status_code
+    except httpx.HTTPError:
+        status_code = 599
+    recorder.record(scenario, time.perf_counter() - start, status_code)
+
+
+async def virtual_user(client, recorder, data, deadline, seed):
+    rng = random.Random(seed)
+    scenarios, weights = zip(*TRAFFIC_MIX.items())
+    season_id = data.active_season_ids[0]
+    team_ids = data.teams_by_season[season_id]
+    saturday = date(2024, 9, 7)
+
+    while time.monotonic() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        team_id = rng.choice(team_ids)
+        if scenario == "registration_fees":
+            await timed(client, recorder, scenario, "POST", "/api/v1/quick/bulk-registration-fees", json=dict(
+                team_id=team_id, player_count=rng.randrange(10, 20), fee_per_player=rng.choice([75, 100, 125]),
+                payment_date=saturday.isoformat()
+            ))
+        elif scenario == "quick_expense":
+            await timed(
+                client, recorder, scenario, "POST", "/api/v1/quick/quick-expense",
+                params=dict(category=rng.choice(["referee_fees", "field_rental", "first_aid"]), season_id=season_id),
+                json=dict(team_id=team_id, amount=rng.choice([40, 60, 85]), description="Game day",
+                          payment_date=saturday.isoformat(), player_count=15)
+            )
+        elif scenario == "dashboard_summary":
+            await timed(client, recorder, scenario, "GET", "/api/v1/budgets/summary", params=dict(season_id=season_id))
+            await timed(client, recorder, scenario, "GET", f"/api/v1/budgets/team/{team_id}/summary")
+        else:
+            if rng.random() < 0.5:
+                await timed(client, recorder, scenario, "GET", f"/api/v1/transparency/season/{season_id}/report")
+            else:
+                await timed(client, recorder, scenario, "GET", f"/api/v1/transparency/team/{team_id}/player-costs")
+        await asyncio.sleep(rng.uniform(*THINK_TIME))
+
+
+async def large_import(client, recorder, data, rows, delay):
+    await asyncio.sleep(delay)
+    content = import_csv("expenses", rows, data)
+    await timed(client, recorder, "large_import", "POST", "/api/v1/import/expenses",
+                files={"file": ("expenses.csv", content, "text/csv")})
+
+
+async def run_load(client, data, args) -> Recorder:
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    tasks = [
+        virtual_user(client, recorder, data, deadline, seed=args.seed * 1000 + user)
+        for user in range(args.users)
+    ]
+    if args.import_rows:
+        tasks.append(large_import(client, recorder, data, args.import_rows, args.duration / 3))
+    await asyncio.gather(*tasks)
+    return recorder
+
+
+def wait_until_ready(url: str, process, timeout: float = 60):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1):
+                return
+        except OSError:  # refused, reset or timed out while starting
+            time.sleep(0.1)
+    raise RuntimeError(f"{url}/health did not answer within {timeout}s")
+
+
+def print_report(recorder: Recorder, elapsed: float, locks: LockMonitor):
+    total = sum(len(samples) for samples in recorder.samples.values())
+    errors = sum(recorder.errors.values())
+    print(f"\n{'scenario':<20} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'errors':>7}")
+    for scenario, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        print(f"{scenario:<20} {len(ordered):>9} {len(ordered) / elapsed:>8.1f} {statistics.median(ordered):>9.1f} "
+              f"{ordered[int(len(ordered) * 0.95)]:>9.1f} {ordered[int(len(ordered) * 0.99)]:>9.1f} "
+              f"{ordered[-1]:>9.1f} {recorder.errors[scenario]:>7}")
+    print(f"\ntotal: {total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s, "
+          f"error rate {errors / total if total else 0:.2%}")
+    print("status codes: " + ", ".join(f"{code}: {count}" for code, count in sorted(recorder.statuses.items())))
+    print(locks.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--import-rows", type=int, default=20000, help="rows in the concurrent import (0 = none)")
+    parser.add_argument("--spawn", action="store_true", help="run against a local uvicorn instead of in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--url", help="run against an already running server on BENCH_DATABASE_URL")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the rate limiter on")
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    init_db(force=True)
+    db = SessionLocal()
+    data = generate(db, SCALES[args.scale], args.seed)
+    db.close()
+    print(f"{args.scale} dataset on {engine.dialect.name}; {args.users} users for {args.duration:.0f}s"
+          + (f", importing {args.import_rows} expenses" if args.import_rows else ""))
+
+    in_process = not (args.spawn or args.url)
+    locks = LockMonitor(in_process)
+    process = None
+    limits = httpx.Limits(max_connections=args.users + 1)
+    timeout = httpx.Timeout(120.0)
+
+    if in_process:
+        from app.main import app
+
+        async def run():
+            await app.router.startup()
+            try:
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+                    return await run_load(client, data, args)
+            finally:
+                await app.router.shutdown()
+    else:
+        url = args.url or f"http://127.0.0.1:{args.port}"
+        if args.spawn:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=dict(os.environ)
+            )
+            wait_until_ready(url, process)
+
+        async def run():
+            async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+                return await run_load(client, data, args)
+
+    locks.start()
+    start = time.perf_counter()
+    try:
+        recorder = asyncio.run(run())
+    finally:
+        elapsed = time.perf_counter() - start
+        locks.stop()
+        if process is not None:
+            process.terminate()
+            process.wait()
+    print_report(recorder, elapsed, locks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling with uvicorn worker processes.
+
+Seeds a dataset once, then for each worker count starts uvicorn with
+--workers N (and cache sync on) and drives a closed loop of concurrent
+clients over the dashboard/report read mix for a fixed time:
+
+    python benchmarks/worker_scaling.py --workers 1,2,4 --duration 20
+    BENCH_DATABASE_URL=postgresql://localhost/ysb_bench python benchmarks/worker_scaling.py
+
+BENCH_DATABASE_URL must point at a scratch database - all tables are dropped.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench_workers.db")
+
+import httpx  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.startup import init_db  # noqa: E402
+from benchmarks.datagen import SCALES, generate  # noqa: E402
+from benchmarks.tournament_day import wait_until_ready  # noqa: E402
+
+
+def read_mix(data, rng):
+    season_id = rng.choice(data.active_season_ids)
+    team_id = rng.choice(data.teams_by_season[season_id])
+    return rng.choice([
+        f"/api/v1/budgets/summary?season_id={season_id}",
+        f"/api/v1/budgets/team/{team_id}/summary",
+        f"/api/v1/transparency/season/{season_id}/report",
+        f"/api/v1/transparency/team/{team_id}/player-costs",
+        f"/api/v1/players/?team_id={team_id}",
+    ])
+
+
+async def drive(url, data, concurrency, duration, seed):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client_loop(client, rng):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(read_mix(data, rng))
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client, random.Random(seed + n)) for n in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)))
+    # Keep below one worker's connection pool (5 + 10 overflow): endpoints
+    # check out connections on the event loop, so more in-flight requests
+    # than the pool holds stall until the pool timeout
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    init_db(force=True)
+    db = SessionLocal()
+    data = generate(db, SCALES[args.scale], args.seed)
+    db.close()
+
+    url = f"http://127.0.0.1:{args.port}"
+    print(f"{args.scale} dataset on {engine.dialect.name}, {os.cpu_count()} cores, "
+          f"{args.concurrency} concurrent clients for {args.duration:.0f}s each")
+    print(f"\n{'workers':>8} {'req/s':>9} {'speedup':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    single = None
+    for workers in (int(n) for n in args.workers.split(",")):
+        env = dict(os.environ, WEB_CONCURRENCY=str(workers), RATE_LIMIT_ENABLED="false", REQUEST_LOG_ENABLED="false")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        )
+        try:
+            wait_until_ready(url, process)
+            asyncio.run(drive(url, data, args.concurrency, 2, args.seed))  # warm up every worker
+            latencies, errors = asyncio.run(drive(url, data, args.concurrency, args.duration, args.seed))
+        finally:
+            process.terminate()
+            process.wait()
+        throughput = len(latencies) / args.duration
+        single = single or throughput
+        ordered = sorted(latencies)
+        print(f"{workers:>8} {throughput:>9.1f} {throughput / single:>7.2f}x {statistics.median(ordered):>9.1f} "
+              f"{ordered[int(len(ordered) * 0.99)]:>9.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,13 @@ set -e
 
 echo "🚀 Starting Youth Sports Budget API..."
 
-# Initialize database (will auto-create tables on first run)
-echo "📦 Initializing database..."
-python -c "
-from app.database import engine, Base
-from app.models import *
-try:
-    Base.metadata.create_all(bind=engine)
-    print('✅ Database ready')
-except Exception as e:
-    print(f'⚠️ Database note: {e}')
-" || echo "Database will initialize on first request"
+# The database schema is bootstrapped once by the app's startup hook
+# (app/startup.py), only when the models have changed.
+
+# WEB_CONCURRENCY > 1 runs that many worker processes; their caches stay
+# coherent through app/core/cache_sync.py
+WORKERS=${WEB_CONCURRENCY:-1}
 
 # Start the server
-echo "🌐 Starting uvicorn server on port ${PORT:-8000}..."
-exec python -m uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000}
+echo "🌐 Starting uvicorn server on port ${PORT:-8000} with ${WORKERS} worker(s)..."
+exec python -m uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000} --workers ${WORKERS}